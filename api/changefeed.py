@@ -0,0 +1,109 @@
+import json
+import logging
+
+from django.utils.module_loading import autodiscover_modules
+
+from api.database_routers import read_from_primary
+
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_CHANNEL = 'row_changes'
+
+change_handlers = {}
+
+
+def register_change_handler(table: str):
+    '''
+    Register a function called with (operation, row) for every change of `table` sent on the
+    change feed.
+    - operation: "INSERT", "UPDATE" or "DELETE"
+    - row: the columns of the changed row listed when the trigger was created
+    '''
+    def decorator(handler):
+        change_handlers.setdefault(table, []).append(handler)
+        return handler
+
+    return decorator
+
+
+def autodiscover_change_handlers():
+    '''
+    Import the "changes" module of every installed app, which registers its handlers.
+    '''
+    autodiscover_modules('changes')
+
+
+def dispatch_change(payload: str):
+    event = json.loads(payload)
+    handlers = change_handlers.get(event['table'], [])
+    if not handlers:
+        logger.warning("No change handler registered for table %s", event['table'])
+        return
+
+    # The notification is sent on commit, but the replicas may not have the row yet
+    with read_from_primary():
+        for handler in handlers:
+            try:
+                handler(event['op'], event['row'])
+            except Exception as e:
+                logger.exception("Error handling a change of table %s: %s", event['table'], e)
+
+
+def create_notify_row_change_function_sql() -> str:
+    return f'''
+        CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger AS $$
+        DECLARE
+            record jsonb;
+            row_data jsonb := '{{}}'::jsonb;
+            i integer;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                record := to_jsonb(OLD);
+            ELSE
+                record := to_jsonb(NEW);
+            END IF;
+
+            FOR i IN 0 .. TG_NARGS - 1 LOOP
+                row_data := row_data || jsonb_build_object(TG_ARGV[i], record -> TG_ARGV[i]);
+            END LOOP;
+
+            PERFORM pg_notify(
+                '{CHANGE_FEED_CHANNEL}',
+                jsonb_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'row', row_data)::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    '''
+
+
+def create_notify_row_change_trigger_sql(
+    table: str,
+    operation: str,
+    row_columns: tuple,
+    watched_columns: tuple = ()
+) -> str:
+    '''
+    Return the SQL creating a trigger that sends the `row_columns` of every row of `table` changed
+    by `operation` on the change feed.
+    - watched_columns: for updates, only notify when one of these columns changes
+    '''
+    name = f'{table}_{operation.lower()}_notify'
+    condition = ''
+    if operation == 'UPDATE' and watched_columns:
+        old_columns = ', '.join(f'OLD.{column}' for column in watched_columns)
+        new_columns = ', '.join(f'NEW.{column}' for column in watched_columns)
+        condition = f'WHEN (ROW({old_columns}) IS DISTINCT FROM ROW({new_columns}))'
+
+    arguments = ', '.join(f"'{column}'" for column in row_columns)
+    return f'''
+        CREATE TRIGGER {name}
+        AFTER {operation} ON {table}
+        FOR EACH ROW {condition}
+        EXECUTE FUNCTION notify_row_change({arguments});
+    '''
+
+
+def drop_notify_row_change_trigger_sql(table: str, operation: str) -> str:
+    return f'DROP TRIGGER IF EXISTS {table}_{operation.lower()}_notify ON {table};'
@@ -1,4 +1,22 @@
 import random 
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+reading_from_primary = ContextVar('reading_from_primary', default=False)
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Route the reads made inside the block to the primary database, for code that must see rows
+    committed a moment ago and cannot wait for the replicas to catch up.
+    """
+    token = reading_from_primary.set(True)
+    try:
+        yield
+    finally:
+        reading_from_primary.reset(token)
 
 
 class DBRouter:
@@ -11,6 +29,9 @@ class DBRouter:
         """
         Direct read operations to the replica database.
         """
+        if reading_from_primary.get():
+            return "default"
+
         return random.choice(["replica1", "replica2"])
 
     def db_for_write(self, model, **hints):
@@ -0,0 +1,52 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.db.utils import OperationalError
+
+from api.changefeed import CHANGE_FEED_CHANNEL, autodiscover_change_handlers, dispatch_change
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Listen to the row changes notified by the triggers of the primary database and publish them '
+        'to centrifugo. Run a single instance of this command.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reconnect-delay',
+            type=float,
+            default=5,
+            help='Seconds to wait before reconnecting after the connection is lost'
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_change_handlers()
+
+        while True:
+            try:
+                self.listen()
+            except OperationalError as e:
+                logger.error("Lost the connection listening to the change feed: %s", e)
+                time.sleep(options['reconnect_delay'])
+
+    def listen(self):
+        # A dedicated connection, so the handlers can run queries while it waits for notifications
+        listener = connections.create_connection('default')
+        try:
+            listener.ensure_connection()
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANGE_FEED_CHANNEL}')
+
+            self.stdout.write(f'Listening to the {CHANGE_FEED_CHANNEL} channel')
+            with listener.wrap_database_errors:
+                for notification in listener.connection.notifies():
+                    dispatch_change(notification.payload)
+                    close_old_connections()
+        finally:
+            listener.close()
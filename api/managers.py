@@ -0,0 +1,61 @@
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+
+
+class LookupTableManager(models.Manager):
+    '''
+    Manager for small lookup tables (roles, statuses) whose rows are created by
+    data migrations and practically never change. The whole table is loaded once
+    per process and kept in memory, so model defaults and write paths can resolve
+    a row by name or id without a round trip to the database.
+
+    The cache is cleared whenever a row is saved or deleted through the ORM. Call
+    `clear_cache()` after changing the table any other way (raw SQL, fixtures).
+    '''
+
+    lookup_field = 'name'
+
+    def __init__(self):
+        super().__init__()
+        self._cache_by_name = {}
+        self._cache_by_id = {}
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        if not cls._meta.abstract:
+            post_save.connect(self._clear_cache_on_change, sender=cls, weak=False)
+            post_delete.connect(self._clear_cache_on_change, sender=cls, weak=False)
+
+    def _clear_cache_on_change(self, **kwargs):
+        self.clear_cache()
+
+    def _populate_cache(self):
+        rows = list(self.all())
+        self._cache_by_name = {getattr(row, self.lookup_field): row for row in rows}
+        self._cache_by_id = {row.pk: row for row in rows}
+
+    def get_by_name(self, name):
+        if name not in self._cache_by_name:
+            self._populate_cache()
+
+        try:
+            return self._cache_by_name[name]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                f'{self.model.__name__} matching {self.lookup_field}={name!r} does not exist.'
+            )
+
+    def get_by_id(self, pk):
+        if pk not in self._cache_by_id:
+            self._populate_cache()
+
+        try:
+            return self._cache_by_id[pk]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                f'{self.model.__name__} matching pk={pk!r} does not exist.'
+            )
+
+    def clear_cache(self):
+        self._cache_by_name = {}
+        self._cache_by_id = {}
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2025-01-13 15:12
+
+from django.db import migrations
+
+from api.changefeed import (
+    create_notify_row_change_function_sql,
+    create_notify_row_change_trigger_sql,
+    drop_notify_row_change_trigger_sql,
+)
+
+
+# (table, operation, columns sent with the event, columns whose update is sent)
+triggers = (
+    ('teams_post', 'UPDATE', ('id', 'team_id'), ('title', 'content', 'status_id', 'likes_count', 'comments_count')),
+    ('teams_post', 'DELETE', ('id', 'team_id'), ()),
+    ('teams_postcomment', 'INSERT', ('id', 'post_id'), ()),
+    ('teams_postcomment', 'UPDATE', ('id', 'post_id'), ('content', 'status_id', 'likes_count', 'replies_count')),
+    ('management_report', 'INSERT', ('id', 'accuser_id'), ()),
+    ('management_report', 'UPDATE', ('id', 'accuser_id'), ('resolved',)),
+    ('management_inquiry', 'UPDATE', ('id',), ('title', 'inquiry_type_id', 'solved')),
+    ('management_inquirymoderator', 'INSERT', ('id', 'inquiry_id', 'moderator_id', 'in_charge'), ()),
+    ('management_inquirymoderator', 'UPDATE', ('id', 'inquiry_id', 'moderator_id', 'in_charge'), ('in_charge',)),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0011_inquiry_last_message_inquiry_moderators_count_and_more'),
+        ('teams', '0016_post_search_vector_postcomment_search_vector_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            create_notify_row_change_function_sql(),
+            'DROP FUNCTION IF EXISTS notify_row_change();'
+        ),
+    ] + [
+        migrations.RunSQL(
+            create_notify_row_change_trigger_sql(table, operation, row_columns, watched_columns),
+            drop_notify_row_change_trigger_sql(table, operation)
+        )
+        for table, operation, row_columns, watched_columns in triggers
+    ]
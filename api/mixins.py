@@ -28,6 +28,23 @@ class DynamicFieldsSerializerMixin(object):
                 self.fields.pop(field_name)
 
 
+class LazyAuthenticationMixin(object):
+    '''
+    Skip the up-front authentication for the actions listed in `user_independent_actions`.
+    The request is then authenticated only if the view actually touches `request.user`
+    or `request.auth`, so responses that are the same for every user don't pay for the
+    token decoding and the user lookup.
+    '''
+
+    user_independent_actions = ()
+
+    def perform_authentication(self, request):
+        if self.action in self.user_independent_actions:
+            return
+
+        super(LazyAuthenticationMixin, self).perform_authentication(request)
+
+
 class PaginationHandlerMixin(object):
     @property
     def paginator(self):
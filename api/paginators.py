@@ -1,12 +1,27 @@
+import base64
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from django.db import connection, transaction
+from django.db import connections, transaction
+from django.db.models import Q
 from django.db.utils import OperationalError
+from django.utils.dateparse import parse_datetime
 from django.utils.functional import cached_property
 
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination, BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from api.mixins import PaginationHandlerMixin
 
+logger = logging.getLogger(__name__)
+
 
 class LargeTablePaginator(Paginator):
     """
@@ -14,43 +29,206 @@ class LargeTablePaginator(Paginator):
      - https://gist.github.com/safar/3bbf96678f3e479b6cb683083d35cb4d
      - https://medium.com/@hakibenita/optimizing-django-admin-paginator-53c4eb6bfca3
     Overrides the count method of QuerySet objects to avoid timeouts.
-    - Try to get the real count limiting the queryset execution time to 150 ms.
-    - If count takes longer than 150 ms the database kills the query and raises OperationError. In that case,
-    get an estimate instead of actual count when not filtered (this estimate can be stale and hence not fit for
-    situations where the count of objects actually matter).
-    - If any other exception occured fall back to default behaviour.
+    - Filtered querysets first look for a cached count of the same query.
+    - Try to get the real count limiting the queryset execution time to LARGE_TABLE_PAGINATOR_COUNT_TIMEOUT ms.
+    A filtered count obtained this way is cached for LARGE_TABLE_PAGINATOR_COUNT_CACHE_TIMEOUT seconds. The
+    timeout is set on the connection of the database the queryset is read from.
+    - If count takes longer than that the database kills the query and raises OperationError. In that case,
+    get an estimate instead of actual count (this estimate can be stale and hence not fit for situations where
+    the count of objects actually matter): the table statistics when not filtered, the row estimate of the
+    query plan when filtered, which is cached like an exact count.
+    - Plan estimates below LARGE_TABLE_PAGINATOR_MIN_ESTIMATE rows are not trusted, and neither are failed
+    estimates; fall back to default behaviour and cache the result.
+    The strategy that served the count is stored in `count_strategy` and logged.
     """
+    count_strategy = None
+
+    @cached_property
+    def db(self):
+        # Reads are routed to a random replica; every query of the count runs on the same one, so
+        # the timeout is set on the connection that actually counts
+        return self.object_list.db
 
     @cached_property
     def count(self):
         """
         Returns an estimated number of objects, across all pages.
         """
+        is_filtered = bool(self.object_list.query.where)
+
+        if is_filtered:
+            count = cache.get(self.count_cache_key)
+            if count is not None:
+                return self.log_count_strategy('cache', count)
+
         try:
-            with transaction.atomic(), connection.cursor() as cursor:
-                # Limit to 150 ms
-                cursor.execute('SET LOCAL statement_timeout TO 5;')
-                return super().count
+            count = self.get_exact_count()
+            return self.log_count_strategy('exact', self.cache_count(count) if is_filtered else count)
         except OperationalError:
             pass
 
-        if not self.object_list.query.where:
-            try:
-                with transaction.atomic(), connection.cursor() as cursor:
-                    # Obtain estimated values (only valid with PostgreSQL)
-                    cursor.execute(
-                        "SELECT reltuples FROM pg_class WHERE relname = %s",
-                        [self.object_list.query.model._meta.db_table]
-                    )
-                    estimate = int(cursor.fetchone()[0])
-                    return estimate
-            except Exception:
-                # If any other exception occurred fall back to default behaviour
-                pass
-        return super().count
-    
+        try:
+            if not is_filtered:
+                return self.log_count_strategy('table_estimate', self.get_table_estimate())
+
+            estimate = self.get_plan_estimate()
+            if estimate >= settings.LARGE_TABLE_PAGINATOR_MIN_ESTIMATE:
+                # Cached too, so the next requests don't wait for the timeout again
+                return self.log_count_strategy('plan_estimate', self.cache_count(estimate))
+        except Exception:
+            # If any other exception occurred fall back to default behaviour
+            pass
+
+        count = self.object_list.using(self.db).count()
+        return self.log_count_strategy('full', self.cache_count(count) if is_filtered else count)
+
+    @cached_property
+    def count_cache_key(self):
+        sql, params = self.object_list.order_by().query.sql_with_params()
+        query_hash = hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+        return f'paginator_count_{query_hash}'
+
+    def cache_count(self, count):
+        cache.set(self.count_cache_key, count, settings.LARGE_TABLE_PAGINATOR_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_exact_count(self):
+        # Raises OperationalError when the count runs longer than LARGE_TABLE_PAGINATOR_COUNT_TIMEOUT ms
+        with transaction.atomic(using=self.db), connections[self.db].cursor() as cursor:
+            cursor.execute(f'SET LOCAL statement_timeout TO {int(settings.LARGE_TABLE_PAGINATOR_COUNT_TIMEOUT)};')
+            return self.object_list.using(self.db).count()
+
+    def get_table_estimate(self):
+        # Obtain estimated values (only valid with PostgreSQL)
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE relname = %s",
+                [self.object_list.query.model._meta.db_table]
+            )
+            return int(cursor.fetchone()[0])
+
+    def get_plan_estimate(self):
+        # Ask the planner how many rows the query would return, without running it (PostgreSQL only)
+        sql, params = self.object_list.order_by().query.sql_with_params()
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+    def log_count_strategy(self, strategy, count):
+        self.count_strategy = strategy
+        logger.debug(
+            'Counted %s rows of %s using the %s strategy',
+            count,
+            self.object_list.query.model._meta.db_table,
+            strategy
+        )
+        return count
+
 
 class CustomPageNumberPagination(PageNumberPagination):
     django_paginator_class = LargeTablePaginator
     page_size = 10
-    page_query_param = 'page'
\ No newline at end of file
+    page_query_param = 'page'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination on `(ordering_field, id)`, newest first, or oldest first when
+    `descending` is False.
+    - Each page is selected with a WHERE on the last row of the previous page instead of an OFFSET,
+    so deep pages cost the same as the first one when backed by a matching composite index.
+    - No COUNT query is run; the response only carries the link to the next page.
+    - The ordering of the queryset is replaced by the keyset ordering.
+    """
+    page_size = 10
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering_field='created_at', page_size=None, descending=True):
+        self.ordering_field = ordering_field
+        self.descending = descending
+        if page_size is not None:
+            self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.pk_field = queryset.model._meta.pk
+
+        prefix, lookup = ('-', 'lt') if self.descending else ('', 'gt')
+        queryset = queryset.order_by(f'{prefix}{self.ordering_field}', f'{prefix}{self.pk_field.name}')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            position, pk = self.decode_cursor(cursor)
+            # The redundant "lte"/"gte" lets the database range scan the index
+            queryset = queryset.filter(
+                **{f'{self.ordering_field}__{lookup}e': position}
+            ).filter(
+                Q(**{f'{self.ordering_field}__{lookup}': position}) |
+                Q(**{self.ordering_field: position, f'{self.pk_field.name}__{lookup}': pk})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        return self.page
+
+    def encode_cursor(self, obj):
+        position = getattr(obj, self.ordering_field).isoformat()
+        cursor = json.dumps([position, str(obj.pk)])
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            position, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            position = parse_datetime(position)
+            pk = self.pk_field.to_python(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if position is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, pk
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+# Query parameters that change the ordering of the list endpoints
+KEYSET_INCOMPATIBLE_QUERY_PARAMS = ('sort', 'search')
+
+
+def get_pagination_for_request(request, ordering_field='created_at'):
+    """
+    Return the pagination for an endpoint that supports keyset pagination.
+    - Clients opt in with the "cursor" query parameter, left empty for the first page, and then
+    follow the "next" links.
+    - Otherwise page number pagination is used, so existing clients keep working.
+    - Keyset pagination only follows `ordering_field`, so page number pagination is also used
+    when the request sorts or searches, to keep the ordering asked for or the search ranking.
+    """
+    if (
+        KeysetPagination.cursor_query_param in request.query_params and
+        not any(request.query_params.get(param) for param in KEYSET_INCOMPATIBLE_QUERY_PARAMS)
+    ):
+        return KeysetPagination(ordering_field=ordering_field)
+
+    return CustomPageNumberPagination()
@@ -1,3 +1,128 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db.utils import OperationalError
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.changefeed import change_handlers, create_notify_row_change_trigger_sql, dispatch_change
+from api.database_routers import DBRouter
+from api.paginators import (
+    CustomPageNumberPagination,
+    KeysetPagination,
+    LargeTablePaginator,
+    get_pagination_for_request,
+)
+from users.models import User
+
+from unittest.mock import Mock, patch
+
+
+class LargeTablePaginatorTestCase(TestCase):
+    def setUp(self):
+        for i in range(3):
+            User.objects.create(username=f'paginated{i}', email=f'paginated{i}@test.com')
+
+    def create_paginator(self):
+        queryset = User.objects.filter(username__startswith='paginated').order_by('id')
+        paginator = LargeTablePaginator(queryset, 10)
+        cache.delete(paginator.count_cache_key)
+        return paginator
+
+    def test_exact_count_of_filtered_queryset_is_cached(self):
+        paginator = self.create_paginator()
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.count_strategy, 'exact')
+
+        paginator = LargeTablePaginator(paginator.object_list, 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.count_strategy, 'cache')
+
+    @override_settings(LARGE_TABLE_PAGINATOR_MIN_ESTIMATE=0)
+    def test_plan_estimate_is_used_and_cached_when_count_times_out(self):
+        paginator = self.create_paginator()
+        with patch.object(LargeTablePaginator, 'get_exact_count', side_effect=OperationalError):
+            estimate = paginator.count
+
+        self.assertEqual(paginator.count_strategy, 'plan_estimate')
+
+        paginator = LargeTablePaginator(paginator.object_list, 10)
+        self.assertEqual(paginator.count, estimate)
+        self.assertEqual(paginator.count_strategy, 'cache')
+
+    @override_settings(LARGE_TABLE_PAGINATOR_MIN_ESTIMATE=10 ** 9)
+    def test_full_count_when_plan_estimate_is_too_small(self):
+        paginator = self.create_paginator()
+        with patch.object(LargeTablePaginator, 'get_exact_count', side_effect=OperationalError):
+            self.assertEqual(paginator.count, 3)
+
+        self.assertEqual(paginator.count_strategy, 'full')
+
+
+class PaginationForRequestTestCase(TestCase):
+    def get_pagination(self, query):
+        return get_pagination_for_request(Request(APIRequestFactory().get(f'/api/teams/1/posts/{query}')))
+
+    def test_keyset_pagination_is_opt_in(self):
+        self.assertIsInstance(self.get_pagination(''), CustomPageNumberPagination)
+        self.assertIsInstance(self.get_pagination('?cursor='), KeysetPagination)
+        self.assertIsInstance(self.get_pagination('?cursor=&search='), KeysetPagination)
+
+    def test_sorted_and_searched_requests_use_page_numbers(self):
+        self.assertIsInstance(self.get_pagination('?cursor=&sort=username'), CustomPageNumberPagination)
+        self.assertIsInstance(self.get_pagination('?cursor=&search=test'), CustomPageNumberPagination)
+
+
+class ChangeFeedTestCase(TestCase):
+    def create_payload(self, table, op='UPDATE', row=None):
+        return json.dumps({'table': table, 'op': op, 'row': row or {'id': 1}})
+
+    def test_change_is_dispatched_to_the_handlers_of_its_table(self):
+        post_handler = Mock()
+        comment_handler = Mock()
+
+        handlers = {'teams_post': [post_handler], 'teams_postcomment': [comment_handler]}
+        with patch.dict(change_handlers, handlers, clear=True):
+            dispatch_change(self.create_payload('teams_post', 'DELETE', {'id': 1, 'team_id': 2}))
+            dispatch_change(self.create_payload('teams_unknown'))
+
+        post_handler.assert_called_once_with('DELETE', {'id': 1, 'team_id': 2})
+        comment_handler.assert_not_called()
+
+    def test_failing_handler_does_not_stop_the_others(self):
+        failing_handler = Mock(side_effect=ValueError)
+        handler = Mock()
+
+        with patch.dict(change_handlers, {'teams_post': [failing_handler, handler]}, clear=True):
+            dispatch_change(self.create_payload('teams_post'))
+
+        failing_handler.assert_called_once()
+        handler.assert_called_once_with('UPDATE', {'id': 1})
+
+    def test_handlers_read_from_primary(self):
+        databases = []
+
+        def handler(op, row):
+            databases.append(DBRouter().db_for_read(User))
+
+        with patch.dict(change_handlers, {'teams_post': [handler]}, clear=True):
+            dispatch_change(self.create_payload('teams_post'))
+
+        self.assertEqual(databases, ['default'])
+        self.assertNotEqual(DBRouter().db_for_read(User), 'default')
+
+    def test_update_trigger_only_fires_on_watched_columns(self):
+        sql = create_notify_row_change_trigger_sql('teams_post', 'UPDATE', ('id', 'team_id'), ('title', 'likes_count'))
+
+        self.assertIn('AFTER UPDATE ON teams_post', sql)
+        self.assertIn(
+            'WHEN (ROW(OLD.title, OLD.likes_count) IS DISTINCT FROM ROW(NEW.title, NEW.likes_count))',
+            sql
+        )
+        self.assertIn("EXECUTE FUNCTION notify_row_change('id', 'team_id')", sql)
+
+        # inserts and deletes always fire, and so do updates without watched columns
+        self.assertNotIn('WHEN', create_notify_row_change_trigger_sql('teams_post', 'DELETE', ('id',), ('title',)))
+        self.assertNotIn('WHEN', create_notify_row_change_trigger_sql('teams_post', 'UPDATE', ('id',)))
@@ -0,0 +1,107 @@
+import math
+import time
+
+from rest_framework.throttling import BaseThrottle
+
+from api.utils import get_redis_client
+
+
+# Token bucket kept in a redis hash, refilled by the time elapsed since the last request.
+# Returns {allowed, milliseconds to wait for the next token}.
+TOKEN_BUCKET_SCRIPT = '''
+local capacity = tonumber(ARGV[1])
+local tokens_per_ms = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * tokens_per_ms)
+
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = math.ceil((1 - tokens) / tokens_per_ms)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / tokens_per_ms))
+return {allowed, wait}
+'''
+
+token_bucket_script = None
+
+def consume_token(key: str, capacity: int, tokens_per_second: float):
+    '''
+    Take a token from the bucket of `key` in a single round trip, and return whether one was
+    available and how many seconds to wait for the next one.
+    '''
+
+    global token_bucket_script
+    if token_bucket_script is None:
+        token_bucket_script = get_redis_client().register_script(TOKEN_BUCKET_SCRIPT)
+
+    allowed, wait = token_bucket_script(
+        keys=[key],
+        args=[capacity, tokens_per_second / 1000, int(time.time() * 1000)]
+    )
+    return bool(allowed), wait / 1000
+
+
+class RoleRateThrottle(BaseThrottle):
+    '''
+    Limit how often an authenticated user can call the throttled actions, with a limit picked
+    by the weight of the role of the user. Runs before the handler, so a throttled request
+    costs a single redis call.
+    - scope: name of the bucket, shared by the views using the same scope
+    - rates: (max role weight, burst, tokens per second), ordered by weight. The first
+    entry whose weight is not lower than the user's applies, the last one otherwise.
+    '''
+
+    scope = None
+    rates = ()
+
+    def get_cache_key(self, request, view):
+        return f'throttle_{self.scope}_{request.user.id}'
+
+    def get_rate(self, user):
+        for max_weight, capacity, tokens_per_second in self.rates:
+            if user.role.weight <= max_weight:
+                return capacity, tokens_per_second
+
+        return self.rates[-1][1:]
+
+    def allow_request(self, request, view):
+        if not request.user.is_authenticated:
+            return True
+
+        capacity, tokens_per_second = self.get_rate(request.user)
+        allowed, self.wait_time = consume_token(
+            self.get_cache_key(request, view),
+            capacity,
+            tokens_per_second
+        )
+        return allowed
+
+    def wait(self):
+        return math.ceil(self.wait_time)
+
+
+class GameChatRateThrottle(RoleRateThrottle):
+    scope = 'game_chat'
+    rates = (
+        (3, 20, 5),
+        (4, 5, 1),
+    )
+
+
+class UserChatRateThrottle(RoleRateThrottle):
+    scope = 'user_chat'
+    rates = (
+        (3, 30, 5),
+        (4, 10, 2),
+    )
@@ -1,3 +1,72 @@
+import hashlib
+import re
+
+import redis
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def get_request_cache_key(prefix, request):
+    '''
+    Build a cache key from the full URL of the request, so that every page, sort order
+    and search term of an endpoint gets its own cache entry.
+    '''
+
+    url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'{prefix}_{url_hash}'
+
+
+redis_client = None
+
+def get_redis_client() -> redis.Redis:
+    '''
+    Return a client of the redis server used by the cache, for the data structures the cache API
+    does not expose, e.g. streams. The client is created once per process.
+    '''
+
+    global redis_client
+    if redis_client is None:
+        redis_client = redis.Redis.from_url(
+            settings.CACHES['default']['LOCATION'],
+            decode_responses=True
+        )
+
+    return redis_client
+
+
+def count_subquery(model, field):
+    '''
+    Return an expression counting the rows of `model` whose `field` points at the outer row,
+    e.g. `Post.objects.update(likes_count=count_subquery(PostLike, 'post'))`.
+    '''
+
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(count=Count('pk')).values('count')
+        ),
+        0
+    )
+
+
+def reconcile_counter(queryset, field, model, model_field):
+    '''
+    Fix the denormalized counter `field` of the rows in `queryset` that drifted from the
+    actual number of `model` rows pointing at them, and return how many rows were fixed.
+    '''
+
+    actual_count = count_subquery(model, model_field)
+    return queryset.annotate(
+        actual_count=actual_count
+    ).exclude(
+        **{field: F('actual_count')}
+    ).update(**{field: actual_count})
+
+
 class MockResponse:
     def __init__(self, status_code, json_data):
         self.status_code = status_code
@@ -8,4 +77,66 @@ class MockResponse:
             raise Exception()
 
     def json(self):
-        return self.json_data
\ No newline at end of file
+        return self.json_data
+
+
+# Text search configurations every search vector and query is built with. The site is
+# written in English and Korean; PostgreSQL has no Korean dictionary, so Korean words are
+# indexed as-is by the "simple" configuration while English words are also stemmed.
+SEARCH_CONFIGS = ('english', 'simple')
+
+
+def create_search_vector(*weighted_fields):
+    '''
+    Build a search vector over `(field, weight)` pairs for every configuration of SEARCH_CONFIGS.
+    The expression only uses immutable functions, so it can back a stored generated column.
+    '''
+
+    vector = None
+    for config in SEARCH_CONFIGS:
+        for field, weight in weighted_fields:
+            field_vector = SearchVector(field, config=config, weight=weight)
+            vector = field_vector if vector is None else vector + field_vector
+
+    return vector
+
+
+def create_search_query(search_term):
+    '''
+    Build a prefix matching search query from the words of `search_term`, so that results
+    are found while the user is still typing. Returns None if the term has no words.
+    '''
+
+    words = re.findall(r'[^\W_]+', search_term)
+    if not words:
+        return None
+
+    raw_query = ' & '.join(f'{word}:*' for word in words)
+
+    query = None
+    for config in SEARCH_CONFIGS:
+        config_query = SearchQuery(raw_query, config=config, search_type='raw')
+        query = config_query if query is None else query | config_query
+
+    return query
+
+
+def filter_by_search_term(queryset, search_term, vector_fields=('search_vector',)):
+    '''
+    Filter `queryset` to rows whose search vector matches `search_term`, and annotate them
+    with `search_rank` to order the results by relevance.
+    - vector_fields: search vector fields to match, the rank is computed on the first one.
+    '''
+
+    search_query = create_search_query(search_term)
+    if search_query is None:
+        return queryset
+
+    search_filter = Q()
+    for field in vector_fields:
+        search_filter |= Q(**{field: search_query})
+
+    return queryset.filter(search_filter).annotate(
+        search_rank=SearchRank(F(vector_fields[0]), search_query)
+    )
+
@@ -71,4 +71,50 @@ def broadcast_message_to_centrifuge(channels: list, message: dict):
         logger.error("Error broadcasting message to centrifugo: %s", e)
         return None
 
-    return resp.json()
\ No newline at end of file
+    return resp.json()
+
+def publish_messages_to_centrifuge(publications: list, type: str = "message"):
+    '''
+    Publish several messages with a single request to the batch API of centrifugo.
+    - publications: list of (channel, message) pairs
+    '''
+    logger.info("Publishing %s messages to channels %s", len(publications), [channel for channel, _ in publications])
+
+    commands = []
+    for channel, message in publications:
+        message['type'] = type
+        commands.append({
+            "publish": {
+                "channel": channel,
+                "data": message
+            }
+        })
+
+    data = json.dumps({"commands": commands})
+
+    try:
+        headers = {'Content-type': 'application/json', 'X-API-Key': api_key}
+        resp = requests.post(
+            f"{centrifugo_url}/api/batch",
+            data=data,
+            headers=headers
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        logger.info("Response from centrifugo: %s", data)
+
+        errors = [reply['error'] for reply in data.get('replies', []) if reply.get('error', None)]
+        if data.get('error', None) or errors:
+            logger.error("Error publishing messages to centrifugo: %s", data.get('error', None) or errors)
+            return None
+    except requests.exceptions.ConnectionError as e:
+        logger.error("Error connecting to centrifugo: %s", e)
+        return None
+    except requests.exceptions.HTTPError as e:
+        logger.error("Error publishing messages to centrifugo: %s", e)
+        return None
+    except Exception as e:
+        logger.error("Error publishing messages to centrifugo: %s", e)
+        return None
+
+    return data
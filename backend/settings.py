@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'teams.apps.TeamsConfig',
     'games.apps.GamesConfig',
     'management.apps.ManagementConfig',
+    'notification.apps.NotificationConfig',
     'api.apps.ApiConfig',
     'users.apps.UsersConfig',
     'django.contrib.admin',
@@ -58,6 +59,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.sites',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_extensions',
     "corsheaders",
     "debug_toolbar",
@@ -287,6 +289,18 @@ AUTH_USER_MODEL = 'users.User'
 SESSION_COOKIE_SAMESITE = 'None'
 SEASON_YEAR = '2024-25'
 
+# Seconds an authenticated user is kept in the cache between DB lookups
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# LargeTablePaginator count strategy
+# Milliseconds an exact COUNT(*) may run before an estimate is used instead
+LARGE_TABLE_PAGINATOR_COUNT_TIMEOUT = 150
+# Planner estimates below this number of rows are considered too inaccurate,
+# and the exact count is run without a time limit
+LARGE_TABLE_PAGINATOR_MIN_ESTIMATE = 1000
+# Seconds an exact count of a filtered queryset is kept in the cache
+LARGE_TABLE_PAGINATOR_COUNT_CACHE_TIMEOUT = 60
+
 # CORS settings
 FRONTEND_URL = env.str('FRONTEND_URL')
 
@@ -381,6 +395,36 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=0, hour=5),
         "options": {"queue": "low_priority"},
     },
+    "reconcile_like_and_comment_counters": {
+        "task": "teams.tasks.reconcile_like_and_comment_counters",
+        "schedule": crontab(minute=30, hour=4),
+        "options": {"queue": "low_priority"},
+    },
+    "update_today_top_5_popular_posts": {
+        "task": "teams.tasks.update_today_top_5_popular_posts",
+        "schedule": crontab(minute="*/5"),
+        "options": {"queue": "low_priority"},
+    },
+    "delete_expired_post_interaction_buckets": {
+        "task": "teams.tasks.delete_expired_post_interaction_buckets",
+        "schedule": crontab(minute=15),
+        "options": {"queue": "low_priority"},
+    },
+    "reconcile_user_likes_count": {
+        "task": "users.tasks.reconcile_user_likes_count",
+        "schedule": crontab(minute=30, hour=4),
+        "options": {"queue": "low_priority"},
+    },
+    "delete_expired_read_notifications": {
+        "task": "notification.tasks.delete_expired_read_notifications",
+        "schedule": crontab(minute=0, hour=4),
+        "options": {"queue": "low_priority"},
+    },
+    "grade_ungraded_game_predictions": {
+        "task": "games.tasks.grade_ungraded_game_predictions",
+        "schedule": crontab(minute="*/30"),
+        "options": {"queue": "low_priority"},
+    },
 }
 
 ## Cache settings
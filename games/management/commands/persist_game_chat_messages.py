@@ -0,0 +1,134 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from redis.exceptions import ResponseError
+
+from api.utils import get_redis_client
+from games.services import (
+    GAME_CHAT_FLUSH_BATCH_SIZE,
+    GAME_CHAT_FLUSH_INTERVAL_MS,
+    GAME_CHAT_MESSAGE_DEAD_LETTER_STREAM,
+    GAME_CHAT_MESSAGE_STREAM,
+    GAME_CHAT_MESSAGE_STREAM_GROUP,
+    GAME_CHAT_MESSAGE_STREAM_MAX_LENGTH,
+    GAME_CHAT_PENDING_MIN_IDLE_MS,
+    write_game_chat_messages
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the game chat messages buffered in the redis stream to the database in batches. '
+        'Several instances can run with different consumer names; the messages left pending by '
+        'a consumer that stopped are claimed by the others.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', default='writer-1', help='Name of this consumer in the stream group')
+
+    def handle(self, *args, **options):
+        client = get_redis_client()
+        consumer = options['consumer']
+
+        try:
+            client.xgroup_create(GAME_CHAT_MESSAGE_STREAM, GAME_CHAT_MESSAGE_STREAM_GROUP, id='0', mkstream=True)
+        except ResponseError as e:
+            # The group already exists
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+        self.stdout.write(f'Writing the messages of the {GAME_CHAT_MESSAGE_STREAM} stream as {consumer}')
+
+        # Messages read but not acknowledged before a restart are written first
+        last_id = '0'
+        claimed_at = 0
+        while True:
+            if time.monotonic() - claimed_at >= GAME_CHAT_PENDING_MIN_IDLE_MS / 1000:
+                claimed_at = time.monotonic()
+                if self.claim_pending_entries(client, consumer):
+                    last_id = '0'
+
+            response = client.xreadgroup(
+                GAME_CHAT_MESSAGE_STREAM_GROUP,
+                consumer,
+                {GAME_CHAT_MESSAGE_STREAM: last_id},
+                count=GAME_CHAT_FLUSH_BATCH_SIZE,
+                block=GAME_CHAT_FLUSH_INTERVAL_MS
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                last_id = '>'
+                continue
+
+            entry_ids = [entry_id for entry_id, _ in entries]
+            # Pending entries trimmed from the stream come back without fields
+            entries = [fields for _, fields in entries if fields]
+            try:
+                rejected_entries = write_game_chat_messages(entries) if entries else []
+            except Exception as e:
+                logger.exception("Error writing %s game chat messages: %s", len(entries), e)
+                close_old_connections()
+                time.sleep(GAME_CHAT_FLUSH_INTERVAL_MS / 1000)
+                last_id = '0'
+                continue
+
+            if rejected_entries:
+                self.dead_letter_entries(client, rejected_entries)
+
+            client.xack(GAME_CHAT_MESSAGE_STREAM, GAME_CHAT_MESSAGE_STREAM_GROUP, *entry_ids)
+            client.xdel(GAME_CHAT_MESSAGE_STREAM, *entry_ids)
+            logger.info(
+                "Wrote %s game chat messages, rejected %s",
+                len(entries) - len(rejected_entries),
+                len(rejected_entries)
+            )
+
+    def claim_pending_entries(self, client, consumer) -> bool:
+        '''
+        Claim the entries pending on other consumers for longer than GAME_CHAT_PENDING_MIN_IDLE_MS,
+        e.g. of a consumer that crashed and was not restarted, and return whether any was claimed.
+        '''
+
+        claimed = False
+        start_id = '0-0'
+        while True:
+            response = client.xautoclaim(
+                GAME_CHAT_MESSAGE_STREAM,
+                GAME_CHAT_MESSAGE_STREAM_GROUP,
+                consumer,
+                GAME_CHAT_PENDING_MIN_IDLE_MS,
+                start_id=start_id,
+                count=GAME_CHAT_FLUSH_BATCH_SIZE
+            )
+            start_id, claimed_entries = response[0], response[1]
+            claimed = claimed or bool(claimed_entries)
+            if start_id == '0-0':
+                break
+
+        if claimed:
+            logger.info("Claimed the pending game chat messages of other consumers")
+
+        return claimed
+
+    def dead_letter_entries(self, client, entries) -> None:
+        with client.pipeline() as pipe:
+            for entry in entries:
+                pipe.xadd(
+                    GAME_CHAT_MESSAGE_DEAD_LETTER_STREAM,
+                    entry,
+                    maxlen=GAME_CHAT_MESSAGE_STREAM_MAX_LENGTH,
+                    approximate=True
+                )
+            pipe.execute()
+
+        logger.warning(
+            "Moved %s game chat messages that cannot be written to %s",
+            len(entries),
+            GAME_CHAT_MESSAGE_DEAD_LETTER_STREAM
+        )
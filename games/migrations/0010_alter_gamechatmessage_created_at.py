@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2025-01-16 13:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0009_alter_teamstatistics_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gamechatmessage',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
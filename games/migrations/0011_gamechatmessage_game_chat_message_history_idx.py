@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2025-01-17 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0010_alter_gamechatmessage_created_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamechatmessage',
+            index=models.Index(fields=['chat', '-created_at', '-id'], name='game_chat_message_history_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2025-01-17 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0011_gamechatmessage_game_chat_message_history_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameprediction',
+            name='is_correct',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2025-01-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0012_gameprediction_is_correct'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameprediction',
+            index=models.Index(
+                condition=models.Q(('is_correct__isnull', True)), 
+                fields=['game'], 
+                name='prediction_ungraded_idx'
+            ),
+        ),
+    ]
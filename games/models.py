@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 
 
 class Game(models.Model):
@@ -152,9 +153,16 @@ class GameChatMessage(models.Model):
         on_delete=models.CASCADE
     )
     message = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so messages written in batches keep the time they were sent at
+    created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Chat history is paginated newest first on (created_at, id) within a chat
+            models.Index(fields=['chat', '-created_at', '-id'], name='game_chat_message_history_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user} in {self.chat}'
     
@@ -209,7 +217,10 @@ class GamePrediction(models.Model):
         GameChat,
         on_delete=models.CASCADE
     )
+    # True if the user predicts the home team to win
     prediction = models.BooleanField()
+    # Set when the game is final, None until then
+    is_correct = models.BooleanField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -218,6 +229,14 @@ class GamePrediction(models.Model):
     
     class Meta:
         unique_together = ['user', 'game']
+        indexes = [
+            # Finds the final games whose predictions are still to be graded
+            models.Index(
+                fields=['game'], 
+                condition=models.Q(is_correct__isnull=True), 
+                name='prediction_ungraded_idx'
+            ),
+        ]
 
 
 class LineScore(models.Model):
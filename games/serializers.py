@@ -1,7 +1,7 @@
 from rest_framework import serializers
 
 from api.mixins import DynamicFieldsSerializerMixin
-from games.models import Game, LineScore, TeamStatistics
+from games.models import Game, GameChatMessage, LineScore, TeamStatistics
 from players.models import PlayerCareerStatistics, PlayerStatistics
 from players.serializers import PlayerSerializer
 from teams.serializers import TeamSerializer
@@ -229,4 +229,20 @@ class PlayerCareerStatisticsSerializer(DynamicFieldsSerializerMixin, serializers
             context=self.context,
             **context    
         )
-        return serializer.data
\ No newline at end of file
+        return serializer.data
+
+
+class GameChatMessageSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
+    user = serializers.SerializerMethodField()
+    created_at = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GameChatMessage
+        fields = ('id', 'message', 'user', 'created_at')
+
+    def get_user(self, obj):
+        # The chat identities of the senders, in the shape published with the live messages
+        return self.context.get('identities', {}).get(obj.user_id)
+
+    def get_created_at(self, obj):
+        return int(obj.created_at.timestamp())
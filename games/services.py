@@ -1,23 +1,297 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List
+import logging
+import re
+import uuid
 import pytz
 
+from redis.exceptions import WatchError
+
+from api.database_routers import read_from_primary
+from api.utils import get_redis_client
 from api.websocket import send_message_to_centrifuge
-from games.models import Game, GameChat, GameChatMessage, LineScore, TeamStatistics
+from games.models import (
+    Game, 
+    GameChat, 
+    GameChatBan, 
+    GameChatMessage, 
+    GameChatMute, 
+    GamePrediction, 
+    LineScore, 
+    TeamStatistics
+)
 
-from django.db.models import Prefetch, Q
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, Prefetch, Q
 
-from games.serializers import GameSerializer, LineScoreSerializer, PlayerStatisticsSerializer
+from games.serializers import (
+    GameChatMessageSerializer, 
+    GameSerializer, 
+    LineScoreSerializer, 
+    PlayerStatisticsSerializer
+)
 from players.models import Player, PlayerStatistics
 from teams.models import TeamLike, TeamName
+from users.models import Role, User
 
 from rest_framework.status import (
     HTTP_400_BAD_REQUEST, 
+    HTTP_403_FORBIDDEN,
     HTTP_404_NOT_FOUND, 
     HTTP_500_INTERNAL_SERVER_ERROR
 )
 
-from users.utils import validate_websocket_subscription_token
+from users.utils import (
+    get_auth_user_cache_key, 
+    get_chat_identity_cache_key, 
+    validate_websocket_subscription_token
+)
+
+
+logger = logging.getLogger(__name__)
+
+GAME_EXISTS_CACHE_TIMEOUT = 60 * 60
+CHAT_IDENTITY_CACHE_TIMEOUT = 60 * 60
+
+GAME_CHAT_MESSAGE_STREAM = 'game_chat_messages'
+GAME_CHAT_MESSAGE_STREAM_GROUP = 'game_chat_message_writers'
+# Upper bound of the messages kept in the stream if the writer falls behind
+GAME_CHAT_MESSAGE_STREAM_MAX_LENGTH = 100000
+GAME_CHAT_FLUSH_INTERVAL_MS = 300
+GAME_CHAT_FLUSH_BATCH_SIZE = 1000
+# Messages that cannot be written, e.g. of a deleted user, are moved here instead of blocking the stream
+GAME_CHAT_MESSAGE_DEAD_LETTER_STREAM = 'game_chat_messages_dead_letter'
+# Messages pending on a consumer for longer than this are claimed by the other consumers
+GAME_CHAT_PENDING_MIN_IDLE_MS = 60 * 1000
+GAME_CHAT_MESSAGES_WINDOW = 50
+
+GAME_CHAT_BANNED_USERS_KEY = 'game_chat_banned_users'
+GAME_CHAT_MODERATION_CACHE_TIMEOUT = 60 * 60
+# Member of every moderation set loaded from the database, so an empty set is told from a missing one
+GAME_CHAT_MODERATION_LOADED_MARKER = 'loaded'
+
+GAME_PREDICTION_EXPERIENCE = 10
+GAME_PREDICTION_LEADERBOARD_SIZE = 10
+GAME_PREDICTION_LEADERBOARD_LOADED_MARKER = 'loaded'
+
+
+def check_if_game_exists(game_id) -> bool:
+    '''
+    Return whether the game exists. Only existing games are cached, so a game inserted later is
+    found on the next request.
+    '''
+
+    cache_key = f'game_{game_id}_exists'
+    if cache.get(cache_key):
+        return True
+    
+    exists = Game.objects.filter(game_id=game_id).exists()
+    if exists:
+        cache.set(cache_key, True, GAME_EXISTS_CACHE_TIMEOUT)
+
+    return exists
+
+
+def parse_chat_moment(value: str) -> datetime | None:
+    '''
+    Parse an ISO 8601 datetime of the chat history query parameters, assumed to be in UTC
+    without an offset. The "+" of an offset left unencoded in the URL arrives as a space.
+    '''
+    value = re.sub(r'(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?) (\d{2}(?::?\d{2})?)$', r'\1+\2', value)
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+
+    return moment
+
+
+def get_user_chat_identity(user) -> dict:
+    '''
+    Return the username and the symbol of the favorite team shown with the chat messages of the user.
+    '''
+
+    cache_key = get_chat_identity_cache_key(user.id)
+    identity = cache.get(cache_key)
+    if identity is not None:
+        return identity
+    
+    user_favorite_team = TeamLike.objects.filter(
+        user=user,
+        favorite=True,
+    ).select_related('team').only('team__symbol').first()
+
+    identity = {
+        'id': user.id,
+        'username': user.get_username(),
+        'favorite_team': user_favorite_team.team.symbol if user_favorite_team else None
+    }
+    cache.set(cache_key, identity, CHAT_IDENTITY_CACHE_TIMEOUT)
+
+    return identity
+
+
+def get_user_chat_identities(users) -> dict:
+    '''
+    Return the chat identities of the users by their id, with a single cache round trip and a
+    single query for the users whose identity is not cached.
+    '''
+
+    users = {user.id: user for user in users}
+    cached = cache.get_many([get_chat_identity_cache_key(user_id) for user_id in users])
+    identities = {identity['id']: identity for identity in cached.values()}
+
+    missing_user_ids = [user_id for user_id in users if user_id not in identities]
+    if missing_user_ids:
+        favorite_teams = dict(
+            TeamLike.objects.filter(
+                user_id__in=missing_user_ids,
+                favorite=True,
+            ).values_list('user_id', 'team__symbol')
+        )
+
+        new_identities = {}
+        for user_id in missing_user_ids:
+            identity = {
+                'id': user_id,
+                'username': users[user_id].get_username(),
+                'favorite_team': favorite_teams.get(user_id)
+            }
+            identities[user_id] = identity
+            new_identities[get_chat_identity_cache_key(user_id)] = identity
+
+        cache.set_many(new_identities, CHAT_IDENTITY_CACHE_TIMEOUT)
+
+    return identities
+
+
+def get_game_chat_muted_users_key(game_id) -> str:
+    return f'game_chat_{game_id}_muted_users'
+
+
+def get_game_chat_moderation_version_key(key: str) -> str:
+    return f'{key}_version'
+
+
+def load_game_chat_moderation_set(key: str, queryset) -> List[int]:
+    '''
+    Load the user ids of a moderation table into the redis set `key`, and return them.
+    - The version of the set is watched while the table is read. If a moderator changed it
+    meanwhile, the set is not stored, so a read made before the change cannot overwrite it.
+    '''
+
+    with get_redis_client().pipeline() as pipe:
+        pipe.watch(get_game_chat_moderation_version_key(key))
+
+        # The replicas may not have the change the version already accounts for
+        with read_from_primary():
+            user_ids = list(queryset.values_list('user_id', flat=True))
+
+        try:
+            pipe.multi()
+            pipe.sadd(key, GAME_CHAT_MODERATION_LOADED_MARKER, *user_ids)
+            pipe.expire(key, GAME_CHAT_MODERATION_CACHE_TIMEOUT)
+            pipe.execute()
+        except WatchError:
+            pass
+
+    return user_ids
+
+
+def update_game_chat_moderation_set(key: str, user_id, silenced: bool) -> None:
+    '''
+    Apply a committed mute/ban change to the redis set `key`, and bump its version so a load
+    reading the table before the change is discarded.
+    '''
+
+    version_key = get_game_chat_moderation_version_key(key)
+    with get_redis_client().pipeline() as pipe:
+        pipe.incr(version_key)
+        pipe.expire(version_key, GAME_CHAT_MODERATION_CACHE_TIMEOUT)
+        if silenced:
+            pipe.sadd(key, user_id)
+        else:
+            pipe.srem(key, user_id)
+        pipe.execute()
+
+
+def add_game_chat_message_to_stream(message_id, game_id, user_id, message, created_at) -> None:
+    get_redis_client().xadd(
+        GAME_CHAT_MESSAGE_STREAM,
+        {
+            'id': str(message_id),
+            'game_id': game_id,
+            'user_id': user_id,
+            'message': message,
+            'created_at': created_at.isoformat(),
+        },
+        maxlen=GAME_CHAT_MESSAGE_STREAM_MAX_LENGTH,
+        approximate=True
+    )
+
+
+def write_game_chat_messages(entries: List[dict]) -> List[dict]:
+    '''
+    Insert the messages read from the stream with a single query, and return the entries that
+    cannot be written. Messages already inserted, e.g. when a batch is retried after a crash,
+    are skipped.
+    - Messages of users or games deleted since they were sent are rejected up front. If a batch
+    still fails, e.g. a user deleted meanwhile, its messages are inserted one by one so only the
+    failing ones are rejected.
+    '''
+
+    game_ids = {entry['game_id'] for entry in entries}
+    user_ids = {int(entry['user_id']) for entry in entries}
+
+    existing_game_ids = set(Game.objects.filter(game_id__in=game_ids).values_list('game_id', flat=True))
+    existing_user_ids = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+
+    chat_ids = dict(
+        GameChat.objects.filter(game_id__in=existing_game_ids).values_list('game_id', 'id')
+    )
+    for game_id in existing_game_ids - chat_ids.keys():
+        game_chat, _ = GameChat.objects.get_or_create(game_id=game_id)
+        chat_ids[game_id] = game_chat.id
+
+    rejected_entries = []
+    messages = []
+    for entry in entries:
+        if entry['game_id'] not in chat_ids or int(entry['user_id']) not in existing_user_ids:
+            rejected_entries.append(entry)
+            continue
+
+        messages.append(
+            (
+                entry,
+                GameChatMessage(
+                    id=entry['id'],
+                    chat_id=chat_ids[entry['game_id']],
+                    user_id=entry['user_id'],
+                    message=entry['message'],
+                    created_at=datetime.fromisoformat(entry['created_at'])
+                )
+            )
+        )
+
+    try:
+        with transaction.atomic():
+            GameChatMessage.objects.bulk_create(
+                [message for _, message in messages],
+                ignore_conflicts=True
+            )
+    except IntegrityError:
+        for entry, message in messages:
+            try:
+                with transaction.atomic():
+                    GameChatMessage.objects.bulk_create([message], ignore_conflicts=True)
+            except IntegrityError:
+                rejected_entries.append(entry)
+
+    return rejected_entries
 
 
 def get_today_games():
@@ -426,6 +700,82 @@ class GameService:
             'game'
         )
     
+    @staticmethod
+    def get_game_chat_messages(request, pk):
+        '''
+        Get the chat messages of the game for paginating through the chat around a moment of it,
+        so a replay of the game can load its chat. Both query parameters are ISO 8601 datetimes.
+        - at: messages sent at or before it, newest first, for paginating back through the chat
+        - after: messages sent after it, oldest first, for paginating forward through the chat
+        '''
+
+        if not check_if_game_exists(pk):
+            return None, {'error': 'Game not found'}, HTTP_404_NOT_FOUND
+
+        messages = GameChatMessage.objects.filter(
+            chat__game_id=pk
+        ).select_related(
+            'user'
+        ).only(
+            'id',
+            'message',
+            'created_at',
+            'user__id',
+            'user__username',
+        )
+
+        at = request.query_params.get('at', None)
+        after = request.query_params.get('after', None)
+        if at and after:
+            return None, {'error': 'Only one of at and after can be given'}, HTTP_400_BAD_REQUEST
+
+        if at or after:
+            moment = parse_chat_moment(at or after)
+            if moment is None:
+                return None, {'error': 'Invalid datetime'}, HTTP_400_BAD_REQUEST
+
+            if at:
+                messages = messages.filter(created_at__lte=moment)
+            else:
+                messages = messages.filter(created_at__gt=moment)
+
+        return messages, None, None
+    
+    @staticmethod
+    def get_game_prediction_leaderboard(request):
+        '''
+        Get the users with the most correct predictions in the season given by the "season"
+        query parameter, with their number of correct predictions.
+        '''
+
+        season = request.query_params.get('season', None)
+        if not season:
+            return None, {'error': 'Season is required'}, HTTP_400_BAD_REQUEST
+
+        leaderboard_key = get_game_prediction_leaderboard_key(season)
+        if get_redis_client().zscore(leaderboard_key, GAME_PREDICTION_LEADERBOARD_LOADED_MARKER) is None:
+            rebuild_game_prediction_leaderboard(season)
+
+        # The marker is scored below every user
+        scores = get_redis_client().zrevrangebyscore(
+            leaderboard_key,
+            '+inf',
+            0,
+            start=0,
+            num=GAME_PREDICTION_LEADERBOARD_SIZE,
+            withscores=True
+        )
+        user_ids = [int(user_id) for user_id, _ in scores]
+        users = User.objects.filter(id__in=user_ids).only('id', 'username')
+        identities = get_user_chat_identities(users)
+
+        leaderboard = [
+            {'user': identities[int(user_id)], 'score': int(score)}
+            for user_id, score in scores
+            if int(user_id) in identities
+        ]
+        return leaderboard, None, None
+    
     @staticmethod
     def create_game_chat_message(request, pk):
         channel = f'games/{pk}/live-chat'
@@ -445,40 +795,321 @@ class GameService:
         if message is None:
             return False, {'error': 'Message is required'}, HTTP_400_BAD_REQUEST
 
-        try:
-            game = Game.objects.get(game_id=pk)
-        except Game.DoesNotExist:
+        if GameChatService.check_if_user_is_silenced(pk, request.user.id):
+            return False, {'error': 'You are not allowed to chat'}, HTTP_403_FORBIDDEN
+
+        if not check_if_game_exists(pk):
             return False, {'error': 'Game not found'}, HTTP_404_NOT_FOUND
-        
-        user_favorite_team = TeamLike.objects.filter(
-            user=request.user,
-            favorite=True,
-        ).select_related('team').first()
+
+        message_id = uuid.uuid4()
+        created_at = datetime.now(timezone.utc)
         
         resp_json = send_message_to_centrifuge(channel, {
+            'id': str(message_id),
             'message': message,
-            'user': {
-                'id': request.user.id,
-                'username': request.user.get_username(),
-                'favorite_team': user_favorite_team.team.symbol if user_favorite_team else None
-            },
-            'game': game.game_id,
-            'created_at': int(datetime.now().timestamp())
+            'user': get_user_chat_identity(request.user),
+            'game': pk,
+            'created_at': int(created_at.timestamp())
         })
-        if resp_json.get('error', None):
+        if not resp_json or resp_json.get('error', None):
             return False, {'error': 'Message Delivery Unsuccessful'}, HTTP_500_INTERNAL_SERVER_ERROR
         
-        game_chat, created = GameChat.objects.get_or_create(game=game)
-        GameChatMessage.objects.create(
-            chat=game_chat,
-            message=message,
-            user=request.user
+        # The messages are written to the database in batches by the persist_game_chat_messages command
+        add_game_chat_message_to_stream(
+            message_id,
+            pk,
+            request.user.id,
+            message,
+            created_at
+        )
+
+        return True, None, None
+
+
+def get_game_prediction_leaderboard_key(season) -> str:
+    return f'game_prediction_leaderboard_{season}'
+
+
+def get_game_prediction_leaderboard_games_key(season) -> str:
+    return f'game_prediction_leaderboard_{season}_games'
+
+
+def grade_predictions_of_game(game_id) -> int:
+    '''
+    Grade the predictions of a final game, award experience to the users who predicted the winner,
+    and add their correct predictions to the leaderboard of the season. Returns how many predictions
+    were graded.
+    - The ungraded predictions are locked and graded by a single UPDATE, and the experience is awarded
+    by another, so a game costs the same few statements however many users predicted it.
+    - Predictions already graded are skipped, so grading a game again does nothing.
+    - Everything is read from the primary: the game was made final a moment ago, and a replica lagging
+    behind a concurrent grader would show its predictions as ungraded and award them twice.
+    '''
+
+    with read_from_primary():
+        game = Game.objects.filter(
+            game_id=game_id, 
+            game_status_id=3
+        ).only(
+            'game_id', 
+            'season', 
+            'home_team', 
+            'visitor_team'
+        ).first()
+        if not game:
+            return 0
+
+        points = dict(
+            TeamStatistics.objects.filter(game=game).values_list('team_id', 'points')
         )
+        home_team_points = points.get(game.home_team_id)
+        visitor_team_points = points.get(game.visitor_team_id)
+        if home_team_points is None or visitor_team_points is None:
+            logger.warning("Predictions of game %s not graded, the final score is missing", game_id)
+            return 0
+
+        home_team_won = home_team_points > visitor_team_points
+
+        with transaction.atomic():
+            # Serializes the graders of the game, so each prediction is awarded once
+            game_chat = GameChat.objects.select_for_update().filter(game_id=game_id).first()
+            if not game_chat:
+                return 0
+
+            # The predictions graded and awarded are the ones locked here, not another read of them
+            predictions = list(
+                GamePrediction.objects.select_for_update().filter(
+                    game=game_chat,
+                    is_correct__isnull=True
+                ).values_list('id', 'user_id', 'prediction')
+            )
+            if not predictions:
+                return 0
+
+            graded_count = GamePrediction.objects.filter(
+                id__in=[prediction_id for prediction_id, _, _ in predictions],
+                is_correct__isnull=True
+            ).update(
+                is_correct=ExpressionWrapper(Q(prediction=home_team_won), output_field=BooleanField())
+            )
+
+            correct_user_ids = [
+                user_id for _, user_id, prediction in predictions if prediction == home_team_won
+            ]
+            if correct_user_ids:
+                User.objects.filter(id__in=correct_user_ids).update(
+                    experience=F('experience') + GAME_PREDICTION_EXPERIENCE
+                )
+
+                transaction.on_commit(
+                    lambda: add_correct_predictions_to_leaderboard(game.season, game.game_id, correct_user_ids)
+                )
+
+        return graded_count
+
+
+# Adds the correct predictions of a game to the leaderboard, once per game, and only if the
+# leaderboard is loaded; a leaderboard that is not is rebuilt from the database when read.
+# The game is recorded either way, so a rebuild running meanwhile sees the change and retries.
+ADD_CORRECT_PREDICTIONS_SCRIPT = '''
+local added = redis.call('SADD', KEYS[2], ARGV[1])
+if added == 0 or not redis.call('ZSCORE', KEYS[1], ARGV[2]) then
+    return 0
+end
+
+for i = 3, #ARGV do
+    redis.call('ZINCRBY', KEYS[1], 1, ARGV[i])
+end
+return 1
+'''
+
+add_correct_predictions_script = None
+
+def add_correct_predictions_to_leaderboard(season, game_id, user_ids: List[int]) -> None:
+    global add_correct_predictions_script
+    if add_correct_predictions_script is None:
+        add_correct_predictions_script = get_redis_client().register_script(ADD_CORRECT_PREDICTIONS_SCRIPT)
+
+    add_correct_predictions_script(
+        keys=[
+            get_game_prediction_leaderboard_key(season),
+            get_game_prediction_leaderboard_games_key(season)
+        ],
+        args=[game_id, GAME_PREDICTION_LEADERBOARD_LOADED_MARKER, *user_ids]
+    )
+
+    # The cached users of the authentication carry the experience
+    cache.delete_many([get_auth_user_cache_key(user_id) for user_id in user_ids])
+
+
+def rebuild_game_prediction_leaderboard(season) -> None:
+    '''
+    Rebuild the leaderboard of the season from the graded predictions, e.g. after redis lost it.
+    - Only the games graded when the rebuild starts are counted, and recorded with the leaderboard,
+    so a game graded meanwhile is added once by its grader instead of being counted twice.
+    - The keys are watched, and the rebuild is retried if a grader changed them meanwhile.
+    '''
+
+    leaderboard_key = get_game_prediction_leaderboard_key(season)
+    games_key = get_game_prediction_leaderboard_games_key(season)
+
+    with get_redis_client().pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(leaderboard_key, games_key)
+
+                # The replicas may not have the grades the watched keys already account for
+                with read_from_primary():
+                    game_ids = list(
+                        GameChat.objects.filter(
+                            game__season=season,
+                            gameprediction__is_correct__isnull=False,
+                        ).values_list('game_id', flat=True).distinct()
+                    )
+                    scores = dict(
+                        GamePrediction.objects.filter(
+                            is_correct=True,
+                            game__game_id__in=game_ids,
+                        ).values('user_id').annotate(
+                            count=Count('id')
+                        ).values_list('user_id', 'count')
+                    )
+
+                pipe.multi()
+                pipe.delete(leaderboard_key, games_key)
+                pipe.zadd(leaderboard_key, {GAME_PREDICTION_LEADERBOARD_LOADED_MARKER: -1, **scores})
+                if game_ids:
+                    pipe.sadd(games_key, *game_ids)
+                pipe.execute()
+                return
+            except WatchError:
+                continue
+
+
+class GameChatService:
+    @staticmethod
+    def check_if_user_is_silenced(game_id, user_id) -> bool:
+        '''
+        Return whether the user is banned from the game chats or muted in the chat of the game.
+        - Both lists are kept as redis sets, checked with a single round trip. A set missing from
+        redis, e.g. expired, is loaded from the database.
+        '''
+        muted_key = get_game_chat_muted_users_key(game_id)
+
+        with get_redis_client().pipeline(transaction=False) as pipe:
+            pipe.smismember(GAME_CHAT_BANNED_USERS_KEY, [GAME_CHAT_MODERATION_LOADED_MARKER, user_id])
+            pipe.smismember(muted_key, [GAME_CHAT_MODERATION_LOADED_MARKER, user_id])
+            (banned_loaded, banned), (muted_loaded, muted) = pipe.execute()
+
+        if not banned_loaded:
+            banned = user_id in load_game_chat_moderation_set(
+                GAME_CHAT_BANNED_USERS_KEY,
+                GameChatBan.objects.all()
+            )
+
+        if banned:
+            return True
+
+        if not muted_loaded:
+            muted = user_id in load_game_chat_moderation_set(
+                muted_key,
+                GameChatMute.objects.filter(chat__game_id=game_id)
+            )
+
+        return bool(muted)
+    
+    @staticmethod
+    def check_if_user_can_moderate(user) -> bool:
+        return user.role.weight <= Role.get_chat_moderator_role().weight
+    
+    @staticmethod
+    def validate_moderation_request(request, user_id):
+        if not GameChatService.check_if_user_can_moderate(request.user):
+            return {'error': 'Only moderators can moderate the chat'}, HTTP_403_FORBIDDEN
+        
+        user = User.objects.filter(id=user_id).only('id', 'role').first()
+        if not user:
+            return {'error': 'User not found'}, HTTP_404_NOT_FOUND
+        
+        if request.user.role.weight >= Role.objects.get_by_id(user.role_id).weight:
+            return {'error': 'You cannot moderate a user with the same or higher role'}, HTTP_400_BAD_REQUEST
+        
+        return None, None
+
+    @staticmethod
+    def mute_user(request, pk, user_id):
+        error, status = GameChatService.validate_moderation_request(request, user_id)
+        if error:
+            return False, error, status
+        
+        if not check_if_game_exists(pk):
+            return False, {'error': 'Game not found'}, HTTP_404_NOT_FOUND
+
+        with transaction.atomic():
+            game_chat, _ = GameChat.objects.get_or_create(game_id=pk)
+            GameChatMute.objects.get_or_create(chat=game_chat, user_id=user_id)
+
+            # A set missing from redis is created without the marker, and is loaded on the next check
+            transaction.on_commit(
+                lambda: update_game_chat_moderation_set(get_game_chat_muted_users_key(pk), user_id, True)
+            )
+
+        return True, None, None
+
+    @staticmethod
+    def unmute_user(request, pk, user_id):
+        error, status = GameChatService.validate_moderation_request(request, user_id)
+        if error:
+            return False, error, status
+
+        with transaction.atomic():
+            GameChatMute.objects.filter(chat__game_id=pk, user_id=user_id).delete()
+            transaction.on_commit(
+                lambda: update_game_chat_moderation_set(get_game_chat_muted_users_key(pk), user_id, False)
+            )
+
+        return True, None, None
+
+    @staticmethod
+    def ban_user(request, user_id):
+        error, status = GameChatService.validate_moderation_request(request, user_id)
+        if error:
+            return False, error, status
+
+        with transaction.atomic():
+            GameChatBan.objects.get_or_create(user_id=user_id)
+            transaction.on_commit(
+                lambda: update_game_chat_moderation_set(GAME_CHAT_BANNED_USERS_KEY, user_id, True)
+            )
+
+        return True, None, None
+
+    @staticmethod
+    def unban_user(request, user_id):
+        error, status = GameChatService.validate_moderation_request(request, user_id)
+        if error:
+            return False, error, status
+
+        with transaction.atomic():
+            GameChatBan.objects.filter(user_id=user_id).delete()
+            transaction.on_commit(
+                lambda: update_game_chat_moderation_set(GAME_CHAT_BANNED_USERS_KEY, user_id, False)
+            )
 
         return True, None, None
 
 
 class GameSerializerService:
+    @staticmethod
+    def serialize_game_chat_messages(messages):
+        return GameChatMessageSerializer(
+            messages,
+            many=True,
+            context={
+                'identities': get_user_chat_identities(message.user for message in messages)
+            }
+        )
+
     @staticmethod
     def serialize_games(games):
         return GameSerializer(
@@ -5,7 +5,7 @@ from nba_api.live.nba.endpoints.boxscore import BoxScore
 from nba_api.stats.endpoints.scoreboardv2 import ScoreboardV2
 
 from games.models import Game
-from games.services import update_live_scores, update_team_statistics
+from games.services import grade_predictions_of_game, update_live_scores, update_team_statistics
 
 from django.db import transaction, DatabaseError
 import logging
@@ -67,6 +67,36 @@ def update_game_score():
                 statistics=awayteam_statistics,
             )
 
+            # The final score is committed with the status, grade the predictions once it is
+            if game.game_status_id == 3:
+                transaction.on_commit(
+                    lambda game_id=game.game_id: grade_game_predictions.delay(game_id)
+                )
+
+
+@shared_task
+def grade_game_predictions(game_id):
+    graded_count = grade_predictions_of_game(game_id)
+    logger.info("Graded %s predictions of game %s", graded_count, game_id)
+
+
+@shared_task
+def grade_ungraded_game_predictions():
+    '''
+    Grade the predictions of the final games that still have ungraded ones, e.g. games that went
+    final while update_game_score did not run, or were fixed by fix_game_score.
+    '''
+
+    game_ids = list(
+        Game.objects.filter(
+            game_status_id=3,
+            game_chat__gameprediction__is_correct__isnull=True,
+        ).values_list('game_id', flat=True).distinct()
+    )
+
+    for game_id in game_ids:
+        grade_game_predictions(game_id)
+
 
 def fix_game_score():
     gameDates = [
@@ -1,3 +1,352 @@
-from django.test import TestCase
+import uuid
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+
+from api.database_routers import TestDBRouter, reading_from_primary
+from api.throttling import GameChatRateThrottle
+from api.utils import MockResponse, get_redis_client
+from games.models import Game, GameChat, GameChatBan, GameChatMessage, GamePrediction
+from games.services import (
+    GAME_CHAT_BANNED_USERS_KEY,
+    GAME_CHAT_MESSAGE_STREAM,
+    GAME_PREDICTION_EXPERIENCE,
+    get_game_chat_muted_users_key,
+    get_game_prediction_leaderboard_games_key,
+    get_game_prediction_leaderboard_key,
+    get_user_chat_identity,
+    grade_predictions_of_game,
+    update_team_statistics,
+    write_game_chat_messages
+)
+from games.tasks import grade_ungraded_game_predictions
+from games.views import GameViewSet
+from teams.models import Team
+from users.authentication import CookieJWTAccessAuthentication
+from users.models import Role, User
+from users.utils import generate_websocket_subscription_token
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+
+
+class LaggingReplicaDBRouter(TestDBRouter):
+    '''
+    Send the reads outside read_from_primary() to a replica the tests cannot reach, so a read that
+    could see data a lagging replica has not caught up with fails the test.
+    '''
+
+    def db_for_read(self, model, **hints):
+        if reading_from_primary.get():
+            return 'default'
+
+        return 'replica1'
+
+
+class GameTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username='testuser',
+            email='test@test.com',
+        )
+        self.moderator = User.objects.create(
+            username='testmoderator',
+            email='moderator@test.com',
+            role=Role.get_chat_moderator_role()
+        )
+
+        self.home_team = Team.objects.create(id=1, symbol='HOM')
+        self.visitor_team = Team.objects.create(id=2, symbol='VIS')
+        self.game = self.create_game('0022400001', game_status_id=2)
+        get_redis_client().delete(f'throttle_{GameChatRateThrottle.scope}_{self.user.id}')
+
+    def create_game(self, game_id, game_status_id):
+        game = Game.objects.create(
+            game_id=game_id,
+            game_date_est=datetime(2025, 1, 15, tzinfo=timezone.utc),
+            game_sequence=1,
+            game_status_id=game_status_id,
+            game_status_text='Final' if game_status_id == 3 else 'Q1',
+            game_code=f'20250115/{game_id}',
+            home_team=self.home_team,
+            visitor_team=self.visitor_team,
+            season='2024',
+            live_period=4,
+            arena_name='Test Arena',
+        )
+        cache.delete(f'game_{game_id}_exists')
+        return game
+
+
+class GameLazyAuthenticationTestCase(GameTestCase):
+    @patch.object(CookieJWTAccessAuthentication, 'authenticate', return_value=None)
+    def test_user_independent_actions_skip_authentication(self, mocked):
+        request = APIRequestFactory().get('/api/games/predictions/leaderboard/?season=2024')
+        response = GameViewSet.as_view({'get': 'get_prediction_leaderboard'})(request)
+
+        self.assertEqual(response.status_code, 200)
+        mocked.assert_not_called()
+
+        request = APIRequestFactory().post(f'/api/games/{self.game.game_id}/chat/', data={}, format='json')
+        response = GameViewSet.as_view({'post': 'post_chat_message'})(request, pk=self.game.game_id)
+
+        self.assertIn(response.status_code, (401, 403))
+        mocked.assert_called_once()
+
+
+class GameChatTestCase(GameTestCase):
+    def post_chat_message(self, user, message):
+        channel = f'games/{self.game.game_id}/live-chat'
+        request = APIRequestFactory().post(
+            f'/api/games/{self.game.game_id}/chat/',
+            data={
+                'message': message,
+                'subscription_token': str(generate_websocket_subscription_token(user.id, channel)),
+            },
+            format='json'
+        )
+        force_authenticate(request, user=user)
+        return GameViewSet.as_view({'post': 'post_chat_message'})(request, pk=self.game.game_id)
+
+    def moderate(self, moderator, action, method, pk=None, **kwargs):
+        factory = APIRequestFactory()
+        if method == 'post':
+            request = factory.post('/api/games/chat/', data={'user_id': kwargs.pop('user_id')}, format='json')
+        else:
+            request = factory.delete('/api/games/chat/')
+        force_authenticate(request, user=moderator)
+
+        view = GameViewSet.as_view({method: action})
+        with self.captureOnCommitCallbacks(execute=True):
+            if pk is not None:
+                return view(request, pk=pk, **kwargs)
+            return view(request, **kwargs)
+
+    def create_stream_entry(self, user_id, message, created_at=None):
+        return {
+            'id': str(uuid.uuid4()),
+            'game_id': self.game.game_id,
+            'user_id': str(user_id),
+            'message': message,
+            'created_at': (created_at or datetime.now(timezone.utc)).isoformat(),
+        }
+
+    @patch('requests.post', return_value=MockResponse(200, {'result': 'ok'}))
+    def test_post_chat_message_is_buffered_in_stream(self, mocked):
+        response = self.post_chat_message(self.user, 'test message')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mocked.call_count, 1)
+
+        # published right away, written to the database later by the stream consumer
+        self.assertFalse(GameChatMessage.objects.exists())
+        _, fields = get_redis_client().xrevrange(GAME_CHAT_MESSAGE_STREAM, count=1)[0]
+        self.assertEqual(fields['message'], 'test message')
+        self.assertEqual(fields['game_id'], self.game.game_id)
+        self.assertEqual(int(fields['user_id']), self.user.id)
+
+    @patch('requests.post', return_value=MockResponse(200, {'result': 'ok'}))
+    def test_muted_and_banned_users_cannot_chat(self, mocked):
+        get_redis_client().delete(
+            GAME_CHAT_BANNED_USERS_KEY,
+            get_game_chat_muted_users_key(self.game.game_id)
+        )
+
+        response = self.moderate(self.moderator, 'mute_chat_user', 'post', pk=self.game.game_id, user_id=self.user.id)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.post_chat_message(self.user, 'muted').status_code, 403)
+
+        response = self.moderate(
+            self.moderator, 'unmute_chat_user', 'delete', pk=self.game.game_id, user_id=str(self.user.id)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.post_chat_message(self.user, 'unmuted').status_code, 201)
+
+        response = self.moderate(self.moderator, 'ban_chat_user', 'post', user_id=self.user.id)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.post_chat_message(self.user, 'banned').status_code, 403)
+
+        # the sets are loaded again from the tables when redis lost them
+        get_redis_client().delete(GAME_CHAT_BANNED_USERS_KEY)
+        self.assertEqual(self.post_chat_message(self.user, 'banned').status_code, 403)
+
+        response = self.moderate(self.moderator, 'unban_chat_user', 'delete', user_id=str(self.user.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.post_chat_message(self.user, 'unbanned').status_code, 201)
+
+    def test_moderators_cannot_moderate_higher_roles(self):
+        admin = User.objects.create(username='testadmin', email='admin@test.com', role=Role.get_admin_role())
+
+        response = self.moderate(self.moderator, 'ban_chat_user', 'post', user_id=admin.id)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.moderate(self.user, 'ban_chat_user', 'post', user_id=self.moderator.id)
+        self.assertEqual(response.status_code, 403)
+
+        self.assertFalse(GameChatBan.objects.exists())
+
+    def test_write_game_chat_messages_rejects_only_bad_entries(self):
+        deleted_user = User.objects.create(username='deleteduser', email='deleted@test.com')
+        valid_entry = self.create_stream_entry(self.user.id, 'valid message')
+        rejected_entry = self.create_stream_entry(deleted_user.id, 'message of a deleted user')
+        deleted_user.delete()
+
+        rejected_entries = write_game_chat_messages([valid_entry, rejected_entry])
+
+        self.assertEqual(rejected_entries, [rejected_entry])
+        self.assertEqual(
+            list(GameChatMessage.objects.values_list('message', flat=True)),
+            ['valid message']
+        )
+        self.assertTrue(GameChat.objects.filter(game=self.game).exists())
+
+        # a retried batch is not written twice
+        self.assertEqual(write_game_chat_messages([valid_entry]), [])
+        self.assertEqual(GameChatMessage.objects.count(), 1)
+
+
+class GameChatHistoryTestCase(GameTestCase):
+    def setUp(self):
+        super().setUp()
+        self.started_at = datetime(2025, 1, 15, 10, tzinfo=timezone.utc)
+
+        chat = GameChat.objects.create(game=self.game)
+        self.messages = [
+            GameChatMessage.objects.create(
+                chat=chat,
+                user=self.user,
+                message=f'message {i}',
+                created_at=self.started_at + timedelta(minutes=i)
+            )
+            for i in range(5)
+        ]
+
+    def get_chat_messages(self, **params):
+        request = APIRequestFactory().get(f'/api/games/{self.game.game_id}/chat/', data=params)
+        force_authenticate(request, user=self.user)
+        return GameViewSet.as_view({'get': 'get_chat_messages'})(request, pk=self.game.game_id)
+
+    def get_pages(self, **params):
+        pages = []
+        params['cursor'] = ''
+        while True:
+            response = self.get_chat_messages(**params)
+            self.assertEqual(response.status_code, 200)
+            pages.append([message['message'] for message in response.data['results']])
+
+            if response.data['next'] is None:
+                return pages
+            params['cursor'] = parse_qs(urlparse(response.data['next']).query)['cursor'][0]
+
+    @patch('games.views.GAME_CHAT_MESSAGES_WINDOW', 2)
+    def test_chat_history_is_paginated_back_from_a_moment(self):
+        # the "+" of the offset is sent unencoded, and arrives as a space
+        at = (self.started_at + timedelta(minutes=3)).isoformat().replace('+', ' ')
+
+        self.assertEqual(
+            self.get_pages(at=at),
+            [['message 3', 'message 2'], ['message 1', 'message 0']]
+        )
+
+    @patch('games.views.GAME_CHAT_MESSAGES_WINDOW', 2)
+    def test_chat_history_is_paginated_forward_after_a_moment(self):
+        after = (self.started_at + timedelta(minutes=1)).isoformat()
+
+        self.assertEqual(
+            self.get_pages(after=after),
+            [['message 2', 'message 3'], ['message 4']]
+        )
+
+    def test_chat_history_rejects_invalid_moments(self):
+        self.assertEqual(self.get_chat_messages(at='yesterday').status_code, 400)
+
+        moment = self.started_at.isoformat()
+        self.assertEqual(self.get_chat_messages(at=moment, after=moment).status_code, 400)
+
+
+class GamePredictionTestCase(GameTestCase):
+    def setUp(self):
+        super().setUp()
+        get_redis_client().delete(
+            get_game_prediction_leaderboard_key('2024'),
+            get_game_prediction_leaderboard_games_key('2024')
+        )
+
+    def create_final_game_with_predictions(self, game_id, home_team_points, visitor_team_points):
+        game = self.create_game(game_id, game_status_id=3)
+        update_team_statistics(game, self.home_team, {'points': home_team_points})
+        update_team_statistics(game, self.visitor_team, {'points': visitor_team_points})
+
+        game_chat = GameChat.objects.create(game=game)
+        GamePrediction.objects.create(user=self.user, game=game_chat, prediction=True)
+        GamePrediction.objects.create(user=self.moderator, game=game_chat, prediction=False)
+        return game
+
+    def get_leaderboard(self):
+        request = APIRequestFactory().get('/api/games/predictions/leaderboard/?season=2024')
+        return GameViewSet.as_view({'get': 'get_prediction_leaderboard'})(request)
+
+    def test_grade_predictions_of_game(self):
+        game = self.create_final_game_with_predictions('0022400002', 110, 100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(grade_predictions_of_game(game.game_id), 2)
+
+        self.assertEqual(
+            dict(GamePrediction.objects.values_list('user_id', 'is_correct')),
+            {self.user.id: True, self.moderator.id: False}
+        )
+        self.user.refresh_from_db()
+        self.moderator.refresh_from_db()
+        self.assertEqual(self.user.experience, GAME_PREDICTION_EXPERIENCE)
+        self.assertEqual(self.moderator.experience, 0)
+
+        # grading the game again changes nothing
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(grade_predictions_of_game(game.game_id), 0)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.experience, GAME_PREDICTION_EXPERIENCE)
+
+        response = self.get_leaderboard()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{'user': get_user_chat_identity(self.user), 'score': 1}])
+
+    def test_second_grading_reads_the_graded_predictions_from_primary(self):
+        game = self.create_final_game_with_predictions('0022400002', 110, 100)
+
+        # e.g. the task queued when the game went final, and the sweep right after it
+        with override_settings(DATABASE_ROUTERS=['games.tests.LaggingReplicaDBRouter']):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(grade_predictions_of_game(game.game_id), 2)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(grade_predictions_of_game(game.game_id), 0)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.experience, GAME_PREDICTION_EXPERIENCE)
+        self.assertEqual(self.get_leaderboard().data[0]['score'], 1)
+
+    def test_leaderboard_lost_by_redis_is_rebuilt(self):
+        game = self.create_final_game_with_predictions('0022400002', 110, 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            grade_predictions_of_game(game.game_id)
+
+        self.assertEqual(self.get_leaderboard().data[0]['score'], 1)
+
+        # a grade added to a leaderboard redis dropped does not recreate it partially
+        get_redis_client().delete(get_game_prediction_leaderboard_key('2024'))
+        game = self.create_final_game_with_predictions('0022400003', 120, 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            grade_predictions_of_game(game.game_id)
+
+        self.assertEqual(self.get_leaderboard().data[0]['score'], 2)
+
+    def test_grade_ungraded_game_predictions(self):
+        self.create_final_game_with_predictions('0022400002', 90, 100)
+
+        grade_ungraded_game_predictions()
+
+        self.assertFalse(GamePrediction.objects.filter(is_correct__isnull=True).exists())
+        self.assertTrue(GamePrediction.objects.get(user=self.moderator).is_correct)
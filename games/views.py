@@ -5,32 +5,61 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.status import (
+    HTTP_200_OK,
     HTTP_201_CREATED, 
+    HTTP_400_BAD_REQUEST,
 )
 from rest_framework.permissions import IsAuthenticated
 
-from api.paginators import CustomPageNumberPagination
+from api.mixins import LazyAuthenticationMixin
+from api.paginators import CustomPageNumberPagination, KeysetPagination
+from api.throttling import GameChatRateThrottle
 from games.serializers import GameSerializer, LineScoreSerializer
 from games.services import (
+    GameChatService,
     GameSerializerService, 
     GameService, 
     combine_game_and_linescores, 
     combine_games_and_linescores, 
-    get_today_games
+    get_today_games, 
+    GAME_CHAT_MESSAGES_WINDOW
 )
 from users.authentication import CookieJWTAccessAuthentication
 
 
-class GameViewSet(viewsets.ViewSet):
+class GameViewSet(LazyAuthenticationMixin, viewsets.ViewSet):
     authentication_classes = [CookieJWTAccessAuthentication]
+    user_independent_actions = (
+        'today',
+        'list',
+        'retrieve',
+        'get_game_players_statistics',
+        'get_chat_messages',
+        'get_prediction_leaderboard',
+    )
 
     def get_permissions(self):
         permission_classes = []
         if self.action == 'post_chat_message':
             permission_classes = [IsAuthenticated]
+        elif self.action == 'mute_chat_user':
+            permission_classes = [IsAuthenticated]
+        elif self.action == 'unmute_chat_user':
+            permission_classes = [IsAuthenticated]
+        elif self.action == 'ban_chat_user':
+            permission_classes = [IsAuthenticated]
+        elif self.action == 'unban_chat_user':
+            permission_classes = [IsAuthenticated]
 
         return [permission() for permission in permission_classes]
 
+    def get_throttles(self):
+        throttle_classes = []
+        if self.action == 'post_chat_message':
+            throttle_classes = [GameChatRateThrottle]
+
+        return [throttle() for throttle in throttle_classes]
+
     @method_decorator(cache_page(60*1))
     @action(detail=False, methods=['get'])
     def today(self, request):
@@ -84,6 +113,14 @@ class GameViewSet(viewsets.ViewSet):
 
         return Response(combine_game_and_linescores(game_serializer.data, linescore_serializer.data))
 
+    @action(detail=False, methods=['get'], url_path='predictions/leaderboard')
+    def get_prediction_leaderboard(self, request):
+        leaderboard, error, status = GameService.get_game_prediction_leaderboard(request)
+        if leaderboard is None:
+            return Response(status=status, data=error)
+
+        return Response(leaderboard)
+    
     @action(detail=True, methods=['get'], url_path='player-statistics')
     def get_game_players_statistics(self, request, pk=None):
         players_statistics = GameService.get_game_players_statistics(pk)
@@ -100,4 +137,75 @@ class GameViewSet(viewsets.ViewSet):
         if not created:
             return Response(status=status, data=error)
 
-        return Response(status=HTTP_201_CREATED)
\ No newline at end of file
+        return Response(status=HTTP_201_CREATED)
+    
+    @post_chat_message.mapping.get
+    def get_chat_messages(self, request, pk=None):
+        messages, error, status = GameService.get_game_chat_messages(request, pk)
+        if messages is None:
+            return Response(status=status, data=error)
+
+        pagination = KeysetPagination(
+            page_size=GAME_CHAT_MESSAGES_WINDOW,
+            descending=not request.query_params.get('after')
+        )
+        paginated_data = pagination.paginate_queryset(messages, request)
+
+        serializer = GameSerializerService.serialize_game_chat_messages(paginated_data)
+        return pagination.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True, 
+        methods=['post'], 
+        url_path='chat/mutes', 
+    )
+    def mute_chat_user(self, request, pk=None):
+        user_id = request.data.get('user_id')
+        if not isinstance(user_id, int):
+            return Response(status=HTTP_400_BAD_REQUEST, data={'error': 'user_id must be an integer'})
+
+        muted, error, status = GameChatService.mute_user(request, pk, user_id)
+        if not muted:
+            return Response(status=status, data=error)
+
+        return Response(status=HTTP_201_CREATED)
+    
+    @action(
+        detail=True, 
+        methods=['delete'], 
+        url_path=r'chat/mutes/(?P<user_id>[0-9]+)', 
+    )
+    def unmute_chat_user(self, request, pk=None, user_id=None):
+        unmuted, error, status = GameChatService.unmute_user(request, pk, int(user_id))
+        if not unmuted:
+            return Response(status=status, data=error)
+
+        return Response(status=HTTP_200_OK)
+    
+    @action(
+        detail=False, 
+        methods=['post'], 
+        url_path='chat/bans', 
+    )
+    def ban_chat_user(self, request):
+        user_id = request.data.get('user_id')
+        if not isinstance(user_id, int):
+            return Response(status=HTTP_400_BAD_REQUEST, data={'error': 'user_id must be an integer'})
+
+        banned, error, status = GameChatService.ban_user(request, user_id)
+        if not banned:
+            return Response(status=status, data=error)
+
+        return Response(status=HTTP_201_CREATED)
+    
+    @action(
+        detail=False, 
+        methods=['delete'], 
+        url_path=r'chat/bans/(?P<user_id>[0-9]+)', 
+    )
+    def unban_chat_user(self, request, user_id=None):
+        unbanned, error, status = GameChatService.unban_user(request, int(user_id))
+        if not unbanned:
+            return Response(status=status, data=error)
+
+        return Response(status=HTTP_200_OK)
@@ -0,0 +1,50 @@
+from api.changefeed import register_change_handler
+from api.websocket import publish_messages_to_centrifuge
+from management.services import (
+    InquiryService,
+    ReportService,
+    broadcast_inquiry_update,
+    filter_and_fetch_inquiry_for_broadcast,
+    send_new_moderator_to_live_chat,
+    send_partially_updated_inquiry_to_live_chat,
+    send_unassigned_inquiry_to_live_chat,
+    serialize_reports
+)
+
+
+@register_change_handler('management_report')
+def publish_report_change(operation, row):
+    report = ReportService.get_report(row['id'])
+    if not report:
+        return
+
+    data = serialize_reports([report]).data[0]
+    publish_messages_to_centrifuge(
+        [
+            ('moderators/reports/updates', {'report': data}),
+            (f'users/{row["accuser_id"]}/reports/updates', {'report': data}),
+        ],
+        type='new_report' if operation == 'INSERT' else 'update'
+    )
+
+
+@register_change_handler('management_inquiry')
+def publish_inquiry_change(operation, row):
+    inquiry = InquiryService.get_inquiry_without_messages(row['id'])
+    if not inquiry:
+        return
+
+    send_partially_updated_inquiry_to_live_chat(inquiry)
+    broadcast_inquiry_update(filter_and_fetch_inquiry_for_broadcast(row['id']))
+
+
+@register_change_handler('management_inquirymoderator')
+def publish_inquiry_moderator_change(operation, row):
+    inquiry = InquiryService.get_inquiry_without_messages(row['inquiry_id'])
+    if not inquiry:
+        return
+
+    if row['in_charge']:
+        send_new_moderator_to_live_chat(inquiry, row['moderator_id'])
+    else:
+        send_unassigned_inquiry_to_live_chat(inquiry, row['moderator_id'])
@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from management.models import Inquiry, InquiryMessage, InquiryModerator, InquiryModeratorMessage, InquiryType
+from management.services import create_inquiry_broadcast_publications, filter_and_fetch_inquiry_for_broadcast
+from management.tasks import broadcast_inquiry_updates_to_all_parties
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure how long broadcasting an inquiry update to all parties takes, including the '
+        'publish to centrifugo. Runs inside a transaction that is rolled back, so no data is left behind.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--broadcasts', type=int, default=100, help='Number of broadcasts to run')
+        parser.add_argument('--moderators', type=int, default=10, help='Number of moderators assigned to the inquiry')
+        parser.add_argument(
+            '--history',
+            type=int,
+            default=1000,
+            help='Number of messages of the user and of each moderator in the inquiry'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options['broadcasts'], options['moderators'], options['history'])
+            transaction.set_rollback(True)
+
+    def run(self, broadcast_count, moderator_count, history_count):
+        if moderator_count < 1:
+            raise RuntimeError('At least one moderator is required')
+
+        user = User.objects.create(username='benchmark_user', email='benchmark_user@benchmark.com')
+        moderators = User.objects.bulk_create([
+            User(username=f'benchmark_moderator_{i}', email=f'benchmark_moderator_{i}@benchmark.com')
+            for i in range(moderator_count)
+        ])
+
+        inquiry_type = InquiryType.objects.create(name='benchmark', description='benchmark')
+        inquiry = Inquiry.objects.create(user=user, inquiry_type=inquiry_type, title='benchmark')
+        inquiry_moderators = InquiryModerator.objects.bulk_create([
+            InquiryModerator(inquiry=inquiry, moderator=moderator)
+            for moderator in moderators
+        ])
+        Inquiry.objects.filter(id=inquiry.id).update(moderators_count=moderator_count)
+
+        InquiryMessage.objects.bulk_create([
+            InquiryMessage(inquiry=inquiry, message=f'history {i}')
+            for i in range(history_count)
+        ], batch_size=1000)
+        InquiryModeratorMessage.objects.bulk_create([
+            InquiryModeratorMessage(inquiry_moderator=inquiry_moderator, message=f'history {i}')
+            for inquiry_moderator in inquiry_moderators
+            for i in range(history_count)
+        ], batch_size=1000)
+
+        message = InquiryModeratorMessage.objects.create(
+            inquiry_moderator=inquiry_moderators[0],
+            message='benchmark'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            broadcast_inquiry_updates_to_all_parties(inquiry.id, message.id)
+
+        start = time.perf_counter()
+        for _ in range(broadcast_count):
+            broadcast_inquiry_updates_to_all_parties(inquiry.id, message.id)
+        elapsed = time.perf_counter() - start
+
+        publication_count = len(create_inquiry_broadcast_publications(
+            filter_and_fetch_inquiry_for_broadcast(inquiry.id),
+            message
+        ))
+
+        self.stdout.write(
+            f'Broadcast {broadcast_count} updates to {publication_count} channels in {elapsed:.2f}s: '
+            f'{elapsed / broadcast_count * 1000:.2f} ms/broadcast, {len(queries)} queries/broadcast'
+        )
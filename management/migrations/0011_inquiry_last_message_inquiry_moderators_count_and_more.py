@@ -0,0 +1,104 @@
+# Generated by Django 5.1.1 on 2025-01-13 16:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(field).annotate(count=Count('pk')).values('count')
+        ),
+        0
+    )
+
+
+def populate_inquiry_summaries(apps, schema_editor):
+    Inquiry = apps.get_model('management', 'Inquiry')
+    InquiryMessage = apps.get_model('management', 'InquiryMessage')
+    InquiryModerator = apps.get_model('management', 'InquiryModerator')
+    InquiryModeratorMessage = apps.get_model('management', 'InquiryModeratorMessage')
+
+    Inquiry.objects.update(
+        last_message=Subquery(
+            InquiryMessage.objects.filter(
+                inquiry=OuterRef('pk')
+            ).order_by('-created_at').values('pk')[:1]
+        ),
+        moderators_count=count_subquery(
+            InquiryModerator.objects.filter(inquiry=OuterRef('pk')), 'inquiry'
+        ),
+    )
+    InquiryModerator.objects.update(
+        last_message=Subquery(
+            InquiryModeratorMessage.objects.filter(
+                inquiry_moderator=OuterRef('pk')
+            ).order_by('-created_at').values('pk')[:1]
+        ),
+        unread_count=count_subquery(
+            InquiryModeratorMessage.objects.filter(
+                inquiry_moderator=OuterRef('pk'),
+                created_at__gt=Subquery(
+                    Inquiry.objects.filter(pk=OuterRef(OuterRef('inquiry'))).values('last_read_at')[:1]
+                ),
+            ),
+            'inquiry_moderator'
+        ),
+        user_unread_count=count_subquery(
+            InquiryMessage.objects.filter(
+                inquiry=OuterRef('inquiry'),
+                created_at__gt=OuterRef('last_read_at'),
+            ),
+            'inquiry'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0010_rename_solved_report_resolved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inquiry',
+            name='last_message',
+            field=models.ForeignKey(help_text='Last message sent by the user', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='management.inquirymessage'),
+        ),
+        migrations.AddField(
+            model_name='inquiry',
+            name='moderators_count',
+            field=models.IntegerField(default=0, help_text='Number of moderators ever assigned to the inquiry'),
+        ),
+        migrations.AddField(
+            model_name='inquirymoderator',
+            name='last_message',
+            field=models.ForeignKey(help_text='Last message sent by the moderator', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='management.inquirymoderatormessage'),
+        ),
+        migrations.AddField(
+            model_name='inquirymoderator',
+            name='unread_count',
+            field=models.IntegerField(default=0, help_text='Number of messages of the moderator the user has not read'),
+        ),
+        migrations.AddField(
+            model_name='inquirymoderator',
+            name='user_unread_count',
+            field=models.IntegerField(default=0, help_text='Number of messages of the user the moderator has not read'),
+        ),
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(fields=['-updated_at', '-id'], name='inquiry_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(fields=['solved', '-updated_at', '-id'], name='inquiry_solved_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(fields=['moderators_count', '-updated_at', '-id'], name='inquiry_moderators_updated_idx'),
+        ),
+        migrations.RunPython(populate_inquiry_summaries, migrations.RunPython.noop),
+    ]
@@ -80,11 +80,32 @@ class Inquiry(models.Model):
         help_text='Last time the user read the inquiry',
     )
     title = models.CharField(max_length=512)
+    last_message = models.ForeignKey(
+        'InquiryMessage',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        help_text='Last message sent by the user',
+    )
+    moderators_count = models.IntegerField(
+        default=0,
+        help_text='Number of moderators ever assigned to the inquiry',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.user} inquired about {self.type}'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-updated_at', '-id'], name='inquiry_updated_at_idx'),
+            models.Index(fields=['solved', '-updated_at', '-id'], name='inquiry_solved_updated_at_idx'),
+            models.Index(
+                fields=['moderators_count', '-updated_at', '-id'], 
+                name='inquiry_moderators_updated_idx'
+            ),
+        ]
     
 class InquiryModerator(models.Model):
     id = models.UUIDField(
@@ -100,6 +121,21 @@ class InquiryModerator(models.Model):
     )
     assigned_at = models.DateTimeField(auto_now_add=True)
     in_charge = models.BooleanField(default=True)
+    last_message = models.ForeignKey(
+        'InquiryModeratorMessage',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        help_text='Last message sent by the moderator',
+    )
+    unread_count = models.IntegerField(
+        default=0,
+        help_text='Number of messages of the moderator the user has not read',
+    )
+    user_unread_count = models.IntegerField(
+        default=0,
+        help_text='Number of messages of the user the moderator has not read',
+    )
 
     def __str__(self):
         return f'{self.moderator} assigned to {self.inquiry}'
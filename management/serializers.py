@@ -7,6 +7,8 @@ from users.models import Role
 from users.serializers import UserSerializer
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
 
 
 class InquiryCreateSerializer(serializers.Serializer):
@@ -28,10 +30,11 @@ class InquiryCreateSerializer(serializers.Serializer):
             title=validated_data['title'],
         )
 
-        InquiryMessage.objects.create(
+        inquiry.last_message = InquiryMessage.objects.create(
             inquiry=inquiry,
             message=validated_data['message'],
         )
+        Inquiry.objects.filter(id=inquiry.id).update(last_message=inquiry.last_message)
 
         return inquiry
     
@@ -67,12 +70,18 @@ class InquiryMessageCreateSerializer(serializers.Serializer):
         if not inquiry:
             raise serializers.ValidationError('Invalid inquiry')
         
-        message = InquiryMessage.objects.create(
-            inquiry=inquiry,
-            message=validated_data['message'],
-        )
+        with transaction.atomic():
+            message = InquiryMessage.objects.create(
+                inquiry=inquiry,
+                message=validated_data['message'],
+            )
 
-        inquiry.save()
+            inquiry.last_message = message
+            inquiry.save(update_fields=['last_message', 'updated_at'])
+
+            InquiryModerator.objects.filter(inquiry=inquiry).update(
+                user_unread_count=F('user_unread_count') + 1
+            )
 
         return message
 
@@ -172,10 +181,16 @@ class InquiryModeratorMessageCreateSerializer(serializers.Serializer):
         if not inquiry_moderator:
             raise serializers.ValidationError('Invalid inquiry moderator')
         
-        message = InquiryModeratorMessage.objects.create(
-            inquiry_moderator=inquiry_moderator,
-            message=validated_data['message'],
-        )
+        with transaction.atomic():
+            message = InquiryModeratorMessage.objects.create(
+                inquiry_moderator=inquiry_moderator,
+                message=validated_data['message'],
+            )
+
+            InquiryModerator.objects.filter(id=inquiry_moderator.id).update(
+                unread_count=F('unread_count') + 1,
+                last_message=message
+            )
 
         return message
 
@@ -229,16 +244,12 @@ class InquiryModeratorSerializer(DynamicFieldsSerializerMixin, serializers.Model
         return serializer.data
     
     def get_last_message(self, obj):
-        if not hasattr(obj, 'inquirymoderatormessage_set'):
-            return None
-        
-        messages = obj.inquirymoderatormessage_set.all()
-        if not messages:
+        if obj.last_message_id is None:
             return None
         
         context = self.context.get('inquirymoderatormessage', {})
         serializer = InquiryModeratorMessageSerializer(
-            obj.inquirymoderatormessage_set.all()[0],
+            obj.last_message,
             context=self.context,
             **context
         )
@@ -254,18 +265,26 @@ class InquiryModeratorSerializer(DynamicFieldsSerializerMixin, serializers.Model
             return None
         
         if not user_last_read_at.get('id', None):
-            user_last_read_at = user_last_read_at.get(obj.id, None)
+            user_last_read_at = user_last_read_at.get(obj.inquiry_id, None)
             if not user_last_read_at:
                 return None
 
-        count = 0
-        if obj.moderator.id != user_last_read_at['id']:
-            last_read_at = user_last_read_at.get('last_read_at', None)
-            for message in obj.inquirymoderatormessage_set.all():
-                if message.created_at > last_read_at:
-                    count += 1
+        if obj.moderator_id == user_last_read_at['id']:
+            return 0
+
+        # The number of messages unread by the user of the inquiry is maintained
+        if obj.inquiry.user_id == user_last_read_at['id']:
+            return obj.unread_count
+
+        # Annotated by the inquiry lists, so they are not counted row by row
+        if hasattr(obj, 'reader_unread_messages_count'):
+            return obj.reader_unread_messages_count
+
+        last_read_at = user_last_read_at.get('last_read_at', None)
+        if last_read_at is None:
+            return None
 
-        return count
+        return obj.inquirymoderatormessage_set.filter(created_at__gt=last_read_at).count()
 
 
 class InquiryMessageSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -364,16 +383,12 @@ class InquirySerializer(DynamicFieldsSerializerMixin, serializers.ModelSerialize
         return serializer.data
     
     def get_last_message(self, obj):
-        if not hasattr(obj, 'messages'):
-            return None
-        
-        messages = obj.messages.all()
-        if not messages:
+        if obj.last_message_id is None:
             return None
         
         context = self.context.get('inquirymessage', {})
         serializer = InquiryMessageSerializer(
-            messages[0],
+            obj.last_message,
             context=self.context,
             **context
         )
@@ -393,14 +408,16 @@ class InquirySerializer(DynamicFieldsSerializerMixin, serializers.ModelSerialize
             if not user_last_read_at:
                 return None
 
-        count = 0
-        if obj.user.id != user_last_read_at['id']:
-            last_read_at = user_last_read_at.get('last_read_at', None)
-            for message in obj.messages.all():
-                if message.created_at > last_read_at:
-                    count += 1
+        if obj.user_id == user_last_read_at['id']:
+            return 0
+
+        # The number of messages unread by each moderator is maintained
+        for moderator in obj.inquirymoderator_set.all():
+            if moderator.moderator_id == user_last_read_at['id']:
+                return moderator.user_unread_count
 
-        return count
+        # Only the user and the moderators of the inquiry have messages to read
+        return None
     
 
 class ReportTypeSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -1,18 +1,20 @@
 from datetime import datetime, timezone
 from typing import List
-from api.websocket import broadcast_message_to_centrifuge, send_message_to_centrifuge
+from api.utils import filter_by_search_term
+from api.websocket import publish_messages_to_centrifuge, send_message_to_centrifuge
 from management.models import Inquiry, InquiryMessage, InquiryModerator, InquiryModeratorMessage, InquiryType, InquiryTypeDisplayName, Report, ReportType, ReportTypeDisplayName
 from management.serializers import InquiryModeratorMessageCreateSerializer, InquiryModeratorMessageSerializer, InquiryModeratorSerializer, InquirySerializer, InquiryTypeSerializer, InquiryUpdateSerializer, ReportCreateSerializer, ReportSerializer, ReportTypeSerializer, UserUpdateSerializer
 
-from django.db.models import Prefetch, Q
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery
 from django.db.models.manager import BaseManager
 
 from rest_framework.status import HTTP_404_NOT_FOUND, HTTP_400_BAD_REQUEST
 
-from teams.models import Post, PostComment, PostCommentLike, PostCommentReply, PostLike, PostStatusDisplayName, Team, TeamLike
-from users.models import User, UserChat, UserChatParticipant, UserLike
+from teams.models import Post, PostComment, PostStatusDisplayName, Team, TeamLike
+from teams.services import update_teams_likes_count
+from users.models import User, UserChat, UserChatParticipant
 from users.serializers import PostSerializer, PostUpdateSerializer, UserSerializer
-from users.services import create_user_queryset_without_prefetch
+from users.services import UserService, create_user_queryset_without_prefetch
 
 
 post_queryset_allowed_order_by_fields = (
@@ -55,8 +57,19 @@ report_queryset_allowed_order_by_fields = (
     '-title',
 )
 
-def send_inquiry_notification_to_all_channels_for_moderators(inquiry: Inquiry) -> None:
-    moderator_inquiry_serializer = InquirySerializer(
+inquiry_moderator_list_channel_names = (
+    'moderators/inquiries/all/updates',
+    'moderators/inquiries/unassigned/updates',
+    'moderators/inquiries/assigned/updates',
+    'moderators/inquiries/solved/updates',
+    'moderators/inquiries/unsolved/updates',
+)
+
+def serialize_inquiry_for_broadcast(inquiry: Inquiry) -> InquirySerializer:
+    """
+    Serialize the part of an inquiry update shared by every recipient, without any unread counts.
+    """
+    return InquirySerializer(
         inquiry,
         fields_exclude=['messages', 'unread_messages_count'],
         context={
@@ -84,160 +97,104 @@ def send_inquiry_notification_to_all_channels_for_moderators(inquiry: Inquiry) -
         }
     )
 
-    channel_names = [
-        'moderators/inquiries/all/updates',
-        'moderators/inquiries/unassigned/updates',
-        'moderators/inquiries/assigned/updates',
-        'moderators/inquiries/solved/updates',
-        'moderators/inquiries/unsolved/updates',
-    ]
-
-    resp_json = broadcast_message_to_centrifuge(
-        channel_names,
-        moderator_inquiry_serializer.data
-    )
-    if resp_json.get('error', None):
-        print(f"Error sending message to {channel_names}: {resp_json['error']}")
 
+def count_moderator_messages_unread_by_moderators(inquiry_moderators: List[InquiryModerator]) -> dict:
+    """
+    Count the messages of each moderator of an inquiry that every other moderator has not read yet,
+    with a single query.
+    - Returns {reader inquiry moderator id: {writer inquiry moderator id: count}}
+    """
+    if len(inquiry_moderators) < 2:
+        return {}
 
-def send_inquiry_notification_to_specific_moderator(
-    inquiry: Inquiry, 
-    user_id: int, 
-    last_read_at: datetime
-) -> None:
-    inquiry_serializer = InquirySerializer(
-        inquiry,
-        fields_exclude=['messages'],
-        context={
-            'user': {
-                'fields': ['username', 'id']
-            },
-            'inquirytypedisplayname': {
-                'fields': ['display_name', 'language_data']
-            },
-            'inquirymessage': {
-                'fields_exclude': ['inquiry_data', 'user_data']
-            },
-            'inquirymessage_extra': {
-                'user_last_read_at': {
-                    'id': user_id,
-                    'last_read_at': last_read_at
-                }
-            },
-            'inquirymoderator': {
-                'fields': [
-                    'moderator_data', 
-                    'last_message', 
-                    'unread_messages_count', 
-                    'in_charge'
-                ]
-            },
-            'moderator': {
-                'fields': ['username', 'id']
-            },
-            'inquirymoderatormessage': {
-                'fields_exclude': ['inquiry_moderator_data', 'user_data']
-            },
-            'inquirymoderatormessage_extra': {
-                'user_last_read_at': {
-                    'id': user_id,
-                    'last_read_at': last_read_at
-                }
-            },
-            'language': {
-                'fields': ['name']
-            }
-        }
+    annotations = {
+        f'unread_by_{index}': Count(
+            'inquirymoderatormessage',
+            filter=Q(inquirymoderatormessage__created_at__gt=reader.last_read_at)
+        )
+        for index, reader in enumerate(inquiry_moderators)
+    }
+    rows = list(
+        InquiryModerator.objects.filter(
+            id__in=[inquiry_moderator.id for inquiry_moderator in inquiry_moderators]
+        ).annotate(**annotations).values('id', *annotations)
     )
 
-    moderator_inquiry_notification_channel_name = f'moderators/{user_id}/inquiries/updates'
-    resp_json = send_message_to_centrifuge(
-        moderator_inquiry_notification_channel_name,
-        inquiry_serializer.data
-    )
-    if resp_json.get('error', None):
-        print(f"Error sending message to {moderator_inquiry_notification_channel_name}: {resp_json['error']}")
+    return {
+        reader.id: {row['id']: row[f'unread_by_{index}'] for row in rows}
+        for index, reader in enumerate(inquiry_moderators)
+    }
 
 
-def send_inquiry_notification_to_user(
-    inquiry: Inquiry, 
-    user_id: int, 
-    last_read_at: datetime
-) -> None:
-    inquiry_serializer = InquirySerializer(
-        inquiry,
-        fields_exclude=['messages', 'unread_messages_count'],
-        context={
-            'user': {
-                'fields': ['username', 'id']
-            },
-            'inquirytypedisplayname': {
-                'fields': ['display_name', 'language_data']
-            },
-            'inquirymessage': {
-                'fields_exclude': ['inquiry_data', 'user_data']
-            },
-            'inquirymoderator': {
-                'fields': [
-                    'moderator_data', 
-                    'last_message', 
-                    'unread_messages_count', 
-                    'in_charge'
-                ]
-            },
-            'moderator': {
-                'fields': ['username', 'id']
-            },
-            'inquirymoderatormessage': {
-                'fields_exclude': ['inquiry_moderator_data', 'user_data']
-            },
-            'inquirymoderatormessage_extra': {
-                'user_last_read_at': {
-                    'id': user_id,
-                    'last_read_at': last_read_at
-                }
-            },
-            'language': {
-                'fields': ['name']
+def create_inquiry_broadcast_publications(inquiry: Inquiry, message: InquiryModeratorMessage = None) -> list:
+    """
+    Build every (channel, payload) pair of an inquiry update.
+    - The inquiry is serialized once; the payloads of the user and of each assigned moderator only
+    add their own unread counts to a copy of it.
+    - If a message is given, it is also sent to the live chat of the inquiry.
+    """
+    data = serialize_inquiry_for_broadcast(inquiry).data
+    inquiry_moderators = list(inquiry.inquirymoderator_set.all())
+    moderators_unread_counts = count_moderator_messages_unread_by_moderators(inquiry_moderators)
+
+    publications = []
+    if message is not None:
+        publications.append((
+            f'users/inquiries/{inquiry.id}',
+            {
+                'type': 'message',
+                'message': InquiryModeratorMessageSerializer(
+                    message,
+                    fields_exclude=['inquiry_moderator_data'],
+                    context={
+                        'user': {
+                            'fields': ['username', 'id']
+                        }
+                    }
+                ).data
             }
+        ))
+
+    moderator_list_data = dict(data)
+    for channel_name in inquiry_moderator_list_channel_names:
+        publications.append((channel_name, moderator_list_data))
+
+    publications.append((
+        f'users/{inquiry.user_id}/inquiries/updates',
+        {
+            **data,
+            'moderators': [
+                {**moderator_data, 'unread_messages_count': inquiry_moderator.unread_count}
+                for moderator_data, inquiry_moderator in zip(data['moderators'], inquiry_moderators)
+            ]
         }
-    )
-
-    user_inquiry_notification_channel_name = f'users/{user_id}/inquiries/updates'
-    resp_json = send_message_to_centrifuge(
-        user_inquiry_notification_channel_name,
-        inquiry_serializer.data
-    )
-    if resp_json.get('error', None):
-        print(f"Error sending message to {user_inquiry_notification_channel_name}: {resp_json['error']}")
-
-
-def send_inquiry_message_to_live_chat(
-    message: InquiryModeratorMessage, 
-    chat_id: str
-):
-    message_serializer = InquiryModeratorMessageSerializer(
-        message,
-        fields_exclude=['inquiry_moderator_data'],
-        context={
-            'user': {
-                'fields': ['username', 'id']
+    ))
+
+    for reader in inquiry_moderators:
+        unread_counts = moderators_unread_counts.get(reader.id, {})
+        publications.append((
+            f'moderators/{reader.moderator_id}/inquiries/updates',
+            {
+                **data,
+                'unread_messages_count': reader.user_unread_count,
+                'moderators': [
+                    {
+                        **moderator_data,
+                        'unread_messages_count': 0 if inquiry_moderator.id == reader.id else unread_counts.get(inquiry_moderator.id, 0)
+                    }
+                    for moderator_data, inquiry_moderator in zip(data['moderators'], inquiry_moderators)
+                ]
             }
-        }
-    )
+        ))
 
-    data = {
-        'type': 'message',
-        'message': message_serializer.data
-    }
+    return publications
 
-    inquiry_channel_name = f'users/inquiries/{chat_id}'
-    resp_json = send_message_to_centrifuge(
-        inquiry_channel_name,
-        data
-    )
-    if resp_json.get('error', None):
-        print(f"Error sending message to {inquiry_channel_name}: {resp_json['error']}")
+
+def broadcast_inquiry_update(inquiry: Inquiry, message: InquiryModeratorMessage = None) -> None:
+    publications = create_inquiry_broadcast_publications(inquiry, message)
+    resp_json = publish_messages_to_centrifuge(publications)
+    if resp_json is None:
+        print(f"Error broadcasting the update of inquiry {inquiry.id}")
 
 
 def send_new_moderator_to_live_chat(
@@ -567,10 +524,32 @@ def serialize_report(report: Report) -> ReportSerializer:
         }
     )
 
+def annotate_unread_messages_count_for_reader(queryset, reader) -> BaseManager[InquiryModerator]:
+    """
+    Annotate each inquiry moderator with the number of their messages the reader, another moderator
+    of the same inquiry, has not read yet, so a list is not counted row by row when serialized.
+    """
+    if not reader.is_authenticated:
+        return queryset
+
+    reader_last_read_at = InquiryModerator.objects.filter(
+        inquiry=OuterRef('inquiry'),
+        moderator=reader
+    ).values('last_read_at')[:1]
+
+    return queryset.annotate(
+        reader_unread_messages_count=Count(
+            'inquirymoderatormessage',
+            filter=Q(inquirymoderatormessage__created_at__gt=Subquery(reader_last_read_at))
+        )
+    )
+
+
 def filter_and_fetch_inquiries_in_desc_order_based_on_updated_at(request, **kwargs) -> BaseManager[Inquiry]:
     queryset = Inquiry.objects.select_related(
         'inquiry_type',
-        'user'
+        'user',
+        'last_message'
     ).prefetch_related(
         Prefetch(
             'inquiry_type__inquirytypedisplayname_set',
@@ -578,28 +557,23 @@ def filter_and_fetch_inquiries_in_desc_order_based_on_updated_at(request, **kwar
                 'language'
             )
         ),
-        Prefetch(
-            'messages',
-            queryset=InquiryMessage.objects.order_by('-created_at')
-        ),
         Prefetch(
             'inquirymoderator_set',
-            queryset=InquiryModerator.objects.select_related(
-                'moderator'
-            ).prefetch_related(
-                Prefetch(
-                    'inquirymoderatormessage_set',
-                    queryset=InquiryModeratorMessage.objects.order_by('-created_at')
-                )
+            queryset=annotate_unread_messages_count_for_reader(
+                InquiryModerator.objects.select_related(
+                    'moderator',
+                    'last_message'
+                ),
+                request.user
             )
         )
-    ).order_by('-updated_at')
+    ).order_by('-updated_at', '-id')
 
     search_term = request.query_params.get('search', None)
-    if search_term is not None:
+    if search_term:
+        user_ids = UserService.get_user_ids_by_search_term(search_term, search_email=True)
         queryset = queryset.filter(
-            Q(user__username__icontains=search_term) | Q(user__email__icontains=search_term) |
-            Q(title__icontains=search_term)
+            Q(user_id__in=user_ids) | Q(title__icontains=search_term)
         )
 
     if kwargs:
@@ -608,10 +582,33 @@ def filter_and_fetch_inquiries_in_desc_order_based_on_updated_at(request, **kwar
     return queryset
 
 
+def filter_and_fetch_inquiry_for_broadcast(inquiry_id) -> Inquiry | None:
+    return Inquiry.objects.filter(id=inquiry_id).select_related(
+        'inquiry_type',
+        'user',
+        'last_message'
+    ).prefetch_related(
+        Prefetch(
+            'inquiry_type__inquirytypedisplayname_set',
+            queryset=InquiryTypeDisplayName.objects.select_related(
+                'language'
+            )
+        ),
+        Prefetch(
+            'inquirymoderator_set',
+            queryset=InquiryModerator.objects.select_related(
+                'moderator',
+                'last_message'
+            )
+        )
+    ).first()
+
+
 def filter_and_fetch_inquiry(**kwargs) -> Inquiry | None:
     queryset = Inquiry.objects.select_related(
         'inquiry_type',
-        'user'
+        'user',
+        'last_message'
     ).prefetch_related(
         Prefetch(
             'inquiry_type__inquirytypedisplayname_set',
@@ -626,7 +623,8 @@ def filter_and_fetch_inquiry(**kwargs) -> Inquiry | None:
         Prefetch(
             'inquirymoderator_set',
             queryset=InquiryModerator.objects.select_related(
-                'moderator'
+                'moderator',
+                'last_message'
             ).prefetch_related(
                 Prefetch(
                     'inquirymoderatormessage_set',
@@ -671,9 +669,7 @@ def create_post_queryset_without_prefetch(
 
     search_term = request.query_params.get('search', None)
     if search_term is not None:
-        queryset = queryset.filter(
-            Q(title__icontains=search_term) | Q(content__icontains=search_term)
-        )
+        queryset = filter_by_search_term(queryset, search_term)
 
     teams_filter : str | None = request.query_params.get('teams', None)
     if teams_filter is not None:
@@ -687,6 +683,8 @@ def create_post_queryset_without_prefetch(
 
     if sort_by is not None:
         queryset = queryset.order_by(*sort_by)
+    elif 'search_rank' in queryset.query.annotations:
+        queryset = queryset.order_by('-search_rank', '-created_at')
     else:
         queryset = queryset.order_by('-created_at')
 
@@ -725,8 +723,10 @@ def create_post_comment_queryset_without_prefetch(
 
     search_term = request.query_params.get('search', None)
     if search_term is not None:
-        queryset = queryset.filter(
-            Q(post__title__icontains=search_term) | Q(content__icontains=search_term)
+        queryset = filter_by_search_term(
+            queryset, 
+            search_term, 
+            vector_fields=('search_vector', 'post__search_vector')
         )
 
     teams_filter : str | None = request.query_params.get('teams', None)
@@ -741,6 +741,8 @@ def create_post_comment_queryset_without_prefetch(
 
     if sort_by is not None:
         queryset = queryset.order_by(*sort_by)
+    elif 'search_rank' in queryset.query.annotations:
+        queryset = queryset.order_by('-search_rank', '-created_at')
     else:
         queryset = queryset.order_by('-created_at')
 
@@ -778,10 +780,10 @@ def create_userchat_queryset_without_prefetch(
         queryset = UserChat.objects.all()
 
     search_term = request.query_params.get('search', None)
-    if search_term is not None:
+    if search_term:
+        user_ids = UserService.get_user_ids_by_search_term(search_term, search_email=True)
         queryset = queryset.filter(
-            Q(userchatparticipant__user__username__icontains=search_term) | 
-            Q(userchatparticipant__user__email__icontains=search_term)
+            id__in=UserChatParticipant.objects.filter(user_id__in=user_ids).values('chat_id')
         )
 
     if sort_by is not None:
@@ -812,10 +814,10 @@ def create_report_queryset_without_prefetch(
         queryset = Report.objects.all()
 
     search_term = request.query_params.get('search', None)
-    if search_term is not None:
+    if search_term:
+        user_ids = UserService.get_user_ids_by_search_term(search_term)
         queryset = queryset.filter(
-            Q(accused__username__icontains=search_term) | 
-            Q(accuser__username__icontains=search_term)
+            Q(accused_id__in=user_ids) | Q(accuser_id__in=user_ids)
         )
 
     sort_by : str | None = request.query_params.get('sort', None)
@@ -913,14 +915,20 @@ class InquiryModeratorService:
             inquiry=inquiry,
             moderator=request.user
         )
-        if not created:
+        if created:
+            Inquiry.objects.filter(id=inquiry.id).update(
+                moderators_count=F('moderators_count') + 1
+            )
+            inquiry.moderators_count += 1
+        else:
             InquiryModerator.objects.filter(
                 inquiry=inquiry,
                 moderator=request.user
             ).update(in_charge=True)
 
+        # Only updated_at, so the counters and the last message updated meanwhile are kept
         inquiry.updated_at = datetime.now(timezone.utc)
-        inquiry.save()
+        inquiry.save(update_fields=['updated_at'])
 
     @staticmethod
     def unassign_moderator(request, inquiry):
@@ -928,7 +936,7 @@ class InquiryModeratorService:
             inquiry=inquiry,
             moderator=request.user
         ).update(in_charge=False)
-        inquiry.save()
+        inquiry.save(update_fields=['updated_at'])
 
     @staticmethod
     def create_message_for_inquiry(request, pk):
@@ -1106,14 +1114,6 @@ class PostManagementService:
             'team',
             'status'
         ).prefetch_related(
-            Prefetch(
-                'postlike_set',
-                queryset=PostLike.objects.all()
-            ),
-            Prefetch(
-                'postcomment_set',
-                queryset=PostComment.objects.all()
-            ),
             Prefetch(
                 'status__poststatusdisplayname_set',
                 queryset=PostStatusDisplayName.objects.select_related(
@@ -1130,7 +1130,9 @@ class PostManagementService:
             'team__id', 
             'team__symbol', 
             'status__id', 
-            'status__name'
+            'status__name',
+            'likes_count',
+            'comments_count'
         )
     
     @staticmethod
@@ -1190,10 +1192,6 @@ class UserManagementService:
         return User.objects.filter(id=pk).select_related(
             'role'
         ).prefetch_related(
-            Prefetch(
-                'liked_user',
-                queryset=UserLike.objects.all()
-            ),
             Prefetch(
                 'teamlike_set',
                 queryset=TeamLike.objects.select_related('team')
@@ -1209,10 +1207,9 @@ class UserManagementService:
         ).prefetch_related(
             Prefetch(
                 'userchatparticipant_set',
-                UserChatParticipant.objects.prefetch_related(
-                    'userchatparticipantmessage_set',
-                ).select_related(
+                UserChatParticipant.objects.select_related(
                     'user',
+                    'last_message',
                 )
             )
         )
@@ -1248,12 +1245,12 @@ class UserManagementService:
                 'team__id', 
                 'team__symbol', 
                 'status__id', 
-                'status__name'
+                'status__name',
+                'likes_count',
+                'comments_count'
             ],
             user__id=pk
         ).prefetch_related(
-            'postlike_set',
-            'postcomment_set',
             Prefetch(
                 'status__poststatusdisplayname_set',
                 queryset=PostStatusDisplayName.objects.select_related(
@@ -1280,18 +1277,11 @@ class UserManagementService:
                 'post__team__id',
                 'post__team__symbol',
                 'post__user__id',
-                'post__user__username'
+                'post__user__username',
+                'likes_count',
+                'replies_count'
             ],
             user__id=pk
-        ).prefetch_related(
-            Prefetch(
-                'postcommentlike_set',
-                queryset=PostCommentLike.objects.all()
-            ),
-            Prefetch(
-                'postcommentreply_set',
-                queryset=PostCommentReply.objects.all()
-            ),
         ).select_related(
             'user',
             'status',
@@ -1332,8 +1322,13 @@ class UserManagementService:
         if not isinstance(data, list):
             return False, {'error': 'Invalid data'}, HTTP_400_BAD_REQUEST
 
+        previous_team_ids = list(
+            TeamLike.objects.filter(user=user).values_list('team__id', flat=True)
+        )
+
         if not data:
             TeamLike.objects.filter(user=user).delete()
+            update_teams_likes_count(previous_team_ids)
             return True, None, None
 
         try:
@@ -1350,6 +1345,7 @@ class UserManagementService:
         TeamLike.objects.bulk_create([
             TeamLike(user=user, team=team) for team in teams
         ])
+        update_teams_likes_count(previous_team_ids + [team.id for team in teams])
 
         return True, None, None
     
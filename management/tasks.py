@@ -2,30 +2,14 @@ from celery import shared_task
 
 from management.models import InquiryModeratorMessage
 from management.services import (
-    filter_and_fetch_inquiry,
-    send_inquiry_message_to_live_chat, 
-    send_inquiry_notification_to_all_channels_for_moderators, 
-    send_inquiry_notification_to_specific_moderator, 
-    send_inquiry_notification_to_user
+    broadcast_inquiry_update,
+    filter_and_fetch_inquiry_for_broadcast
 )
 
 
 @shared_task
 def broadcast_inquiry_updates_to_all_parties(inquiry_id, message_id):
     message = InquiryModeratorMessage.objects.get(id=message_id)
-    inquiry = filter_and_fetch_inquiry(id=inquiry_id)
+    inquiry = filter_and_fetch_inquiry_for_broadcast(inquiry_id)
 
-    send_inquiry_message_to_live_chat(message, inquiry.id)
-    send_inquiry_notification_to_user(
-        inquiry,
-        inquiry.user.id,
-        inquiry.last_read_at
-    )
-    send_inquiry_notification_to_all_channels_for_moderators(inquiry)
-
-    for moderator in inquiry.inquirymoderator_set.all():
-        send_inquiry_notification_to_specific_moderator(
-            inquiry,
-            moderator.moderator.id,
-            moderator.last_read_at
-        )
\ No newline at end of file
+    broadcast_inquiry_update(inquiry, message)
@@ -1,3 +1,137 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from api.utils import MockResponse
+
+from management.models import Inquiry, InquiryModerator, InquiryType
+from management.serializers import (
+    InquiryCreateSerializer,
+    InquiryMessageCreateSerializer,
+    InquiryModeratorMessageCreateSerializer,
+)
+from management.services import (
+    InquiryModeratorService,
+    filter_and_fetch_inquiries_in_desc_order_based_on_updated_at,
+    inquiry_moderator_list_channel_names,
+)
+from management.tasks import broadcast_inquiry_updates_to_all_parties
+from users.models import Role, User
+
+from unittest.mock import patch
+
+
+class InquiryCountersTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='testuser', email='test@test.com')
+        self.moderator = User.objects.create(
+            username='testmoderator',
+            email='moderator@test.com',
+            role=Role.get_site_moderator_role()
+        )
+        self.other_moderator = User.objects.create(
+            username='othermoderator',
+            email='othermoderator@test.com',
+            role=Role.get_site_moderator_role()
+        )
+        inquiry_type = InquiryType.objects.create(name='general', description='General')
+
+        serializer = InquiryCreateSerializer(
+            data={'inquiry_type': inquiry_type.id, 'title': 'title', 'message': 'first message'}
+        )
+        serializer.is_valid(raise_exception=True)
+        self.inquiry = serializer.save(user=self.user)
+
+    def create_request(self, user):
+        request = APIRequestFactory().get('/api/admin/inquiries/')
+        request.user = user
+        return request
+
+    def test_counters_are_not_overwritten_by_stale_instances(self):
+        stale_inquiry = Inquiry.objects.get(id=self.inquiry.id)
+        InquiryModeratorService.assign_moderator(self.create_request(self.moderator), stale_inquiry)
+
+        serializer = InquiryMessageCreateSerializer(data={'message': 'second message'})
+        serializer.is_valid(raise_exception=True)
+        message = serializer.save(inquiry=self.inquiry.id)
+
+        # assigning again with an instance loaded before the message keeps the new last message
+        InquiryModeratorService.assign_moderator(self.create_request(self.moderator), stale_inquiry)
+
+        inquiry = Inquiry.objects.get(id=self.inquiry.id)
+        self.assertEqual(inquiry.last_message_id, message.id)
+        self.assertEqual(inquiry.moderators_count, 1)
+
+        inquiry_moderator = InquiryModerator.objects.get(inquiry=inquiry, moderator=self.moderator)
+        self.assertEqual(inquiry_moderator.user_unread_count, 1)
+
+        serializer = InquiryModeratorMessageCreateSerializer(data={'message': 'reply'})
+        serializer.is_valid(raise_exception=True)
+        reply = serializer.save(inquiry_moderator=inquiry_moderator)
+
+        inquiry_moderator.refresh_from_db()
+        self.assertEqual(inquiry_moderator.unread_count, 1)
+        self.assertEqual(inquiry_moderator.last_message_id, reply.id)
+
+    def test_list_annotates_messages_unread_by_the_reader(self):
+        InquiryModeratorService.assign_moderator(self.create_request(self.moderator), self.inquiry)
+        InquiryModeratorService.assign_moderator(self.create_request(self.other_moderator), self.inquiry)
+
+        other_inquiry_moderator = InquiryModerator.objects.get(moderator=self.other_moderator)
+        for i in range(2):
+            serializer = InquiryModeratorMessageCreateSerializer(data={'message': f'message {i}'})
+            serializer.is_valid(raise_exception=True)
+            serializer.save(inquiry_moderator=other_inquiry_moderator)
+
+        inquiry = filter_and_fetch_inquiries_in_desc_order_based_on_updated_at(
+            self.create_request(self.moderator)
+        ).get(id=self.inquiry.id)
+
+        unread_counts = {
+            inquiry_moderator.moderator_id: inquiry_moderator.reader_unread_messages_count
+            for inquiry_moderator in inquiry.inquirymoderator_set.all()
+        }
+        self.assertEqual(unread_counts, {self.moderator.id: 0, self.other_moderator.id: 2})
+
+
+class InquiryBroadcastTestCase(InquiryCountersTestCase):
+    @patch('requests.post', return_value=MockResponse(200, {'result': 'ok'}))
+    def test_update_is_broadcast_in_a_single_batch(self, mocked):
+        InquiryModeratorService.assign_moderator(self.create_request(self.moderator), self.inquiry)
+        InquiryModeratorService.assign_moderator(self.create_request(self.other_moderator), self.inquiry)
+
+        inquiry_moderator = InquiryModerator.objects.get(moderator=self.moderator)
+        serializer = InquiryModeratorMessageCreateSerializer(data={'message': 'reply'})
+        serializer.is_valid(raise_exception=True)
+        message = serializer.save(inquiry_moderator=inquiry_moderator)
+        mocked.reset_mock()
+
+        broadcast_inquiry_updates_to_all_parties(self.inquiry.id, message.id)
+
+        self.assertEqual(mocked.call_count, 1)
+        publications = {
+            command['publish']['channel']: command['publish']['data']
+            for command in json.loads(mocked.call_args.kwargs['data'])['commands']
+        }
+        self.assertEqual(set(publications), {
+            f'users/inquiries/{self.inquiry.id}',
+            f'users/{self.user.id}/inquiries/updates',
+            f'moderators/{self.moderator.id}/inquiries/updates',
+            f'moderators/{self.other_moderator.id}/inquiries/updates',
+            *inquiry_moderator_list_channel_names,
+        })
+        self.assertEqual(publications[f'users/inquiries/{self.inquiry.id}']['message']['message'], 'reply')
+
+        # the reply is unread by the user, and by the other moderator only
+        unread_counts = {
+            channel: {
+                moderator['moderator_data']['id']: moderator['unread_messages_count']
+                for moderator in publications[channel]['moderators']
+            }
+            for channel in (
+                f'users/{self.user.id}/inquiries/updates',
+                f'moderators/{self.other_moderator.id}/inquiries/updates',
+            )
+        }
+        self.assertEqual(unread_counts[f'users/{self.user.id}/inquiries/updates'][self.moderator.id], 1)
+        self.assertEqual(unread_counts[f'moderators/{self.other_moderator.id}/inquiries/updates'][self.moderator.id], 1)
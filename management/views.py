@@ -9,7 +9,7 @@ from django.views.decorators.cache import cache_page
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
 
-from api.paginators import CustomPageNumberPagination
+from api.paginators import CustomPageNumberPagination, get_pagination_for_request
 from management.serializers import (
     InquiryCreateSerializer, 
 )
@@ -24,13 +24,6 @@ from management.services import (
     UserManagementSerializerService,
     UserManagementService,
     filter_and_fetch_inquiries_in_desc_order_based_on_updated_at,
-    filter_and_fetch_inquiry,
-    send_inquiry_notification_to_all_channels_for_moderators,
-    send_inquiry_notification_to_specific_moderator,
-    send_inquiry_notification_to_user,
-    send_new_moderator_to_live_chat,
-    send_partially_updated_inquiry_to_live_chat,
-    send_unassigned_inquiry_to_live_chat,
     serialize_inquiries_for_list,
     serialize_report,
     serialize_reports
@@ -169,7 +162,7 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
     def list(self, request):
         inquiries = InquiryModeratorService.get_inquiries_based_on_recent_updated_at(request)
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request, ordering_field='updated_at')
         inquiries = pagination.paginate_queryset(inquiries, request)
 
         serializer = InquirySerializerService.serialize_inquiries(inquiries)
@@ -180,24 +173,6 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
         if error:
             return Response(status=status, data=error)
 
-        inquiry = InquiryService.get_inquiry_without_messages(pk)
-        notification_inquiry = filter_and_fetch_inquiry(id=pk)
-
-        send_partially_updated_inquiry_to_live_chat(inquiry)
-        send_inquiry_notification_to_user(
-            notification_inquiry,
-            inquiry.user.id,
-            inquiry.last_read_at
-        )
-        send_inquiry_notification_to_all_channels_for_moderators(notification_inquiry)
-
-        for moderator in inquiry.inquirymoderator_set.all():
-            send_inquiry_notification_to_specific_moderator(
-                notification_inquiry,
-                moderator.moderator.id,
-                moderator.last_read_at
-            )
-
         return Response(status=HTTP_200_OK)
     
     @action(
@@ -208,10 +183,10 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
     def list_unassigned_inquiries(self, request):
         inquiries = filter_and_fetch_inquiries_in_desc_order_based_on_updated_at(
             request,
-            inquirymoderator__isnull=True
+            moderators_count=0
         )
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request, ordering_field='updated_at')
         inquiries = pagination.paginate_queryset(inquiries, request)
         serializer = serialize_inquiries_for_list(inquiries)
 
@@ -225,10 +200,10 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
     def list_assigned_inquiries(self, request):
         inquiries = filter_and_fetch_inquiries_in_desc_order_based_on_updated_at(
             request,
-            inquirymoderator__isnull=False
+            moderators_count__gt=0
         )
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request, ordering_field='updated_at')
         inquiries = pagination.paginate_queryset(inquiries, request)
         serializer = serialize_inquiries_for_list(inquiries)
 
@@ -245,7 +220,7 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
             solved=True
         )
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request, ordering_field='updated_at')
         inquiries = pagination.paginate_queryset(inquiries, request)
         serializer = serialize_inquiries_for_list(inquiries)
 
@@ -262,7 +237,7 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
             solved=False
         )
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request, ordering_field='updated_at')
         inquiries = pagination.paginate_queryset(inquiries, request)
         serializer = serialize_inquiries_for_list(inquiries)
 
@@ -279,7 +254,7 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
             inquirymoderator__moderator=request.user
         )
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request, ordering_field='updated_at')
         inquiries = pagination.paginate_queryset(inquiries, request)
 
         data = InquirySerializerService.serialize_inquiries_for_specific_moderator(
@@ -299,7 +274,6 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
             return Response(status=HTTP_404_NOT_FOUND)
         
         InquiryModeratorService.assign_moderator(request, inquiry)
-        send_new_moderator_to_live_chat(inquiry, request.user.id)
         return Response(status=HTTP_201_CREATED)
     
     @assign_moderator.mapping.delete
@@ -309,7 +283,6 @@ class InquiryModeratorViewSet(viewsets.ViewSet):
             return Response(status=HTTP_404_NOT_FOUND)
         
         InquiryModeratorService.unassign_moderator(request, inquiry)
-        send_unassigned_inquiry_to_live_chat(inquiry, request.user.id)
         return Response(status=HTTP_200_OK)
     
     @action(
@@ -411,7 +384,7 @@ class PostManagementViewSet(viewsets.ViewSet):
     def list(self, request):
         posts = PostManagementService.get_all_posts()
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request)
         paginated_data = pagination.paginate_queryset(posts, request)
 
         serializer = PostManagementSerializerService.serialize_posts(paginated_data)
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.1 on 2025-01-14 10:41
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationTemplateType',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=512)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NotificationTemplate',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=512)),
+                ('template', models.TextField()),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notification.notificationtemplatetype')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('data', models.JSONField()),
+                ('message', models.TextField(default='', help_text='Template rendered with the data, shared by all recipients')),
+                ('group_key', models.CharField(help_text='Notifications with the same key sent in a short time are coalesced into one', max_length=256, null=True)),
+                ('actors_count', models.IntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notification.notificationtemplate')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['group_key', '-updated_at'], name='notification_group_key_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationRecipient',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('read', models.BooleanField(default=False)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notification.notification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('notification', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.1 on 2025-01-14 10:45
+
+from django.db import migrations
+
+
+def create_notification_templates(apps, schema_editor):
+    NotificationTemplateType = apps.get_model('notification', 'NotificationTemplateType')
+    post_type, _ = NotificationTemplateType.objects.get_or_create(name='post')
+    comment_type, _ = NotificationTemplateType.objects.get_or_create(name='comment')
+
+    NotificationTemplate = apps.get_model('notification', 'NotificationTemplate')
+    NotificationTemplate.objects.update_or_create(
+        name='post_like', 
+        defaults={
+            'type': post_type,
+            'template': '{{ actor }}{% if others_count %} and {{ others_count }} others{% endif %} liked your post "{{ post_title }}"'
+        }
+    )
+    NotificationTemplate.objects.update_or_create(
+        name='post_comment', 
+        defaults={
+            'type': post_type,
+            'template': '{{ actor }}{% if others_count %} and {{ others_count }} others{% endif %} commented on your post "{{ post_title }}"'
+        }
+    )
+    NotificationTemplate.objects.update_or_create(
+        name='comment_like', 
+        defaults={
+            'type': comment_type,
+            'template': '{{ actor }}{% if others_count %} and {{ others_count }} others{% endif %} liked your comment'
+        }
+    )
+    NotificationTemplate.objects.update_or_create(
+        name='comment_reply', 
+        defaults={
+            'type': comment_type,
+            'template': '{{ actor }}{% if others_count %} and {{ others_count }} others{% endif %} replied to your comment'
+        }
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_notification_templates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.1 on 2025-01-15 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0002_auto_20250114_1045'),
+        ('users', '0023_userchatparticipant_unread_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationrecipient',
+            index=models.Index(fields=['user', 'deleted', '-created_at', '-id'], name='notif_recipient_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationrecipient',
+            index=models.Index(condition=models.Q(('deleted', False), ('read', False)), fields=['user'], name='notif_recipient_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationrecipient',
+            index=models.Index(condition=models.Q(('read', True)), fields=['created_at'], name='notif_recipient_read_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2025-01-16 10:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_read_at(apps, schema_editor):
+    NotificationRecipient = apps.get_model('notification', 'NotificationRecipient')
+
+    # The read time of older notifications is unknown, their delivery time is the closest
+    NotificationRecipient.objects.filter(read=True).update(read_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0003_notificationrecipient_notif_recipient_inbox_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationrecipient',
+            name='read_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RemoveIndex(
+            model_name='notificationrecipient',
+            name='notif_recipient_read_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notificationrecipient',
+            index=models.Index(condition=models.Q(('read', True)), fields=['read_at'], name='notif_recipient_read_at_idx'),
+        ),
+        migrations.RunPython(populate_read_at, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,15 @@
 import uuid
 from django.db import models
 
+from api.managers import LookupTableManager
+
 # Create your models here.
 class NotificationTemplateType(models.Model):
     id = models.SmallAutoField(primary_key=True)
     name = models.CharField(max_length=512)
 
+    objects = LookupTableManager()
+
     def __str__(self):
         return self.name
 
@@ -15,6 +19,8 @@ class NotificationTemplate(models.Model):
     name = models.CharField(max_length=512)
     template = models.TextField()
 
+    objects = LookupTableManager()
+
     def __str__(self):
         return self.name
     
@@ -22,13 +28,27 @@ class Notification(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     template = models.ForeignKey(NotificationTemplate, on_delete=models.CASCADE)
     data = models.JSONField()
+    message = models.TextField(
+        default='',
+        help_text='Template rendered with the data, shared by all recipients',
+    )
+    group_key = models.CharField(
+        max_length=256, 
+        null=True,
+        help_text='Notifications with the same key sent in a short time are coalesced into one',
+    )
+    actors_count = models.IntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.id}'
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['group_key', '-updated_at'], name='notification_group_key_idx'),
+        ]
 
 class NotificationRecipient(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -36,10 +56,21 @@ class NotificationRecipient(models.Model):
     user = models.ForeignKey('users.User', on_delete=models.CASCADE)
     read = models.BooleanField(default=False)
     deleted = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f'{self.user} received {self.notification}'
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        unique_together = ['notification', 'user']
+        indexes = [
+            models.Index(fields=['user', 'deleted', '-created_at', '-id'], name='notif_recipient_inbox_idx'),
+            models.Index(
+                fields=['user'], 
+                condition=models.Q(read=False, deleted=False), 
+                name='notif_recipient_unread_idx'
+            ),
+            models.Index(fields=['read_at'], condition=models.Q(read=True), name='notif_recipient_read_at_idx'),
+        ]
@@ -0,0 +1,43 @@
+from rest_framework import serializers
+
+from api.mixins import DynamicFieldsSerializerMixin
+from notification.models import Notification, NotificationRecipient
+
+
+class NotificationMarkAsReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), 
+        required=False, 
+        max_length=1000
+    )
+
+
+class NotificationSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
+    type = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        exclude = ('template', 'group_key')
+
+    def get_type(self, obj):
+        return obj.template.name
+    
+
+class NotificationRecipientSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
+    notification_data = serializers.SerializerMethodField()
+
+    class Meta:
+        model = NotificationRecipient
+        exclude = ('notification', 'user')
+
+    def get_notification_data(self, obj):
+        if not hasattr(obj, 'notification'):
+            return None
+        
+        context = self.context.get('notification', {})
+        serializer = NotificationSerializer(
+            obj.notification, 
+            context=self.context,
+            **context
+        )
+        return serializer.data
@@ -0,0 +1,272 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.manager import BaseManager
+from django.template import Context, Template
+
+from api.utils import get_redis_client
+from api.websocket import publish_messages_to_centrifuge
+from notification.models import Notification, NotificationRecipient, NotificationTemplate
+from notification.serializers import NotificationRecipientSerializer, NotificationSerializer
+
+
+NOTIFICATION_COALESCE_WINDOW = timedelta(hours=1)
+NOTIFICATION_PUBLISH_BATCH_SIZE = 500
+NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT = 60 * 5
+NOTIFICATION_RETENTION_PERIOD = timedelta(days=30)
+NOTIFICATION_DELETE_BATCH_SIZE = 1000
+
+compiled_templates = {}
+
+
+def render_notification_template(template: NotificationTemplate, data: dict) -> str:
+    '''
+    Render the template of a notification. Templates are compiled once per process.
+    '''
+    compiled = compiled_templates.get(template.id)
+    if compiled is None or compiled[0] != template.template:
+        compiled = (template.template, Template(template.template))
+        compiled_templates[template.id] = compiled
+
+    return compiled[1].render(Context(data, autoescape=False))
+
+
+def get_unread_count_cache_key(user_id: int) -> str:
+    return f'user_{user_id}_unread_notifications_count'
+
+
+def publish_notification(notification: Notification, user_ids: Iterable[int]) -> None:
+    '''
+    Push the notification to the channel of every recipient, in batches of requests to centrifugo.
+    '''
+    data = NotificationSerializer(notification).data
+    publications = [(f'users/{user_id}/notifications', {'notification': data}) for user_id in user_ids]
+
+    for i in range(0, len(publications), NOTIFICATION_PUBLISH_BATCH_SIZE):
+        publish_messages_to_centrifuge(
+            publications[i:i + NOTIFICATION_PUBLISH_BATCH_SIZE],
+            type='notification'
+        )
+
+
+def get_notification_actors_key(group_key: str) -> str:
+    return f'notification_{group_key}_actors'
+
+
+def add_notification_actor(group_key: str, actor_id: int) -> bool:
+    '''
+    Record the actor of a coalesced notification, and return whether they were not counted yet.
+    The set lives as long as the notification can be coalesced.
+    '''
+    key = get_notification_actors_key(group_key)
+    with get_redis_client().pipeline() as pipe:
+        pipe.sadd(key, actor_id)
+        pipe.expire(key, int(NOTIFICATION_COALESCE_WINDOW.total_seconds()))
+        added, _ = pipe.execute()
+
+    return bool(added)
+
+
+def reset_notification_actors(group_key: str, actor_id: int) -> None:
+    key = get_notification_actors_key(group_key)
+    with get_redis_client().pipeline() as pipe:
+        pipe.delete(key)
+        pipe.sadd(key, actor_id)
+        pipe.expire(key, int(NOTIFICATION_COALESCE_WINDOW.total_seconds()))
+        pipe.execute()
+
+
+class NotificationService:
+    @staticmethod
+    def create_notification(
+        template_name: str, 
+        user_ids: Iterable[int], 
+        data: dict, 
+        group_key: str = None,
+        actor_id: int = None
+    ) -> Notification | None:
+        '''
+        Create a notification for several users and push it to them.
+        - The template is rendered once, and the recipients are inserted with a single query.
+        - If a notification with the same `group_key` was updated within the coalesce window, it is
+        updated instead, e.g. "A and 12 others liked your post", and marked as unread again. Each
+        actor is counted once, so an actor who unlikes and likes again does not add to the others.
+        Recipients who deleted the notification do not get it back.
+        '''
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return None
+        
+        template = NotificationTemplate.objects.get_by_name(template_name)
+
+        with transaction.atomic():
+            notification = None
+            if group_key is not None:
+                notification = Notification.objects.select_for_update().filter(
+                    group_key=group_key,
+                    updated_at__gte=datetime.now(timezone.utc) - NOTIFICATION_COALESCE_WINDOW
+                ).order_by('-updated_at').first()
+
+            if notification is not None:
+                if actor_id is not None and not add_notification_actor(group_key, actor_id):
+                    return notification
+
+                notification.template = template
+                notification.actors_count += 1
+                notification.data = {**data, 'others_count': notification.actors_count - 1}
+                notification.message = render_notification_template(template, notification.data)
+                notification.save()
+
+                recipients = NotificationRecipient.objects.filter(notification=notification, deleted=False)
+                user_ids = list(recipients.values_list('user_id', flat=True))
+                unread_user_ids = list(recipients.filter(read=True).values_list('user_id', flat=True))
+
+                # Move the notification back to the top of the inboxes
+                recipients.update(read=False, read_at=None, created_at=datetime.now(timezone.utc))
+            else:
+                notification = Notification.objects.create(
+                    template=template,
+                    data=data,
+                    message=render_notification_template(template, data),
+                    group_key=group_key
+                )
+                NotificationRecipient.objects.bulk_create([
+                    NotificationRecipient(notification=notification, user_id=user_id)
+                    for user_id in user_ids
+                ])
+                unread_user_ids = user_ids
+
+                if group_key is not None and actor_id is not None:
+                    reset_notification_actors(group_key, actor_id)
+
+            transaction.on_commit(
+                lambda: NotificationService.increment_unread_counts(unread_user_ids)
+            )
+            transaction.on_commit(lambda: publish_notification(notification, user_ids))
+
+        return notification
+
+    @staticmethod
+    def get_unread_count(user_id: int) -> int:
+        '''
+        Return the number of unread notifications of the user, kept in the cache and counted
+        with the partial index on unread recipients when it is missing.
+        A notification delivered between the count and the write to the cache is not incremented,
+        so the cached count expires after a few minutes to bound how long it can be off.
+        '''
+        cache_key = get_unread_count_cache_key(user_id)
+        count = cache.get(cache_key)
+        if count is not None:
+            return count
+        
+        count = NotificationRecipient.objects.filter(
+            user_id=user_id,
+            read=False,
+            deleted=False
+        ).count()
+        cache.add(cache_key, count, NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT)
+
+        return count
+    
+    @staticmethod
+    def increment_unread_counts(user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            try:
+                cache.incr(get_unread_count_cache_key(user_id))
+            except ValueError:
+                # Not cached, it is counted on the next read
+                pass
+
+    @staticmethod
+    def decrement_unread_count(user_id: int, delta: int) -> None:
+        if not delta:
+            return
+        
+        cache_key = get_unread_count_cache_key(user_id)
+        try:
+            count = cache.decr(cache_key, delta)
+        except ValueError:
+            return
+        
+        if count < 0:
+            cache.delete(cache_key)
+
+    @staticmethod
+    def get_notifications(user_id: int) -> BaseManager[NotificationRecipient]:
+        return NotificationRecipient.objects.filter(
+            user_id=user_id,
+            deleted=False
+        ).select_related(
+            'notification__template'
+        )
+    
+    @staticmethod
+    def mark_notifications_as_read(user_id: int, notification_ids: List[str] = None) -> int:
+        '''
+        Mark the given notifications of the user as read, or all of them if no ids are given.
+        '''
+        recipients = NotificationRecipient.objects.filter(
+            user_id=user_id,
+            read=False,
+            deleted=False
+        )
+        if notification_ids is not None:
+            recipients = recipients.filter(notification_id__in=notification_ids)
+
+        updated = recipients.update(read=True, read_at=datetime.now(timezone.utc))
+        if notification_ids is None:
+            cache.set(get_unread_count_cache_key(user_id), 0, NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT)
+        else:
+            NotificationService.decrement_unread_count(user_id, updated)
+
+        return updated
+    
+    @staticmethod
+    def delete_expired_read_notifications() -> int:
+        '''
+        Delete the recipients of notifications read longer than the retention period ago, and the
+        notifications left without recipients, in batches so the table is never locked for long.
+        '''
+        expired_at = datetime.now(timezone.utc) - NOTIFICATION_RETENTION_PERIOD
+
+        deleted = 0
+        while True:
+            ids = list(
+                NotificationRecipient.objects.filter(
+                    read=True,
+                    read_at__lt=expired_at
+                ).values_list('id', flat=True)[:NOTIFICATION_DELETE_BATCH_SIZE]
+            )
+            if not ids:
+                break
+
+            batch_deleted, _ = NotificationRecipient.objects.filter(id__in=ids).delete()
+            deleted += batch_deleted
+
+        while True:
+            ids = list(
+                Notification.objects.filter(
+                    created_at__lt=expired_at
+                ).exclude(
+                    Exists(NotificationRecipient.objects.filter(notification=OuterRef('pk')))
+                ).values_list('id', flat=True)[:NOTIFICATION_DELETE_BATCH_SIZE]
+            )
+            if not ids:
+                break
+
+            Notification.objects.filter(id__in=ids).delete()
+
+        return deleted
+
+
+class NotificationSerializerService:
+    @staticmethod
+    def serialize_notifications(recipients: List[NotificationRecipient]) -> NotificationRecipientSerializer:
+        return NotificationRecipientSerializer(
+            recipients,
+            many=True,
+            fields_exclude=['deleted'],
+        )
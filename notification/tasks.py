@@ -0,0 +1,19 @@
+import logging
+
+from celery import shared_task
+
+from notification.services import NotificationService
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def send_notification(template_name, user_ids, data, group_key=None, actor_id=None):
+    NotificationService.create_notification(template_name, user_ids, data, group_key, actor_id)
+
+
+@shared_task
+def delete_expired_read_notifications():
+    deleted = NotificationService.delete_expired_read_notifications()
+    logger.info(f'Deleted {deleted} expired read notifications')
@@ -1,3 +1,87 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone
 
-# Create your tests here.
+from rest_framework.test import APITestCase
+
+from api.utils import MockResponse, get_redis_client
+from notification.models import Notification, NotificationRecipient
+from notification.services import (
+    NOTIFICATION_RETENTION_PERIOD,
+    NotificationService,
+    get_notification_actors_key,
+    get_unread_count_cache_key,
+)
+from users.models import User
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+
+
+class NotificationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='testuser', email='test@test.com')
+        self.group_key = 'comment_like:1'
+        get_redis_client().delete(get_notification_actors_key(self.group_key))
+        cache.delete(get_unread_count_cache_key(self.user.id))
+
+    def like_comment(self, actor_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return NotificationService.create_notification(
+                'comment_like',
+                [self.user.id],
+                {'actor': f'actor{actor_id}', 'team_id': 1, 'post_id': '1', 'comment_id': '1'},
+                group_key=self.group_key,
+                actor_id=actor_id
+            )
+
+    @patch('requests.post', return_value=MockResponse(200, {'result': 'ok'}))
+    def test_coalesced_notification_counts_distinct_actors(self, mocked):
+        self.like_comment(1)
+        self.like_comment(2)
+
+        # the same actor liking again after an unlike is not counted twice
+        notification = self.like_comment(2)
+        notification.refresh_from_db()
+        self.assertEqual(notification.actors_count, 2)
+        self.assertEqual(notification.message, 'actor2 and 1 others liked your comment')
+        self.assertEqual(mocked.call_count, 2)
+
+        notification = self.like_comment(3)
+        notification.refresh_from_db()
+        self.assertEqual(notification.actors_count, 3)
+        self.assertEqual(notification.message, 'actor3 and 2 others liked your comment')
+
+    @patch('requests.post', return_value=MockResponse(200, {'result': 'ok'}))
+    def test_coalesced_notification_stays_deleted(self, mocked):
+        notification = self.like_comment(1)
+        NotificationRecipient.objects.filter(notification=notification).update(read=True, deleted=True)
+        mocked.reset_mock()
+
+        self.like_comment(2)
+
+        recipient = NotificationRecipient.objects.get(notification=notification)
+        self.assertTrue(recipient.deleted)
+        self.assertEqual(NotificationService.get_unread_count(self.user.id), 0)
+        self.assertEqual(mocked.call_count, 0)
+
+    @patch('requests.post', return_value=MockResponse(200, {'result': 'ok'}))
+    def test_read_notifications_expire_after_being_read(self, mocked):
+        recently_read = self.like_comment(1)
+        self.group_key = 'comment_like:2'
+        long_read = self.like_comment(2)
+
+        NotificationService.mark_notifications_as_read(self.user.id)
+        self.assertEqual(NotificationService.get_unread_count(self.user.id), 0)
+
+        # both were delivered long ago, only one was read long ago
+        expired_at = datetime.now(timezone.utc) - NOTIFICATION_RETENTION_PERIOD - timedelta(days=1)
+        NotificationRecipient.objects.update(created_at=expired_at)
+        Notification.objects.update(created_at=expired_at)
+        NotificationRecipient.objects.filter(notification=long_read).update(read_at=expired_at)
+
+        self.assertEqual(NotificationService.delete_expired_read_notifications(), 1)
+        self.assertEqual(
+            list(NotificationRecipient.objects.values_list('notification_id', flat=True)),
+            [recently_read.id]
+        )
+        self.assertFalse(Notification.objects.filter(id=long_read.id).exists())
@@ -1,5 +1,14 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
 from players.models import Player, PlayerCareerStatistics
-from teams.models import Team
+from players.serializers import PlayerSerializer
+from teams.models import Team, TeamName
+from teams.serializers import TeamSerializer
 
 from nba_api.stats.endpoints.playerindex import PlayerIndex
 from nba_api.stats.endpoints.playercareerstats import PlayerCareerStats
@@ -155,4 +164,137 @@ def add_career_stats_to_players():
             ) for season_stats in stats_dict
         ])
 
-        print(f"Updated player {player.id}, {player.last_name} {player.first_name}")
\ No newline at end of file
+        print(f"Updated player {player.id}, {player.last_name} {player.first_name}")
+
+
+AUTOCOMPLETE_RESULT_LIMIT = 10
+# Seconds between checks whether the index has been invalidated by another process
+AUTOCOMPLETE_INDEX_CHECK_INTERVAL = 60
+AUTOCOMPLETE_INDEX_VERSION_CACHE_KEY = 'autocomplete_index_version'
+
+
+def normalize_autocomplete_term(term):
+    return ' '.join(term.casefold().split())
+
+
+class AutocompleteIndex:
+    '''
+    In-memory index of players and teams for search-as-you-type.
+    - Each name (player full name, team symbol, team name in every language) is stored under
+    every word it contains onwards, so "james" and "lebron james" both find LeBron James.
+    - The keys are kept in a sorted array, and a prefix is looked up with a binary search.
+    - The serialized results are built along with the index, so a search never touches
+    the database.
+    - The index is built on the first search of each process, and rebuilt when another
+    process (the roster sync) bumps the version in the cache.
+    '''
+
+    def __init__(self):
+        # Sorted keys and the serialized result stored under each of them
+        self.index = ([], [])
+        self.version = None
+        self.checked_at = 0
+        self.lock = Lock()
+
+    def build(self):
+        teams = Team.objects.prefetch_related(
+            Prefetch(
+                'teamname_set',
+                queryset=TeamName.objects.select_related('language')
+            )
+        )
+        players = Player.objects.filter(team__isnull=False).select_related('team').prefetch_related(
+            Prefetch(
+                'team__teamname_set',
+                queryset=TeamName.objects.select_related('language')
+            )
+        )
+        context = {
+            'teamname': {
+                'fields': ('name', 'language')
+            },
+            'language': {
+                'fields': ('name',)
+            }
+        }
+
+        index = []
+        for team in teams:
+            data = {
+                'type': 'team',
+                **TeamSerializer(team, fields=('id', 'symbol', 'teamname_set'), context=context).data
+            }
+            names = [team.symbol] + [team_name.name for team_name in team.teamname_set.all()]
+            index.extend((key, data) for name in names for key in self.get_keys(name))
+
+        for player in players:
+            data = {
+                'type': 'player',
+                **PlayerSerializer(
+                    player,
+                    fields=('id', 'first_name', 'last_name', 'slug', 'team'),
+                    context={
+                        'team': {
+                            'fields': ('id', 'symbol', 'teamname_set')
+                        },
+                        **context
+                    }
+                ).data
+            }
+            index.extend((key, data) for key in self.get_keys(f'{player.first_name} {player.last_name}'))
+
+        index.sort(key=lambda entry: entry[0])
+        # Swap the whole index at once, so concurrent searches never see a half built one
+        self.index = ([entry[0] for entry in index], [entry[1] for entry in index])
+
+    @staticmethod
+    def get_keys(name):
+        words = normalize_autocomplete_term(name).split(' ')
+        return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+    def refresh_if_stale(self):
+        now = time.monotonic()
+        if self.version is not None and now - self.checked_at < AUTOCOMPLETE_INDEX_CHECK_INTERVAL:
+            return
+
+        with self.lock:
+            if self.version is not None and now - self.checked_at < AUTOCOMPLETE_INDEX_CHECK_INTERVAL:
+                return
+
+            version = cache.get_or_set(AUTOCOMPLETE_INDEX_VERSION_CACHE_KEY, time.time(), None)
+            if version != self.version:
+                self.build()
+                self.version = version
+            self.checked_at = now
+
+    def search(self, term, limit=AUTOCOMPLETE_RESULT_LIMIT):
+        self.refresh_if_stale()
+
+        prefix = normalize_autocomplete_term(term)
+        if not prefix:
+            return []
+
+        keys, entries = self.index
+        results = []
+        seen = set()
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix) and len(results) < limit:
+            entry = entries[i]
+            if (entry['type'], entry['id']) not in seen:
+                seen.add((entry['type'], entry['id']))
+                results.append(entry)
+            i += 1
+
+        return results
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+def invalidate_autocomplete_index():
+    '''
+    Make every process rebuild its autocomplete index within AUTOCOMPLETE_INDEX_CHECK_INTERVAL seconds.
+    '''
+
+    cache.set(AUTOCOMPLETE_INDEX_VERSION_CACHE_KEY, time.time(), None)
+
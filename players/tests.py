@@ -1,3 +1,65 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from players.models import Player
+from players.services import (
+    AUTOCOMPLETE_INDEX_VERSION_CACHE_KEY,
+    AutocompleteIndex,
+    invalidate_autocomplete_index,
+)
+from teams.models import Language, Team, TeamName
+
+from unittest.mock import patch
+
+
+class AutocompleteTestCase(TestCase):
+    def setUp(self):
+        self.team = Team.objects.create(id=1, symbol='LAL')
+        TeamName.objects.create(
+            team=self.team,
+            language=Language.objects.create(name='english'),
+            name='Los Angeles Lakers'
+        )
+        self.create_player(1, 'LeBron', 'James')
+
+        cache.delete(AUTOCOMPLETE_INDEX_VERSION_CACHE_KEY)
+        self.index = AutocompleteIndex()
+
+    def create_player(self, id, first_name, last_name):
+        return Player.objects.create(
+            id=id,
+            first_name=first_name,
+            last_name=last_name,
+            slug=f'{first_name}-{last_name}'.lower(),
+            team=self.team,
+            height='6-9',
+            country='USA'
+        )
+
+    def search(self, term):
+        return [(result['type'], result['id']) for result in self.index.search(term)]
+
+    def test_search_by_prefix_of_any_word(self):
+        self.assertEqual(self.search('leb'), [('player', 1)])
+        self.assertEqual(self.search('  JAMES '), [('player', 1)])
+        self.assertEqual(self.search('lebron j'), [('player', 1)])
+        self.assertEqual(self.search('lal'), [('team', 1)])
+        self.assertEqual(self.search('lakers'), [('team', 1)])
+
+        # "l" starts the symbol and several words of the team name, the team is listed once
+        self.assertEqual(sorted(self.search('l')), [('player', 1), ('team', 1)])
+
+        self.assertEqual(self.search(''), [])
+        self.assertEqual(self.search('james lebron'), [])
+
+    def test_index_is_rebuilt_when_invalidated(self):
+        self.assertEqual(self.search('dav'), [])
+
+        self.create_player(2, 'Anthony', 'Davis')
+        invalidate_autocomplete_index()
+
+        # processes only check the version once in a while
+        self.assertEqual(self.search('dav'), [])
+
+        with patch('players.services.AUTOCOMPLETE_INDEX_CHECK_INTERVAL', 0):
+            self.assertEqual(self.search('dav'), [('player', 2)])
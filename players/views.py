@@ -6,13 +6,25 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from api.mixins import LazyAuthenticationMixin
 from players.models import Player
 from players.serializers import PlayerSerializer
+from players.services import autocomplete_index
 from teams.models import TeamName
 
 
 # Create your views here.
-class PlayersViewSet(viewsets.ViewSet):
+class PlayersViewSet(LazyAuthenticationMixin, viewsets.ViewSet):
+    user_independent_actions = (
+        'get_top_10_players',
+        'autocomplete',
+    )
+
+    @action(detail=False, methods=['get'], url_path='autocomplete')
+    def autocomplete(self, request):
+        search_term = request.query_params.get('search', '')
+        return Response(autocomplete_index.search(search_term))
+
     @action(detail=False, methods=['get'], url_path='top-10')
     def get_top_10_players(self, request):
         top_players = Player.objects.filter(
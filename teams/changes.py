@@ -0,0 +1,60 @@
+from api.changefeed import register_change_handler
+from api.websocket import publish_messages_to_centrifuge
+from teams.models import PostComment
+from teams.services import PostSerializerService, PostService
+from users.serializers import PostCommentSerializer
+
+
+@register_change_handler('teams_post')
+def publish_post_change(operation, row):
+    channel_name = f'posts/{row["id"]}/updates'
+
+    if operation == 'DELETE':
+        publish_messages_to_centrifuge([(channel_name, {'post': {'id': row['id']}})], type='delete')
+        return
+
+    post = PostService.get_post(row['team_id'], row['id'])
+    if not post:
+        return
+
+    serializer = PostSerializerService.serialize_post_without_liked(post)
+    publish_messages_to_centrifuge([(channel_name, {'post': serializer.data})], type='update')
+
+
+@register_change_handler('teams_postcomment')
+def publish_post_comment_change(operation, row):
+    comment = PostComment.objects.select_related(
+        'user',
+        'status'
+    ).only(
+        'id',
+        'post_id',
+        'content',
+        'likes_count',
+        'replies_count',
+        'created_at',
+        'updated_at',
+        'user__id',
+        'user__username',
+        'status__id',
+        'status__name'
+    ).filter(id=row['id']).first()
+    if not comment:
+        return
+
+    serializer = PostCommentSerializer(
+        comment,
+        fields_exclude=['post_data', 'liked'],
+        context={
+            'user': {
+                'fields': ('id', 'username')
+            },
+            'status': {
+                'fields': ('id', 'name')
+            }
+        }
+    )
+    publish_messages_to_centrifuge(
+        [(f'posts/{row["post_id"]}/comments/updates', {'comment': serializer.data})],
+        type='new_comment' if operation == 'INSERT' else 'update'
+    )
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.1 on 2025-01-06 10:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(count=Count('pk')).values('count')
+        ),
+        0
+    )
+
+
+def populate_counters(apps, schema_editor):
+    Team = apps.get_model('teams', 'Team')
+    TeamLike = apps.get_model('teams', 'TeamLike')
+    Post = apps.get_model('teams', 'Post')
+    PostLike = apps.get_model('teams', 'PostLike')
+    PostComment = apps.get_model('teams', 'PostComment')
+    PostCommentLike = apps.get_model('teams', 'PostCommentLike')
+    PostCommentReply = apps.get_model('teams', 'PostCommentReply')
+
+    Team.objects.update(likes_count=count_subquery(TeamLike, 'team'))
+    Post.objects.update(
+        likes_count=count_subquery(PostLike, 'post'),
+        comments_count=count_subquery(PostComment, 'post'),
+    )
+    PostComment.objects.update(
+        likes_count=count_subquery(PostCommentLike, 'post_comment'),
+        replies_count=count_subquery(PostCommentReply, 'post_comment'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0011_auto_20241224_1011'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postcomment',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postcomment',
+            name='replies_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.1 on 2025-01-08 14:02
+
+from datetime import timezone
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Extract, Greatest, Log
+
+
+def populate_trending_score(apps, schema_editor):
+    Post = apps.get_model('teams', 'Post')
+    PostComment = apps.get_model('teams', 'PostComment')
+
+    replies_count = Coalesce(
+        Subquery(
+            PostComment.objects.filter(
+                post=OuterRef('pk')
+            ).order_by().values('post').annotate(total=Sum('replies_count')).values('total')
+        ),
+        0
+    )
+    interactions = F('likes_count') + F('comments_count') * 2 + replies_count
+
+    Post.objects.update(
+        trending_score=ExpressionWrapper(
+            Log(10, Greatest(interactions, 1))
+            + Extract('created_at', 'epoch', tzinfo=timezone.utc) / 45000,
+            output_field=FloatField()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0012_team_likes_count_post_likes_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-trending_score'], name='post_trending_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['team', '-trending_score'], name='post_team_trending_score_idx'),
+        ),
+        migrations.RunPython(populate_trending_score, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2025-01-09 11:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0013_post_trending_score_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostInteractionBucket',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('hour', models.DateTimeField()),
+                ('likes_count', models.IntegerField(default=0)),
+                ('comments_count', models.IntegerField(default=0)),
+                ('replies_count', models.IntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teams.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='postinteractionbucket_hour_idx')],
+                'unique_together': {('post', 'hour')},
+            },
+        ),
+    ]
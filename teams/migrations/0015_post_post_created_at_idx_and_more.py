@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2025-01-13 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0014_postinteractionbucket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='post_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['team', '-created_at', '-id'], name='post_team_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=models.Index(fields=['post', '-created_at', '-id'], name='comment_post_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postcommentreply',
+            index=models.Index(fields=['post_comment', '-created_at', '-id'], name='reply_comment_created_at_idx'),
+        ),
+    ]
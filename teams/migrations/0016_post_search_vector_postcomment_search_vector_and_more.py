@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2025-01-10 11:37
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0015_post_post_created_at_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector('title', config='english', weight='A')
+                + django.contrib.postgres.search.SearchVector('content', config='english', weight='B')
+                + django.contrib.postgres.search.SearchVector('title', config='simple', weight='A')
+                + django.contrib.postgres.search.SearchVector('content', config='simple', weight='B'),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name='postcomment',
+            name='search_vector',
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.SearchVector('content', config='english', weight='A')
+                + django.contrib.postgres.search.SearchVector('content', config='simple', weight='A'),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='comment_search_vector_idx'),
+        ),
+    ]
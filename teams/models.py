@@ -1,6 +1,11 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+from api.managers import LookupTableManager
+from api.utils import create_search_vector
+
 # Create your models here.
 class Language(models.Model):
     id = models.SmallAutoField(primary_key=True)
@@ -12,6 +17,7 @@ class Language(models.Model):
 class Team(models.Model):
     id = models.PositiveBigIntegerField(primary_key=True)
     symbol = models.CharField(max_length=10)
+    likes_count = models.IntegerField(default=0)
 
     def __str__(self):
         return self.symbol
@@ -57,6 +63,20 @@ class PostStatus(models.Model):
     id = models.SmallAutoField(primary_key=True)
     name = models.CharField(max_length=128)
 
+    objects = LookupTableManager()
+
+    @staticmethod
+    def get_created_role():
+        return PostStatus.objects.get_by_name('created')
+
+    @staticmethod
+    def get_hidden_role():
+        return PostStatus.objects.get_by_name('hidden')
+
+    @staticmethod
+    def get_deleted_role():
+        return PostStatus.objects.get_by_name('deleted')
+
     def __str__(self):
         return self.name
     
@@ -84,12 +104,47 @@ class Post(models.Model):
     user = models.ForeignKey('users.User', on_delete=models.CASCADE)
     title = models.CharField(max_length=128)
     content = models.TextField()
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
+    trending_score = models.FloatField(default=0)
+    search_vector = models.GeneratedField(
+        expression=create_search_vector(('title', 'A'), ('content', 'B')),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.title} - {self.team.symbol}' 
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trending_score'], name='post_trending_score_idx'),
+            models.Index(fields=['team', '-trending_score'], name='post_team_trending_score_idx'),
+            models.Index(fields=['-created_at', '-id'], name='post_created_at_idx'),
+            models.Index(fields=['team', '-created_at', '-id'], name='post_team_created_at_idx'),
+            GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ]
     
+class PostInteractionBucket(models.Model):
+    '''Interactions with a post within an hour, used to rank posts over a rolling window'''
+    id = models.BigAutoField(primary_key=True)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    hour = models.DateTimeField()
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
+    replies_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.post_id} - {self.hour}'
+
+    class Meta:
+        unique_together = ['post', 'hour']
+        indexes = [
+            models.Index(fields=['hour'], name='postinteractionbucket_hour_idx'),
+        ]
+
 class PostHide(models.Model):
     id = models.UUIDField(
         primary_key=True, 
@@ -124,13 +179,15 @@ class PostCommentStatus(models.Model):
     id = models.SmallAutoField(primary_key=True)
     name = models.CharField(max_length=128)
 
+    objects = LookupTableManager()
+
     @staticmethod
     def get_created_role():
-        return PostCommentStatus.objects.get(name='created')
+        return PostCommentStatus.objects.get_by_name('created')
     
     @staticmethod
     def get_deleted_role():
-        return PostCommentStatus.objects.get(name='deleted')
+        return PostCommentStatus.objects.get_by_name('deleted')
 
     def __str__(self):
         return self.name
@@ -157,12 +214,25 @@ class PostComment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     user = models.ForeignKey('users.User', on_delete=models.CASCADE)
     content = models.TextField()
+    likes_count = models.IntegerField(default=0)
+    replies_count = models.IntegerField(default=0)
+    search_vector = models.GeneratedField(
+        expression=create_search_vector(('content', 'A')),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.id}'
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id'], name='comment_post_created_at_idx'),
+            GinIndex(fields=['search_vector'], name='comment_search_vector_idx'),
+        ]
+
 class PostCommentHide(models.Model):
     '''This model is used to hide a post comment'''
     id = models.UUIDField(
@@ -198,13 +268,15 @@ class PostCommentReplyStatus(models.Model):
     id = models.SmallAutoField(primary_key=True)
     name = models.CharField(max_length=128)
 
+    objects = LookupTableManager()
+
     @staticmethod
     def get_created_role():
-        return PostCommentReplyStatus.objects.get(name='created')
+        return PostCommentReplyStatus.objects.get_by_name('created')
     
     @staticmethod
     def get_deleted_role():
-        return PostCommentReplyStatus.objects.get(name='deleted')
+        return PostCommentReplyStatus.objects.get_by_name('deleted')
 
     def __str__(self):
         return self.name
@@ -228,6 +300,11 @@ class PostCommentReply(models.Model):
 
     def __str__(self):
         return f'{self.id}'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post_comment', '-created_at', '-id'], name='reply_comment_created_at_idx'),
+        ]
     
 class PostCommentReplyHide(models.Model):
     id = models.UUIDField(
@@ -64,7 +64,7 @@ class TeamSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
         return serializer.data
     
     def get_likes_count(self, obj):
-        return obj.teamlike_set.count()
+        return obj.likes_count
     
     def get_liked(self, obj):
         return obj.liked
@@ -1,18 +1,23 @@
-from datetime import timedelta, datetime
+from datetime import timedelta, datetime, timezone
 import re
 from typing import List
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Q, Prefetch, Count, Exists, OuterRef
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Prefetch, Exists, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Extract, Greatest, Log
 
 from nba_api.stats.endpoints.franchisehistory import FranchiseHistory
 from nba_api.stats.endpoints.leaguestandingsv3 import LeagueStandingsV3
 from nba_api.stats.endpoints.scoreboardv2 import ScoreboardV2
 import pytz
 
+from api.utils import count_subquery
 from games.models import Game, LineScore
 from games.serializers import GameSerializer, LineScoreSerializer, PlayerCareerStatisticsSerializer, PlayerStatisticsSerializer
 from games.services import combine_games_and_linescores
+from notification.tasks import send_notification
 from players.models import Player, PlayerCareerStatistics, PlayerStatistics
 from players.serializers import PlayerSerializer
 from teams.forms import TeamPostCommentForm, TeamPostForm
@@ -23,6 +28,7 @@ from teams.models import (
     PostCommentReply,
     PostCommentStatus,
     PostCommentStatusDisplayName, 
+    PostInteractionBucket,
     PostLike,
     PostStatus, 
     PostStatusDisplayName, 
@@ -34,8 +40,25 @@ from teams.serializers import PostCommentStatusSerializer, PostStatusSerializer,
 from teams.utils import calculate_time
 from users.serializers import PostCommentReplySerializer, PostCommentSerializer, PostCommentUpdateSerializer, PostSerializer, PostUpdateSerializer
 from users.services import create_post_queryset_without_prefetch_for_user
+from users.utils import invalidate_chat_identity_cache
 
 
+TEAM_DATA_CACHE_TIMEOUT = 60
+POST_LIST_CACHE_TIMEOUT = 30
+POST_DATA_CACHE_TIMEOUT = 60
+
+TRENDING_LIKE_WEIGHT = 1
+TRENDING_COMMENT_WEIGHT = 2
+TRENDING_REPLY_WEIGHT = 1
+# Every TRENDING_DECAY_SECONDS a post needs 10 times more interactions to keep its rank
+TRENDING_DECAY_SECONDS = 45000
+
+TOP_POSTS_WINDOW_HOURS = 24
+TOP_POSTS_CACHE_KEY = 'today_top_5_popular_posts'
+TOP_POSTS_CACHE_TIMEOUT = 60 * 10
+# Buckets are kept a while past the window in case it gets widened
+POST_INTERACTION_BUCKET_RETENTION_HOURS = 48
+
 comment_queryset_allowed_order_by_fields = [
     'created_at',
     '-created_at',
@@ -540,20 +563,12 @@ def create_comment_queryset_without_prefetch_for_post(
         sort_by = list(new_unique_sort_by)
 
     if sort_by_likes_count:
-        queryset = queryset.annotate(
-            likes_count=Count('postcommentlike')
-        )
-
         if sort_by_likes_count_direction:
             sort_by.append('likes_count')
         else:
             sort_by.append('-likes_count')
 
     if sort_by_replies_count:
-        queryset = queryset.annotate(
-            replies_count=Count('postcommentreply')
-        )
-
         if sort_by_replies_count_direction:
             sort_by.append('replies_count')
         else:
@@ -570,24 +585,121 @@ def create_comment_queryset_without_prefetch_for_post(
     return queryset.exclude(status__name='deleted')
 
 
+def update_teams_likes_count(team_ids):
+    '''
+    Recount the likes of the given teams from the TeamLike table. Used after bulk changes
+    to TeamLike, where incrementing the counters one by one isn't practical.
+    '''
+
+    Team.objects.filter(id__in=set(team_ids)).update(
+        likes_count=count_subquery(TeamLike, 'team')
+    )
+
+
+def get_post_trending_score_expression():
+    '''
+    Return the expression computing the trending score of a post, in the manner of the
+    "hot" ranking: the log of the weighted likes, comments and replies plus the creation
+    time. Newer posts get a higher base score, so older posts decay relative to them
+    without their scores ever being recomputed, and the score only changes on interaction.
+    '''
+
+    replies_count = Coalesce(
+        Subquery(
+            PostComment.objects.filter(
+                post=OuterRef('pk')
+            ).order_by().values('post').annotate(total=Sum('replies_count')).values('total')
+        ),
+        0
+    )
+    interactions = (
+        F('likes_count') * TRENDING_LIKE_WEIGHT
+        + F('comments_count') * TRENDING_COMMENT_WEIGHT
+        + replies_count * TRENDING_REPLY_WEIGHT
+    )
+
+    return ExpressionWrapper(
+        Log(10, Greatest(interactions, 1))
+        + Extract('created_at', 'epoch', tzinfo=timezone.utc) / TRENDING_DECAY_SECONDS,
+        output_field=FloatField()
+    )
+
+def update_post_trending_score(post_id):
+    Post.objects.filter(id=post_id).update(
+        trending_score=get_post_trending_score_expression()
+    )
+
+def get_current_hour():
+    return datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def record_post_interaction(post_id, likes_count=0, comments_count=0, replies_count=0):
+    '''
+    Add the interactions to the bucket of the post for the current hour. Negative values
+    are used to take back an interaction, e.g. when a post is unliked.
+    '''
+
+    bucket, _ = PostInteractionBucket.objects.get_or_create(
+        post_id=post_id,
+        hour=get_current_hour()
+    )
+    PostInteractionBucket.objects.filter(id=bucket.id).update(
+        likes_count=F('likes_count') + likes_count,
+        comments_count=F('comments_count') + comments_count,
+        replies_count=F('replies_count') + replies_count
+    )
+
+def notify_user_in_background(template_name, user_id, actor, data, group_key):
+    '''
+    Send a notification about an interaction of `actor` once the current transaction commits,
+    unless the actor is the user being notified.
+    '''
+    if user_id == actor.id:
+        return
+
+    data = {'actor': actor.username, **data}
+    transaction.on_commit(
+        lambda: send_notification.delay(template_name, [user_id], data, group_key, actor.id)
+    )
+
+
 class TeamService:
     @staticmethod
-    def get_team(request, pk):
-        team = Team.objects.prefetch_related(
+    def get_team(pk):
+        return Team.objects.prefetch_related(
             Prefetch(
                 'teamname_set',
                 queryset=TeamName.objects.select_related(
                     'language'
                 ).only('name', 'language__name'),
             )
-        ).filter(id=pk)
+        ).filter(id=pk).first()
 
-        if request.user.is_authenticated:
-            team = team.annotate(
-                liked=Exists(TeamLike.objects.filter(user=request.user, team=OuterRef('pk')))
-            )
+    @staticmethod
+    def get_team_data(pk):
+        '''
+        Return the serialized team along with its season stats. The payload doesn't depend
+        on the requesting user, so it is shared by everyone through the cache, and only
+        "liked" has to be added per request.
+        '''
+
+        cache_key = f'team_{pk}_data'
+        data = cache.get(cache_key)
+        if data is not None:
+            return data
+
+        team = TeamService.get_team(pk)
+        if not team:
+            return None
 
-        return team.first()
+        data = dict(TeamSerializerService.serialize_team(team).data)
+        data['stats'] = get_team_season_stats(settings.SEASON_YEAR, pk)
+        cache.set(cache_key, data, TEAM_DATA_CACHE_TIMEOUT)
+
+        return data
+
+    @staticmethod
+    def check_if_user_likes_team(user, pk):
+        return TeamLike.objects.filter(user=user, team__id=pk).exists()
 
     @staticmethod
     def get_team_with_user_like(user):
@@ -659,22 +771,30 @@ class TeamService:
 
             team_ids = [team['id'] for team in data]
             teams = Team.objects.filter(id__in=team_ids)
+            previous_team_ids = list(
+                TeamLike.objects.filter(user=user).values_list('team__id', flat=True)
+            )
 
             TeamLike.objects.filter(user=user).delete()
             TeamLike.objects.bulk_create([
                 TeamLike(user=user, team=team) if favorite_team_id != team.id else TeamLike(user=user, team=team, favorite=True)
                 for team in teams
             ])
+            update_teams_likes_count(previous_team_ids + [team.id for team in teams])
+            invalidate_chat_identity_cache(user.id)
 
             return True, None
     
     @staticmethod
     def add_user_favorite_team(request, team_id):
         user = request.user
-        TeamLike.objects.get_or_create(
-            user=user, 
-            team=Team.objects.get(id=team_id)
-        )
+        with transaction.atomic():
+            _, created = TeamLike.objects.get_or_create(
+                user=user, 
+                team=Team.objects.get(id=team_id)
+            )
+            if created:
+                Team.objects.filter(id=team_id).update(likes_count=F('likes_count') + 1)
         
         return Team.objects.filter(id=team_id).annotate(
             liked=Exists(TeamLike.objects.filter(user=user, team=OuterRef('pk')))
@@ -683,10 +803,11 @@ class TeamService:
     @staticmethod
     def remove_user_favorite_team(request, team_id):
         user = request.user
-        try:
-            TeamLike.objects.get(user=user, team__id=team_id).delete()
-        except TeamLike.DoesNotExist:
-            pass
+        with transaction.atomic():
+            deleted, _ = TeamLike.objects.filter(user=user, team__id=team_id).delete()
+            if deleted:
+                Team.objects.filter(id=team_id).update(likes_count=F('likes_count') - 1)
+                invalidate_chat_identity_cache(user.id)
         
         return Team.objects.filter(id=team_id).annotate(
             liked=Exists(TeamLike.objects.filter(user=user, team=OuterRef('pk')))
@@ -695,14 +816,10 @@ class TeamService:
     
 class TeamSerializerService:
     @staticmethod
-    def serialize_team(request, team: Team):
-        fields_exclude = []
-        if not request.user.is_authenticated:
-            fields_exclude.append('liked')
-
+    def serialize_team(team: Team):
         return TeamSerializer(
             team,
-            fields_exclude=fields_exclude,
+            fields_exclude=['liked'],
             context={
                 'teamname': {
                     'fields': ['name', 'language'],
@@ -916,14 +1033,17 @@ class PostService:
         except Team.DoesNotExist:
             return False, 'Invalid team_id'
         
-        Post.objects.create(
-            user=user,
-            team=team,
-            status=data['status'],
-            title=data['title'],
-            content=data['content']
-        )
+        with transaction.atomic():
+            post = Post.objects.create(
+                user=user,
+                team=team,
+                status=data['status'],
+                title=data['title'],
+                content=data['content']
+            )
+            update_post_trending_score(post.id)
 
+        PostService.invalidate_team_posts(team.id)
         return True, None
     
     @staticmethod
@@ -940,7 +1060,9 @@ class PostService:
                 'team__id', 
                 'team__symbol', 
                 'status__id', 
-                'status__name'
+                'status__name',
+                'likes_count',
+                'comments_count'
             ],
             team__id=pk
         ).select_related(
@@ -948,7 +1070,6 @@ class PostService:
             'team',
             'status'
         ).prefetch_related(
-            'postlike_set',
             Prefetch(
                 'status__poststatusdisplayname_set',
                 queryset=PostStatusDisplayName.objects.select_related(
@@ -957,22 +1078,15 @@ class PostService:
             ),
         )
 
-        if request.user.is_authenticated:
-            posts = posts.annotate(
-                liked=Exists(PostLike.objects.filter(user=request.user, post=OuterRef('pk')))
-            )
-
         return posts
 
     @staticmethod
-    def get_post(request, pk, post_id):
+    def get_post(pk, post_id):
         post = Post.objects.select_related(
             'user',
             'team',
             'status'
         ).prefetch_related(
-            'postlike_set',
-            'postcomment_set',
             Prefetch(
                 'status__poststatusdisplayname_set',
                 queryset=PostStatusDisplayName.objects.select_related(
@@ -983,6 +1097,8 @@ class PostService:
             'id', 
             'title', 
             'content', 
+            'likes_count',
+            'comments_count',
             'created_at', 
             'updated_at', 
             'user__id', 
@@ -994,14 +1110,70 @@ class PostService:
         ).filter(
             team__id=pk,
             id=post_id
-        )
+        ).first()
 
-        if request.user.is_authenticated:
-            post = post.annotate(
-                liked=Exists(PostLike.objects.filter(user=request.user, post=OuterRef('pk')))
-            )
+    @staticmethod
+    def get_post_data_cache_key(pk, post_id):
+        return f'team_{pk}_post_{post_id}_data'
 
-        return post.first()
+    @staticmethod
+    def get_post_data(pk, post_id):
+        '''
+        Return the serialized post as seen by an anonymous user. The payload is shared by
+        everyone through the cache, and "liked" is added per request on top of it.
+        '''
+
+        cache_key = PostService.get_post_data_cache_key(pk, post_id)
+        data = cache.get(cache_key)
+        if data is not None:
+            return data
+
+        post = PostService.get_post(pk, post_id)
+        if not post:
+            return None
+
+        data = dict(PostSerializerService.serialize_post_without_liked(post).data)
+        cache.set(cache_key, data, POST_DATA_CACHE_TIMEOUT)
+
+        return data
+
+    @staticmethod
+    def invalidate_post_data(pk, post_id):
+        cache.delete(PostService.get_post_data_cache_key(pk, post_id))
+        PostService.invalidate_team_posts(pk)
+
+    @staticmethod
+    def get_team_posts_cache_version_key(pk):
+        return f'team_{pk}_posts_version'
+
+    @staticmethod
+    def get_team_posts_cache_prefix(pk):
+        '''
+        Return the prefix of the cache keys of the post list pages of the team. The pages are
+        keyed by URL, so they are invalidated together by moving to a new version.
+        '''
+
+        version = cache.get_or_set(PostService.get_team_posts_cache_version_key(pk), 1, None)
+        return f'team_{pk}_posts_{version}'
+
+    @staticmethod
+    def invalidate_team_posts(pk):
+        version_key = PostService.get_team_posts_cache_version_key(pk)
+        cache.add(version_key, 1, None)
+        cache.incr(version_key)
+
+    @staticmethod
+    def get_liked_post_ids(user, post_ids):
+        '''
+        Return the ids, as strings, of the posts among `post_ids` that the user liked.
+        '''
+
+        liked_post_ids = PostLike.objects.filter(
+            user=user,
+            post__id__in=post_ids
+        ).values_list('post__id', flat=True)
+
+        return {str(post_id) for post_id in liked_post_ids}
 
     @staticmethod
     def get_post_after_creating_like(request, team_id, post_id):
@@ -1009,7 +1181,8 @@ class PostService:
             team__id=team_id,
             id=post_id
         ).only(
-            'id'
+            'id',
+            'likes_count'
         )
 
         if request.user.is_authenticated:
@@ -1019,6 +1192,34 @@ class PostService:
 
         return post.first()
 
+    @staticmethod
+    def like_post(user, post):
+        with transaction.atomic():
+            _, created = PostLike.objects.get_or_create(
+                user=user,
+                post=post
+            )
+            if created:
+                Post.objects.filter(id=post.id).update(likes_count=F('likes_count') + 1)
+                update_post_trending_score(post.id)
+                record_post_interaction(post.id, likes_count=1)
+                notify_user_in_background(
+                    'post_like',
+                    post.user_id,
+                    user,
+                    {'team_id': post.team_id, 'post_id': str(post.id), 'post_title': post.title},
+                    f'post_like:{post.id}'
+                )
+
+    @staticmethod
+    def unlike_post(user, post_id):
+        with transaction.atomic():
+            deleted, _ = PostLike.objects.filter(user=user, post__id=post_id).delete()
+            if deleted:
+                Post.objects.filter(id=post_id).update(likes_count=F('likes_count') - 1)
+                update_post_trending_score(post_id)
+                record_post_interaction(post_id, likes_count=-1)
+
     @staticmethod
     def get_comments(request, pk, post_id):
         query = create_comment_queryset_without_prefetch_for_post(
@@ -1031,22 +1232,15 @@ class PostService:
                 'user__id',
                 'user__username',
                 'status__id',
-                'status__name'
+                'status__name',
+                'likes_count',
+                'replies_count'
             ],
             post__team__id=pk,
             post__id=post_id
         ).select_related(
             'user',
             'status'
-        ).prefetch_related(
-            Prefetch(
-                'postcommentlike_set',
-                queryset=PostCommentLike.objects.only('id')
-            ),
-            Prefetch(
-                'postcommentreply_set',
-                queryset=PostCommentReply.objects.only('id')
-            ),
         )
 
         if request.user.is_authenticated:
@@ -1061,18 +1255,11 @@ class PostService:
         comment = PostComment.objects.select_related(
             'user',
             'status'
-        ).prefetch_related(
-            Prefetch(
-                'postcommentlike_set',
-                queryset=PostCommentLike.objects.only('id')
-            ),
-            Prefetch(
-                'postcommentreply_set',
-                queryset=PostCommentReply.objects.only('id')
-            ),
         ).only(
             'id',
             'content',
+            'likes_count',
+            'replies_count',
             'created_at',
             'updated_at',
             'user__id',
@@ -1093,21 +1280,14 @@ class PostService:
         return comment.first()
     
     @staticmethod
-    def get_10_popular_posts(request):
-        posts = Post.objects.annotate(
-            likes_count=Count('postlike'),
-        ).order_by(
-            '-likes_count'
+    def get_10_popular_posts():
+        posts = Post.objects.order_by(
+            '-trending_score'
         ).select_related(
             'user',
             'team',
             'status'
         ).prefetch_related(
-            Prefetch(
-                'postlike_set',
-                queryset=PostLike.objects.all()
-            ),
-            'postcomment_set',
             Prefetch(
                 'status__poststatusdisplayname_set',
                 queryset=PostStatusDisplayName.objects.select_related(
@@ -1124,34 +1304,24 @@ class PostService:
             'team__id', 
             'team__symbol', 
             'status__id', 
-            'status__name'
+            'status__name',
+            'likes_count',
+            'comments_count'
         )
-        # ).filter(
-        #     created_at__gte=datetime.now() - timedelta(hours=24)
-        # )
-
-        if request.user.is_authenticated:
-            posts = posts.annotate(
-                liked=Exists(PostLike.objects.filter(user=request.user, post=OuterRef('pk')))
-            )
 
         return posts[:10]
     
     @staticmethod
-    def get_team_10_popular_posts(request, pk):
-        posts = Post.objects.annotate(
-            likes_count=Count('postlike'),
-        ).filter(
+    def get_team_10_popular_posts(pk):
+        posts = Post.objects.filter(
             team__id=pk
         ).order_by(
-            '-likes_count'
+            '-trending_score'
         ).select_related(
             'user',
             'team',
             'status'
         ).prefetch_related(
-            'postlike_set',
-            'postcomment_set',
             Prefetch(
                 'status__poststatusdisplayname_set',
                 queryset=PostStatusDisplayName.objects.select_related(
@@ -1168,24 +1338,101 @@ class PostService:
             'team__id', 
             'team__symbol', 
             'status__id', 
-            'status__name'
+            'status__name',
+            'likes_count',
+            'comments_count'
         )
-        # ).filter(
-        #     created_at__gte=datetime.now() - timedelta(hours=24)
-        # )
-
-        if request.user.is_authenticated:
-            posts = posts.annotate(
-                liked=Exists(PostLike.objects.filter(user=request.user, post=OuterRef('pk')))
-            )
 
         return posts[:10]
+
+    @staticmethod
+    def get_today_top_5_popular_posts():
+        '''
+        Return the 5 posts with the most weighted interactions over the last
+        TOP_POSTS_WINDOW_HOURS hours, summed from the hourly interaction buckets.
+        '''
+
+        since = get_current_hour() - timedelta(hours=TOP_POSTS_WINDOW_HOURS - 1)
+        top_post_ids = list(
+            PostInteractionBucket.objects.filter(
+                hour__gte=since
+            ).exclude(
+                post__status=PostStatus.get_deleted_role()
+            ).values('post').annotate(
+                score=Sum(
+                    F('likes_count') * TRENDING_LIKE_WEIGHT
+                    + F('comments_count') * TRENDING_COMMENT_WEIGHT
+                    + F('replies_count') * TRENDING_REPLY_WEIGHT
+                )
+            ).filter(
+                score__gt=0
+            ).order_by('-score').values_list('post', flat=True)[:5]
+        )
+
+        posts = Post.objects.filter(
+            id__in=top_post_ids
+        ).select_related(
+            'user',
+            'team',
+            'status'
+        ).prefetch_related(
+            Prefetch(
+                'status__poststatusdisplayname_set',
+                queryset=PostStatusDisplayName.objects.select_related(
+                    'language'
+                )
+            ),
+        ).only(
+            'id', 
+            'title', 
+            'created_at', 
+            'updated_at', 
+            'user__id', 
+            'user__username', 
+            'team__id', 
+            'team__symbol', 
+            'status__id', 
+            'status__name',
+            'likes_count',
+            'comments_count'
+        )
+
+        posts_by_id = {post.id: post for post in posts}
+        return [posts_by_id[post_id] for post_id in top_post_ids if post_id in posts_by_id]
+
+    @staticmethod
+    def update_today_top_5_popular_posts_data():
+        posts = PostService.get_today_top_5_popular_posts()
+        data = list(PostSerializerService.serialize_posts_without_liked(posts).data)
+        cache.set(TOP_POSTS_CACHE_KEY, data, TOP_POSTS_CACHE_TIMEOUT)
+
+        return data
+
+    @staticmethod
+    def get_today_top_5_popular_posts_data():
+        '''
+        Return the serialized top 5 posts, as seen by an anonymous user. The list is
+        refreshed in the background, so this is normally a single cache read.
+        '''
+
+        data = cache.get(TOP_POSTS_CACHE_KEY)
+        if data is None:
+            data = PostService.update_today_top_5_popular_posts_data()
+
+        return data
+
+    @staticmethod
+    def delete_expired_post_interaction_buckets():
+        return PostInteractionBucket.objects.filter(
+            hour__lt=get_current_hour() - timedelta(hours=POST_INTERACTION_BUCKET_RETENTION_HOURS)
+        ).delete()
     
     @staticmethod
     def update_post(request, post):
         serializer = PostUpdateSerializer(post, data=request.data, partial=True) 
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        PostService.invalidate_post_data(post.team_id, post.id)
 
     @staticmethod
     def delete_post(user_id, post_id):
@@ -1194,8 +1441,9 @@ class PostService:
         if not post:
             return
         
-        post.status = PostStatus.objects.get(name='deleted')
+        post.status = PostStatus.get_deleted_role()
         post.save()
+        PostService.invalidate_post_data(post.team_id, post.id)
 
     @staticmethod
     def create_comment(request, post):
@@ -1206,12 +1454,23 @@ class PostService:
         user = request.user
         data = form.cleaned_data
 
-        PostComment.objects.create(
-            user=user,
-            post=post,
-            status=PostCommentStatus.get_created_role(),
-            content=data['content']
-        )
+        with transaction.atomic():
+            PostComment.objects.create(
+                user=user,
+                post=post,
+                status=PostCommentStatus.get_created_role(),
+                content=data['content']
+            )
+            Post.objects.filter(id=post.id).update(comments_count=F('comments_count') + 1)
+            update_post_trending_score(post.id)
+            record_post_interaction(post.id, comments_count=1)
+            notify_user_in_background(
+                'post_comment',
+                post.user_id,
+                user,
+                {'team_id': post.team_id, 'post_id': str(post.id), 'post_title': post.title},
+                f'post_comment:{post.id}'
+            )
 
         return True, None
     
@@ -1234,7 +1493,7 @@ class PostService:
         if not comment:
             return
         
-        comment.status = PostCommentStatus.objects.get(name='deleted')
+        comment.status = PostCommentStatus.get_deleted_role()
         comment.save()
     
     @staticmethod
@@ -1253,7 +1512,7 @@ class PostService:
             post__team__id=pk,
             post__id=post_id,
             id=comment_id
-        ).only('id')
+        ).only('id', 'likes_count')
 
         if request.user.is_authenticated:
             comment = comment.annotate(
@@ -1265,21 +1524,30 @@ class PostService:
     @staticmethod
     def like_comment(request, pk, post_id, comment):
         user = request.user
-        PostCommentLike.objects.get_or_create(
-            user=user,
-            post_comment=comment
-        )
+        with transaction.atomic():
+            _, created = PostCommentLike.objects.get_or_create(
+                user=user,
+                post_comment=comment
+            )
+            if created:
+                PostComment.objects.filter(id=comment.id).update(likes_count=F('likes_count') + 1)
+                notify_user_in_background(
+                    'comment_like',
+                    comment.user_id,
+                    user,
+                    {'team_id': pk, 'post_id': str(post_id), 'comment_id': str(comment.id)},
+                    f'comment_like:{comment.id}'
+                )
 
         return PostService.get_comment_with_likes_only(request, pk, post_id, comment.id)
     
     @staticmethod
     def unlike_comment(request, pk, post_id, comment_id):
         user = request.user
-        try:
-            like = PostCommentLike.objects.get(user=user, post_comment__id=comment_id)
-            like.delete()
-        except PostCommentLike.DoesNotExist:
-            pass
+        with transaction.atomic():
+            deleted, _ = PostCommentLike.objects.filter(user=user, post_comment__id=comment_id).delete()
+            if deleted:
+                PostComment.objects.filter(id=comment_id).update(likes_count=F('likes_count') - 1)
 
         return PostService.get_comment_with_likes_only(request, pk, post_id, comment_id)
     
@@ -1292,11 +1560,22 @@ class PostService:
         user = request.user
         data = form.cleaned_data
 
-        PostCommentReply.objects.create(
-            user=user,
-            post_comment=comment,
-            content=data['content']
-        )
+        with transaction.atomic():
+            PostCommentReply.objects.create(
+                user=user,
+                post_comment=comment,
+                content=data['content']
+            )
+            PostComment.objects.filter(id=comment.id).update(replies_count=F('replies_count') + 1)
+            update_post_trending_score(comment.post_id)
+            record_post_interaction(comment.post_id, replies_count=1)
+            notify_user_in_background(
+                'comment_reply',
+                comment.user_id,
+                user,
+                {'team_id': comment.post.team_id, 'post_id': str(comment.post_id), 'comment_id': str(comment.id)},
+                f'comment_reply:{comment.id}'
+            )
 
         return True, None
     
@@ -1400,14 +1679,29 @@ class PostSerializerService:
         )
     
     @staticmethod
-    def serialize_post(request, post):
-        fields_exclude = []
+    def add_liked_to_serialized_posts(request, posts_data):
+        '''
+        Add "liked" to already serialized posts with a single lookup for the given posts.
+        Anonymous users don't get the field at all.
+        '''
+
         if not request.user.is_authenticated:
-            fields_exclude.append('liked')
+            return posts_data
+
+        liked_post_ids = PostService.get_liked_post_ids(
+            request.user,
+            [post['id'] for post in posts_data]
+        )
+        for post in posts_data:
+            post['liked'] = str(post['id']) in liked_post_ids
 
+        return posts_data
+
+    @staticmethod
+    def serialize_post_without_liked(post):
         return PostSerializer(
             post,
-            fields_exclude=fields_exclude,
+            fields_exclude=['liked'],
             context={
                 'team': {
                     'fields': ['id', 'symbol']
@@ -1423,7 +1717,7 @@ class PostSerializerService:
                 }
             }
         )
-    
+
     @staticmethod
     def serialize_post_after_like(request, post):
         fields = ['id', 'likes_count']
@@ -1,8 +1,48 @@
 from celery import shared_task
 
-from players.services import update_players
+import logging
+
+from api.utils import reconcile_counter
+from players.services import invalidate_autocomplete_index, update_players
+from teams.models import Post, PostComment, PostCommentLike, PostCommentReply, PostLike, Team, TeamLike
+from teams.services import PostService
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
 def update_teams_roster():
-    update_players()
\ No newline at end of file
+    update_players()
+    invalidate_autocomplete_index()
+
+
+@shared_task
+def reconcile_like_and_comment_counters():
+    '''
+    Recount the denormalized like, comment and reply counters of teams, posts and comments,
+    fixing any drift left by failed or concurrent writes.
+    '''
+
+    fixed = {
+        'team.likes_count': reconcile_counter(Team.objects.all(), 'likes_count', TeamLike, 'team'),
+        'post.likes_count': reconcile_counter(Post.objects.all(), 'likes_count', PostLike, 'post'),
+        'post.comments_count': reconcile_counter(Post.objects.all(), 'comments_count', PostComment, 'post'),
+        'postcomment.likes_count': reconcile_counter(
+            PostComment.objects.all(), 'likes_count', PostCommentLike, 'post_comment'
+        ),
+        'postcomment.replies_count': reconcile_counter(
+            PostComment.objects.all(), 'replies_count', PostCommentReply, 'post_comment'
+        ),
+    }
+    logger.info(f'Reconciled counters: {fixed}')
+
+
+@shared_task
+def update_today_top_5_popular_posts():
+    PostService.update_today_top_5_popular_posts_data()
+
+
+@shared_task
+def delete_expired_post_interaction_buckets():
+    deleted, _ = PostService.delete_expired_post_interaction_buckets()
+    logger.info(f'Deleted {deleted} expired post interaction buckets')
@@ -1,3 +1,177 @@
-from django.test import TestCase
+import uuid
+from datetime import datetime, timedelta, timezone
 
-# Create your tests here.
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+
+from teams.models import Post, PostInteractionBucket, PostStatus, Team
+from teams.services import (
+    PostService,
+    get_current_hour,
+    record_post_interaction,
+    update_post_trending_score,
+)
+from teams.views import TeamViewSet
+from users.models import User
+
+from django.core.cache import cache
+
+
+class TeamPostTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='testuser', email='test@test.com')
+        self.liker = User.objects.create(username='testliker', email='liker@test.com')
+        self.team = Team.objects.create(id=1, symbol='TST')
+        self.post = Post.objects.create(
+            title='test title',
+            content='test content',
+            status=PostStatus.objects.get(name='created'),
+            team=self.team,
+            user=self.user
+        )
+
+        cache.delete_many([
+            PostService.get_team_posts_cache_version_key(self.team.id),
+            PostService.get_post_data_cache_key(self.team.id, self.post.id),
+        ])
+
+    def call(self, method, action, user=None, data=None, **kwargs):
+        factory = APIRequestFactory()
+        request = getattr(factory, method)(f'/api/teams/{self.team.id}/posts/', data=data, format='json')
+        if user is not None:
+            force_authenticate(request, user=user)
+
+        return TeamViewSet.as_view({method: action})(request, pk=self.team.id, **kwargs)
+
+
+class TeamPostCacheTestCase(TeamPostTestCase):
+    def get_cached_post(self):
+        list_response = self.call('get', 'get_team_posts')
+        detail_response = self.call('get', 'get_team_post', post_id=self.post.id)
+        self.assertEqual(list_response.status_code, 200)
+        self.assertEqual(detail_response.status_code, 200)
+
+        return list_response.data['results'][0], detail_response.data
+
+    def test_cached_post_is_invalidated_on_edit(self):
+        listed, detail = self.get_cached_post()
+        self.assertEqual(listed['title'], 'test title')
+        self.assertEqual(detail['title'], 'test title')
+
+        response = self.call('patch', 'edit_team_post', self.user, {'title': 'edited title'}, post_id=self.post.id)
+        self.assertEqual(response.status_code, 200)
+
+        listed, detail = self.get_cached_post()
+        self.assertEqual(listed['title'], 'edited title')
+        self.assertEqual(detail['title'], 'edited title')
+
+    def test_cached_post_is_invalidated_on_like(self):
+        listed, detail = self.get_cached_post()
+        self.assertEqual(listed['likes_count'], 0)
+        self.assertEqual(detail['likes_count'], 0)
+
+        response = self.call('post', 'like_post', self.liker, post_id=self.post.id)
+        self.assertEqual(response.status_code, 200)
+
+        listed, detail = self.get_cached_post()
+        self.assertEqual(listed['likes_count'], 1)
+        self.assertEqual(detail['likes_count'], 1)
+
+        # the shared payload carries no "liked", it is added per user
+        self.assertNotIn('liked', detail)
+        response = self.call('get', 'get_team_post', self.liker, post_id=self.post.id)
+        self.assertTrue(response.data['liked'])
+
+
+class TrendingPostTestCase(TeamPostTestCase):
+    def create_post(self, title, created_at=None):
+        post = Post.objects.create(
+            title=title,
+            content='test content',
+            status=PostStatus.objects.get(name='created'),
+            team=self.team,
+            user=self.user
+        )
+        if created_at is not None:
+            Post.objects.filter(id=post.id).update(created_at=created_at)
+
+        update_post_trending_score(post.id)
+        return post
+
+    def like(self, post, count):
+        for i in range(count):
+            name = uuid.uuid4().hex[:16]
+            liker = User.objects.create(username=name, email=f'{name}@test.com')
+            PostService.like_post(liker, post)
+
+    def get_popular_titles(self):
+        return [post.title for post in PostService.get_10_popular_posts()]
+
+    def test_interactions_rank_posts_of_the_same_age(self):
+        Post.objects.all().delete()
+        quiet_post = self.create_post('quiet')
+        liked_post = self.create_post('liked')
+        commented_post = self.create_post('commented')
+
+        self.like(liked_post, 2)
+        Post.objects.filter(id=commented_post.id).update(comments_count=5)
+        update_post_trending_score(commented_post.id)
+
+        self.assertEqual(self.get_popular_titles(), ['commented', 'liked', 'quiet'])
+        self.assertEqual(
+            [post.title for post in PostService.get_team_10_popular_posts(self.team.id)],
+            ['commented', 'liked', 'quiet']
+        )
+
+    def test_older_posts_decay(self):
+        Post.objects.all().delete()
+        old_post = self.create_post('old', datetime.now(timezone.utc) - timedelta(days=2))
+        self.create_post('new')
+
+        # a few likes do not make up for two days
+        self.like(old_post, 3)
+        self.assertEqual(self.get_popular_titles(), ['new', 'old'])
+
+        # but many more interactions do
+        Post.objects.filter(id=old_post.id).update(likes_count=100000)
+        update_post_trending_score(old_post.id)
+        self.assertEqual(self.get_popular_titles(), ['old', 'new'])
+
+
+class TopPostsTestCase(TrendingPostTestCase):
+    def test_top_5_sums_the_buckets_of_the_window(self):
+        Post.objects.all().delete()
+        current_hour = get_current_hour()
+
+        posts = {}
+        for title, buckets in (
+            # (hours ago, likes, comments, replies) of each bucket
+            ('first', [(0, 1, 0, 0), (5, 3, 2, 0)]),
+            ('second', [(1, 2, 1, 1)]),
+            ('third', [(23, 4, 0, 0)]),
+            ('fourth', [(0, 0, 1, 0), (2, 1, 0, 0)]),
+            ('fifth', [(3, 2, 0, 0)]),
+            ('sixth', [(0, 1, 0, 0)]),
+            ('outside window', [(24, 100, 0, 0)]),
+            ('deleted', [(0, 100, 0, 0)]),
+        ):
+            posts[title] = self.create_post(title)
+            for hours_ago, likes_count, comments_count, replies_count in buckets:
+                PostInteractionBucket.objects.create(
+                    post=posts[title],
+                    hour=current_hour - timedelta(hours=hours_ago),
+                    likes_count=likes_count,
+                    comments_count=comments_count,
+                    replies_count=replies_count
+                )
+
+        Post.objects.filter(id=posts['deleted'].id).update(status=PostStatus.get_deleted_role())
+
+        # a like taken back leaves nothing to rank
+        unliked_post = self.create_post('unliked')
+        record_post_interaction(unliked_post.id, likes_count=1)
+        record_post_interaction(unliked_post.id, likes_count=-1)
+
+        self.assertEqual(
+            [post.title for post in PostService.get_today_top_5_popular_posts()],
+            ['first', 'second', 'third', 'fourth', 'fifth']
+        )
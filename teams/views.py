@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 
@@ -8,15 +9,17 @@ from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 from rest_framework.permissions import IsAuthenticated
 
-from api.paginators import CustomPageNumberPagination
+from api.mixins import LazyAuthenticationMixin
+from api.paginators import CustomPageNumberPagination, get_pagination_for_request
+from api.utils import get_request_cache_key
 from teams.models import (
     Post,
     PostComment,
     PostCommentStatus,
-    PostLike, 
     Team,
 )
 from teams.services import (
+    POST_LIST_CACHE_TIMEOUT,
     PostSerializerService,
     PostService,
     TeamPlayerSerializerService,
@@ -25,16 +28,44 @@ from teams.services import (
     TeamService,
     get_all_teams_season_stats, 
     get_team_franchise_history,
-    get_team_season_stats
 )
 
 from users.authentication import CookieJWTAccessAuthentication
 
-from nba_api.stats.endpoints.scoreboardv2 import ScoreboardV2
 
+def paginate_and_serialize_posts_without_liked(request, posts, pagination):
+    '''
+    Paginate the posts and return the response data as seen by an anonymous user, so it
+    can be cached and shared by every user.
+    '''
 
-class TeamViewSet(viewsets.ViewSet):
+    paginated_data = pagination.paginate_queryset(posts, request)
+
+    serializer = PostSerializerService.serialize_posts_without_liked(paginated_data)
+    return pagination.get_paginated_response(serializer.data).data
+
+
+class TeamViewSet(LazyAuthenticationMixin, viewsets.ViewSet):
     authentication_classes = [CookieJWTAccessAuthentication]
+    user_independent_actions = (
+        'retrieve',
+        'list',
+        'get_franchise_history',
+        'get_standings',
+        'get_players',
+        'get_specific_player_career_stats',
+        'get_specific_player_season_stats',
+        'get_specific_player_last_5_games',
+        'get_last_4_games',
+        'get_all_games',
+        'get_post_statuses',
+        'get_post_statuses_for_creation',
+        'get_post_comment_statuses',
+        'get_team_posts',
+        'get_popular_posts',
+        'get_team_popular_posts',
+        'get_team_post',
+    )
 
     def get_permissions(self):
         permission_classes = []
@@ -67,14 +98,12 @@ class TeamViewSet(viewsets.ViewSet):
         return [permission() for permission in permission_classes]
 
     def retrieve(self, request, pk=None):
-        team = TeamService.get_team(request, pk)
-        if not team:
+        data = TeamService.get_team_data(pk)
+        if not data:
             return Response({'error': 'Team not found'}, status=HTTP_404_NOT_FOUND)
 
-        serializer = TeamSerializerService.serialize_team(request, team)
-
-        data = serializer.data
-        data['stats'] = get_team_season_stats(settings.SEASON_YEAR, pk)
+        if request.user.is_authenticated:
+            data['liked'] = TeamService.check_if_user_likes_team(request.user, pk)
 
         return Response(data)
 
@@ -220,18 +249,25 @@ class TeamViewSet(viewsets.ViewSet):
     
     @post_team_post.mapping.get
     def get_team_posts(self, request, pk=None):
-        try:
-            Team.objects.get(id=pk)
-        except Team.DoesNotExist:
-            return Response({'error': 'Team not found'}, status=HTTP_404_NOT_FOUND)
-        
-        posts = PostService.get_team_posts(request, pk)
-
-        pagination = CustomPageNumberPagination()
-        paginated_data = pagination.paginate_queryset(posts, request)
+        cache_key = get_request_cache_key(PostService.get_team_posts_cache_prefix(pk), request)
+        data = cache.get(cache_key)
+
+        if data is None:
+            try:
+                Team.objects.get(id=pk)
+            except Team.DoesNotExist:
+                return Response({'error': 'Team not found'}, status=HTTP_404_NOT_FOUND)
+
+            posts = PostService.get_team_posts(request, pk)
+            data = paginate_and_serialize_posts_without_liked(
+                request,
+                posts,
+                get_pagination_for_request(request)
+            )
+            cache.set(cache_key, data, POST_LIST_CACHE_TIMEOUT)
 
-        serializer = PostSerializerService.serialize_posts(request, paginated_data)
-        return pagination.get_paginated_response(serializer.data)
+        PostSerializerService.add_liked_to_serialized_posts(request, data['results'])
+        return Response(data)
     
     @action(
         detail=False,
@@ -239,13 +275,20 @@ class TeamViewSet(viewsets.ViewSet):
         url_path=r'posts/popular'
     )
     def get_popular_posts(self, request, pk=None):
-        posts = PostService.get_10_popular_posts(request)
-
-        pagination = CustomPageNumberPagination()
-        paginated_data = pagination.paginate_queryset(posts, request)
+        cache_key = get_request_cache_key('popular_posts', request)
+        data = cache.get(cache_key)
+
+        if data is None:
+            posts = PostService.get_10_popular_posts()
+            data = paginate_and_serialize_posts_without_liked(
+                request,
+                posts,
+                CustomPageNumberPagination()
+            )
+            cache.set(cache_key, data, POST_LIST_CACHE_TIMEOUT)
 
-        serializer = PostSerializerService.serialize_posts(request, paginated_data)
-        return pagination.get_paginated_response(serializer.data)
+        PostSerializerService.add_liked_to_serialized_posts(request, data['results'])
+        return Response(data)
     
     @action(
         detail=True,
@@ -253,18 +296,25 @@ class TeamViewSet(viewsets.ViewSet):
         url_path=r'posts/popular'
     )
     def get_team_popular_posts(self, request, pk=None):
-        try:
-            team = Team.objects.get(id=pk)
-        except Team.DoesNotExist:
-            return Response({'error': 'Team not found'}, status=HTTP_404_NOT_FOUND)
-        
-        posts = PostService.get_team_10_popular_posts(request, team)
-
-        pagination = CustomPageNumberPagination()
-        paginated_data = pagination.paginate_queryset(posts, request)
+        cache_key = get_request_cache_key(f'team_{pk}_popular_posts', request)
+        data = cache.get(cache_key)
+
+        if data is None:
+            try:
+                team = Team.objects.get(id=pk)
+            except Team.DoesNotExist:
+                return Response({'error': 'Team not found'}, status=HTTP_404_NOT_FOUND)
+
+            posts = PostService.get_team_10_popular_posts(team)
+            data = paginate_and_serialize_posts_without_liked(
+                request,
+                posts,
+                CustomPageNumberPagination()
+            )
+            cache.set(cache_key, data, POST_LIST_CACHE_TIMEOUT)
 
-        serializer = PostSerializerService.serialize_posts(request, paginated_data)
-        return pagination.get_paginated_response(serializer.data)
+        PostSerializerService.add_liked_to_serialized_posts(request, data['results'])
+        return Response(data)
 
     @action(
         detail=True,
@@ -272,17 +322,12 @@ class TeamViewSet(viewsets.ViewSet):
         url_path=r'posts/(?P<post_id>[^/.]+)'
     )
     def get_team_post(self, request, pk=None, post_id=None):
-        try:
-            Team.objects.get(id=pk)
-        except Team.DoesNotExist:
-            return Response({'error': 'Team not found'}, status=HTTP_404_NOT_FOUND)
-
-        post = PostService.get_post(request, pk, post_id)
-        if not post:
+        data = PostService.get_post_data(pk, post_id)
+        if not data:
             return Response({'error': 'Post not found'}, status=HTTP_404_NOT_FOUND)
 
-        serializer = PostSerializerService.serialize_post(request, post)
-        return Response(serializer.data)
+        PostSerializerService.add_liked_to_serialized_posts(request, [data])
+        return Response(data)
     
     @get_team_post.mapping.patch
     def edit_team_post(self, request, pk=None, post_id=None):
@@ -314,11 +359,8 @@ class TeamViewSet(viewsets.ViewSet):
         except Post.DoesNotExist:
             return Response({'error': 'Post not found'}, status=HTTP_404_NOT_FOUND)
         
-        user = request.user
-        PostLike.objects.get_or_create(
-            user=user,
-            post=post
-        )
+        PostService.like_post(request.user, post)
+        PostService.invalidate_post_data(pk, post_id)
 
         post = PostService.get_post_after_creating_like(request, pk, post_id)
         serializer = PostSerializerService.serialize_post_after_like(request, post)
@@ -326,12 +368,8 @@ class TeamViewSet(viewsets.ViewSet):
     
     @like_post.mapping.delete
     def unlike_post(self, request, pk=None, post_id=None):
-        user = request.user
-        try:
-            like = PostLike.objects.get(user=user, post__id=post_id)
-            like.delete()
-        except PostLike.DoesNotExist:
-            pass
+        PostService.unlike_post(request.user, post_id)
+        PostService.invalidate_post_data(pk, post_id)
 
         post = PostService.get_post_after_creating_like(request, pk, post_id)
         serializer = PostSerializerService.serialize_post_after_like(request, post)
@@ -356,7 +394,7 @@ class TeamViewSet(viewsets.ViewSet):
         
         comments = PostService.get_comments(request, pk, post_id)
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request)
         paginated_data = pagination.paginate_queryset(comments, request)
 
         serializer = PostSerializerService.serialize_comments_for_post(request, paginated_data)
@@ -494,7 +532,7 @@ class TeamViewSet(viewsets.ViewSet):
     )
     def reply_comment(self, request, pk=None, post_id=None, comment_id=None):
         try:
-            comment = PostComment.objects.get(
+            comment = PostComment.objects.select_related('post').get(
                 post__id=post_id, 
                 id=comment_id, 
                 post__team__id=pk
@@ -524,21 +562,21 @@ class TeamViewSet(viewsets.ViewSet):
         
         replies = PostService.get_comment_replies(comment_id)
 
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request)
         paginated_data = pagination.paginate_queryset(replies, request)
 
         serializer = PostSerializerService.serialize_comment_replies(paginated_data)
         return pagination.get_paginated_response(serializer.data)
 
 
-class TeamsPostViewSet(viewsets.ViewSet):
+class TeamsPostViewSet(LazyAuthenticationMixin, viewsets.ViewSet):
+    user_independent_actions = (
+        'get_today_top_5_popular_posts',
+    )
+
     @action(detail=False, methods=['get'], url_path='top-5')
     def get_today_top_5_popular_posts(self, request):
-        scoreboard = ScoreboardV2(
-            game_date='2024-10-22',
-            league_id='00',
-            day_offset=0
-        ).get_dict()
-
-        return Response(scoreboard)
+        data = PostService.get_today_top_5_popular_posts_data()
+        PostSerializerService.add_liked_to_serialized_posts(request, data)
+        return Response(data)
     
\ No newline at end of file
@@ -1,6 +1,7 @@
 from typing import Tuple
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework.request import Request
@@ -9,7 +10,8 @@ from rest_framework_simplejwt.tokens import Token, AuthUser
 from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 
-from users.models import User
+from users.models import Role, User
+from users.utils import get_auth_user_cache_key
 
 
 class CookieJWTAccessAuthentication(JWTAuthentication):
@@ -32,14 +34,21 @@ class CookieJWTAccessAuthentication(JWTAuthentication):
         except KeyError:
             raise InvalidToken(_("Token contained no recognizable user identification"))
         
-        try:
-            user = User.objects.select_related('role').get(id=user_id)
-        except User.DoesNotExist:
-            raise AuthenticationFailed(_("User not found"), code='user_not_found')
+        cache_key = get_auth_user_cache_key(user_id)
+        user = cache.get(cache_key)
+        if user is None:
+            try:
+                user = User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code='user_not_found')
+
+            cache.set(cache_key, user, settings.AUTH_USER_CACHE_TIMEOUT)
         
-        if user.role.name in ['deactivated', 'banned']:
+        if user.role_id in Role.get_inactive_role_ids():
             raise AuthenticationFailed(_("User is not active"), code='user_inactive')
         
+        # Roles are served from the process-wide lookup cache instead of a join
+        user.role = Role.objects.get_by_id(user.role_id)
         return user
     
 
@@ -64,10 +73,11 @@ class CookieJWTAdminAccessAuthentication(JWTAuthentication):
             raise InvalidToken(_("Token contained no recognizable user identification"))
         
         try:
-            user = User.objects.select_related('role').get(id=user_id)
+            user = User.objects.get(id=user_id)
         except User.DoesNotExist:
             raise AuthenticationFailed(_("User not found"), code='user_not_found')
         
+        user.role = Role.objects.get_by_id(user.role_id)
         if user.role.weight >= 3:
             raise AuthenticationFailed(_("User is not an admin"), code='user_not_admin')
         
@@ -95,11 +105,13 @@ class CookieJWTRefreshAuthentication(JWTAuthentication):
             raise InvalidToken(_("Token contained no recognizable user identification"))
         
         try:
-            user = User.objects.select_related('role').get(id=user_id)
+            user = User.objects.get(id=user_id)
         except User.DoesNotExist:
             raise AuthenticationFailed(_("User not found"), code='user_not_found')
         
-        if user.role.name in ['deactivated', 'banned']:
+        if user.role_id in Role.get_inactive_role_ids():
             raise AuthenticationFailed(_("User is not active"), code='user_inactive')
         
+        # Roles are served from the process-wide lookup cache instead of a join
+        user.role = Role.objects.get_by_id(user.role_id)
         return user
\ No newline at end of file
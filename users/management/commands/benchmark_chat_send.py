@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from users.models import User, UserChat, UserChatParticipant
+from users.views import UserViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure how many chat messages per second the send endpoint handles, including the '
+        'publish to centrifugo. Runs inside a transaction that is rolled back, so no data is left behind.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000, help='Number of messages to send')
+        parser.add_argument(
+            '--history',
+            type=int,
+            default=0,
+            help='Number of messages in the chat before the benchmark starts'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options['messages'], options['history'])
+            transaction.set_rollback(True)
+
+    def run(self, message_count, history_count):
+        sender = User.objects.create(username='benchmark_sender', email='benchmark_sender@benchmark.com')
+        receiver = User.objects.create(username='benchmark_receiver', email='benchmark_receiver@benchmark.com')
+
+        chat = UserChat.objects.create()
+        UserChatParticipant.objects.bulk_create([
+            UserChatParticipant(chat=chat, user=sender),
+            UserChatParticipant(chat=chat, user=receiver),
+        ])
+
+        factory = APIRequestFactory()
+        view = UserViewSet.as_view({'post': 'post_chat_message'})
+
+        def send(message):
+            request = factory.post(
+                f'/api/users/me/chats/{receiver.id}/messages/',
+                data={'message': message},
+                format='json'
+            )
+            force_authenticate(request, user=sender)
+            response = view(request, user_id=str(receiver.id))
+            if response.status_code != 201:
+                raise RuntimeError(f'Sending a message failed with status {response.status_code}')
+
+        for i in range(history_count):
+            send(f'history {i}')
+
+        start = time.perf_counter()
+        for i in range(message_count):
+            send(f'benchmark {i}')
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'Sent {message_count} messages in {elapsed:.2f}s: '
+            f'{message_count / elapsed:.1f} messages/sec, {elapsed / message_count * 1000:.2f} ms/message'
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2025-01-06 10:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_likes_count(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    UserLike = apps.get_model('users', 'UserLike')
+
+    User.objects.update(
+        likes_count=Coalesce(
+            Subquery(
+                UserLike.objects.filter(
+                    liked_user=OuterRef('pk')
+                ).order_by().values('liked_user').annotate(count=Count('pk')).values('count')
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0018_alter_userlike_liked_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_likes_count, migrations.RunPython.noop),
+    ]
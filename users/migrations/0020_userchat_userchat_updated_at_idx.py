@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2025-01-13 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0019_user_likes_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userchat',
+            index=models.Index(fields=['-updated_at', '-id'], name='userchat_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2025-01-10 15:12
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0020_userchat_userchat_updated_at_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('username'), name='gin_trgm_ops'
+                ),
+                name='user_username_trgm_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'
+                ),
+                name='user_email_trgm_idx',
+            ),
+        ),
+    ]
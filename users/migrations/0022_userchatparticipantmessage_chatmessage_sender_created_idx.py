@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2025-01-11 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0021_user_user_username_trgm_idx_user_user_email_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userchatparticipantmessage',
+            index=models.Index(fields=['sender', '-created_at', '-id'], name='chatmessage_sender_created_idx'),
+        ),
+    ]
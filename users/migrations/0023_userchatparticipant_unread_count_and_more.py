@@ -0,0 +1,49 @@
+# Generated by Django 5.1.1 on 2025-01-12 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_unread_count_and_last_message(apps, schema_editor):
+    UserChatParticipant = apps.get_model('users', 'UserChatParticipant')
+    UserChatParticipantMessage = apps.get_model('users', 'UserChatParticipantMessage')
+
+    UserChatParticipant.objects.update(
+        unread_count=Coalesce(
+            Subquery(
+                UserChatParticipantMessage.objects.filter(
+                    sender=OuterRef('pk'),
+                    created_at__gt=OuterRef('last_read_at')
+                ).order_by().values('sender').annotate(count=Count('pk')).values('count')
+            ),
+            0
+        ),
+        last_message=Subquery(
+            UserChatParticipantMessage.objects.filter(
+                sender=OuterRef('pk')
+            ).order_by('-created_at', '-id').values('pk')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0022_userchatparticipantmessage_chatmessage_sender_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userchatparticipant',
+            name='unread_count',
+            field=models.IntegerField(default=0, help_text='Number of messages of the user the other user has not read'),
+        ),
+        migrations.AddField(
+            model_name='userchatparticipant',
+            name='last_message',
+            field=models.ForeignKey(help_text='Last message sent by the user', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.userchatparticipantmessage'),
+        ),
+        migrations.RunPython(populate_unread_count_and_last_message, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
 import uuid
 from django.contrib.auth.models import AbstractBaseUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
+from api.managers import LookupTableManager
 from users.utils import generate_random_username
 
 from .managers import UserManager
@@ -12,32 +15,41 @@ class Role(models.Model):
     description = models.CharField(max_length=512)
     weight = models.IntegerField()
 
+    objects = LookupTableManager()
+
     def __str__(self):
         return self.name
     
     @staticmethod
     def get_regular_user_role():
-        return Role.objects.get(name='user')
+        return Role.objects.get_by_name('user')
     
     @staticmethod
     def get_banned_user_role():
-        return Role.objects.get(name='banned')
+        return Role.objects.get_by_name('banned')
 
     @staticmethod 
     def get_deactivated_user_role():
-        return Role.objects.get(name='deactivated')
+        return Role.objects.get_by_name('deactivated')
 
     @staticmethod 
     def get_chat_moderator_role():
-        return Role.objects.get(name='chat_moderator')
+        return Role.objects.get_by_name('chat_moderator')
     
     @staticmethod
     def get_site_moderator_role():
-        return Role.objects.get(name='site_moderator')
+        return Role.objects.get_by_name('site_moderator')
     
     @staticmethod
     def get_admin_role():
-        return Role.objects.get(name='admin')
+        return Role.objects.get_by_name('admin')
+
+    @staticmethod
+    def get_inactive_role_ids():
+        return (
+            Role.get_deactivated_user_role().id,
+            Role.get_banned_user_role().id,
+        )
 
 
 class User(AbstractBaseUser):
@@ -53,6 +65,7 @@ class User(AbstractBaseUser):
     )
     email = models.EmailField(unique=True)
     experience = models.IntegerField(default=0)
+    likes_count = models.IntegerField(default=0)
     introduction = models.TextField(blank=True)
     chat_blocked = models.BooleanField(default=False)
     is_profile_visible = models.BooleanField(
@@ -101,6 +114,13 @@ class User(AbstractBaseUser):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            # Trigram indexes on the expression icontains compares, UPPER(column)
+            GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='user_username_trgm_idx'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='user_email_trgm_idx'),
+        ]
+
 class UserLike(models.Model):
     id = models.UUIDField(
         primary_key=True, 
@@ -152,6 +172,11 @@ class UserChat(models.Model):
 
     def __str__(self):
         return f'{self.id}'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-updated_at', '-id'], name='userchat_updated_at_idx'),
+        ]
     
 class UserChatParticipant(models.Model):
     id = models.UUIDField(
@@ -175,6 +200,17 @@ class UserChatParticipant(models.Model):
         help_text="Whether the user blocked the chat"
     )
     last_blocked_at = models.DateTimeField(null=True)
+    unread_count = models.IntegerField(
+        default=0,
+        help_text="Number of messages of the user the other user has not read"
+    )
+    last_message = models.ForeignKey(
+        'UserChatParticipantMessage',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        help_text="Last message sent by the user"
+    )
 
     def __str__(self):
         return f'{self.id}'
@@ -197,4 +233,9 @@ class UserChatParticipantMessage(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f'{self.id}'
\ No newline at end of file
+        return f'{self.id}'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sender', '-created_at', '-id'], name='chatmessage_sender_created_idx'),
+        ]
\ No newline at end of file
@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
@@ -173,10 +174,7 @@ class UserSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
         return serializer.data
 
     def get_likes_count(self, obj):
-        if not hasattr(obj, 'liked_user'):
-            return None
-
-        return obj.liked_user.all().count()
+        return obj.likes_count
     
     def get_liked(self, obj):
         return obj.liked
@@ -249,7 +247,7 @@ class PostSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        exclude = ('status', 'team', 'user')
+        exclude = ('status', 'team', 'user', 'search_vector')
 
     def get_status_data(self, obj):
         if not hasattr(obj, 'status'):
@@ -288,10 +286,10 @@ class PostSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
         return serializer.data
     
     def get_likes_count(self, obj):
-        return obj.postlike_set.count()
+        return obj.likes_count
     
     def get_comments_count(self, obj):
-        return obj.postcomment_set.count()
+        return obj.comments_count
     
     def get_liked(self, obj):
         return obj.liked
@@ -332,7 +330,7 @@ class PostCommentSerializer(DynamicFieldsSerializerMixin, serializers.ModelSeria
 
     class Meta:
         model = PostComment
-        exclude = ('post', 'user', 'status')
+        exclude = ('post', 'user', 'status', 'search_vector')
 
     def get_post_data(self, obj):
         if not hasattr(obj, 'post'):
@@ -371,10 +369,10 @@ class PostCommentSerializer(DynamicFieldsSerializerMixin, serializers.ModelSeria
         return serializer.data
     
     def get_replies_count(self, obj):
-        return obj.postcommentreply_set.count()
+        return obj.replies_count
     
     def get_likes_count(self, obj):
-        return obj.postcommentlike_set.count()
+        return obj.likes_count
     
     def get_liked(self, obj):
         if not hasattr(obj, 'liked'):
@@ -502,12 +500,20 @@ class UserChatParticipantMessageCreateSerializer(serializers.Serializer):
             if receiver.chat_deleted:
                 receiver.chat_deleted = False
                 receiver.last_deleted_at = datetime.now(timezone.utc)
+                # Saving also refreshes last_read_at, so the receiver's messages are read
+                receiver.unread_count = 0
                 receiver.save()
 
             ## remove the receiver from the validated data
             validated_data.pop('receiver', None)
 
-            return UserChatParticipantMessage.objects.create(**validated_data)
+            message = UserChatParticipantMessage.objects.create(**validated_data)
+            UserChatParticipant.objects.filter(id=sender.id).update(
+                unread_count=F('unread_count') + 1,
+                last_message=message
+            )
+
+            return message
 
 
 class UserChatParticipantSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -570,34 +576,19 @@ class UserChatParticipantSerializer(DynamicFieldsSerializerMixin, serializers.Mo
         return serializer.data
 
     def get_last_message(self, obj):
-        if not hasattr(obj, 'userchatparticipantmessage_set'):
+        if obj.last_message_id is None:
             return None
         
         context = self.context.get('userchatparticipantmessage', {})
-        last_message = obj.userchatparticipantmessage_set.all().first()
-
-        if not last_message:
-            return None
-
         serializer = UserChatParticipantMessageSerializer(
-            last_message,
+            obj.last_message,
             context=self.context,
             **context    
         )
         return serializer.data
     
     def get_unread_messages_count(self, obj):
-        if not hasattr(obj, 'userchatparticipantmessage_set'):
-            return None
-
-        last_read_at = obj.last_read_at
-
-        count = 0
-        for message in obj.userchatparticipantmessage_set.all():
-            if message.created_at > last_read_at:
-                count += 1
-
-        return count
+        return obj.unread_count
     
 
 class UserChatSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from typing import List
-from api.websocket import send_message_to_centrifuge
+from api.utils import filter_by_search_term
+from api.websocket import publish_messages_to_centrifuge, send_message_to_centrifuge
 from management.models import (
     Inquiry, 
     InquiryMessage, 
@@ -11,13 +12,16 @@ from management.models import (
 from management.serializers import InquirySerializer
 from teams.models import Post, PostComment, PostCommentLike, PostLike, PostStatusDisplayName, TeamLike
 from users.models import User, UserChat, UserChatParticipant, UserChatParticipantMessage, UserLike
+from users.utils import invalidate_auth_user_cache, invalidate_chat_identity_cache
 
-from django.db.models import Q, Exists, OuterRef, Prefetch
+from django.db import transaction
+from django.db.models import F, Q, Exists, OuterRef, Prefetch
 
 from users.serializers import (
     PostCommentSerializer, 
     UserChatParticipantMessageCreateSerializer, 
     UserChatParticipantMessageSerializer, 
+    UserChatParticipantSerializer, 
     UserChatSerializer, 
     UserSerializer, 
     UserUpdateSerializer
@@ -63,6 +67,13 @@ inquiry_queryset_allowed_order_by_fields = (
     '-created_at',
 )
 
+# Maximum number of users a search on a related table (chats, inquiries, reports) is resolved to
+USER_SEARCH_RESULT_LIMIT = 1000
+
+# Number of latest messages of each participant loaded along with a chat, older ones are
+# loaded page by page through the chat messages endpoint
+CHAT_MESSAGES_WINDOW = 50
+
 def create_user_queryset_without_prefetch(
     request, 
     fields_only=[], 
@@ -146,12 +157,12 @@ def create_post_queryset_without_prefetch_for_user(
         queryset = Post.objects.all()
 
     if search_term is not None:
-        queryset = queryset.filter(
-            Q(title__icontains=search_term) | Q(content__icontains=search_term)
-        )
+        queryset = filter_by_search_term(queryset, search_term)
 
     if sort_by is not None:
         queryset = queryset.order_by(*sort_by)
+    elif 'search_rank' in queryset.query.annotations:
+        queryset = queryset.order_by('-search_rank', '-created_at')
     else:
         queryset = queryset.order_by('-created_at')
 
@@ -191,12 +202,12 @@ def create_comment_queryset_without_prefetch_for_user(
         queryset = PostComment.objects.all()
 
     if search_term is not None:
-        queryset = queryset.filter(
-            Q(content__icontains=search_term)
-        )
+        queryset = filter_by_search_term(queryset, search_term)
 
     if sort_by is not None:
         queryset = queryset.order_by(*sort_by)
+    elif 'search_rank' in queryset.query.annotations:
+        queryset = queryset.order_by('-search_rank', '-created_at')
     else:
         queryset = queryset.order_by('-created_at')
 
@@ -235,9 +246,10 @@ def create_userchat_queryset_without_prefetch_for_user(
     else:
         queryset = UserChat.objects.all()
 
-    if search_term is not None:
+    if search_term:
+        user_ids = UserService.get_user_ids_by_search_term(search_term)
         queryset = queryset.filter(
-            Q(userchatparticipant__user__username__icontains=search_term)
+            id__in=UserChatParticipant.objects.filter(user_id__in=user_ids).values('chat_id')
         )
 
     if sort_by is not None:
@@ -299,26 +311,14 @@ def send_update_to_all_parties_regarding_chat(
     request,
     recipient_user_id,
     chat_id,
-    chat_serializer,
-    message_serializer
+    chat_data,
+    message_data
 ):
-    sender_chat_notification_channel_name = f'users/{request.user.id}/chats/updates'
-    send_message_to_centrifuge(
-        sender_chat_notification_channel_name,
-        chat_serializer.data
-    )
-
-    recipient_chat_notification_channel_name = f'users/{recipient_user_id}/chats/updates'
-    send_message_to_centrifuge(
-        recipient_chat_notification_channel_name,
-        chat_serializer.data
-    ) 
-
-    chat_channel_name = f'users/chats/{chat_id}'
-    send_message_to_centrifuge(
-        chat_channel_name, 
-        message_serializer.data
-    )
+    publish_messages_to_centrifuge([
+        (f'users/{request.user.id}/chats/updates', chat_data),
+        (f'users/{recipient_user_id}/chats/updates', chat_data),
+        (f'users/chats/{chat_id}', message_data),
+    ])
 
 
 def send_update_to_all_parties_regarding_inquiry(
@@ -388,12 +388,28 @@ def send_update_to_all_parties_regarding_inquiry(
         )
 
 class UserService:
+    @staticmethod
+    def get_user_ids_by_search_term(search_term, search_email=False):
+        '''
+        Resolve the ids of the users whose username (or email) contains the search term, capped at
+        USER_SEARCH_RESULT_LIMIT. The lookup is served by the trigram indexes of the user table, and
+        searches on related tables filter by the ids instead of joining the user table.
+        Callers skip the search for an empty term, which would match every user up to the cap.
+        '''
+
+        search_filter = Q(username__icontains=search_term)
+        if search_email:
+            search_filter |= Q(email__icontains=search_term)
+
+        return list(
+            User.objects.filter(search_filter).values_list('id', flat=True)[:USER_SEARCH_RESULT_LIMIT]
+        )
+
     @staticmethod
     def get_user_by_id(user_id):
         return User.objects.filter(id=user_id).select_related(
             'role'
         ).prefetch_related(
-            'liked_user',
             Prefetch(
                 'teamlike_set',
                 queryset=TeamLike.objects.select_related('team')
@@ -411,9 +427,9 @@ class UserService:
             'is_profile_visible', 
             'id', 
             'chat_blocked', 
+            'likes_count',
             'created_at'
         ).prefetch_related(
-            'liked_user',
             Prefetch(
                 'teamlike_set',
                 queryset=TeamLike.objects.select_related('team')
@@ -437,6 +453,7 @@ class UserService:
         )         
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_chat_identity_cache(user.id)
 
         return serializer
     
@@ -445,8 +462,13 @@ class UserService:
         '''
         Create a like for a user, and return the liked user with the attribute of "id" and "liked".
         '''
-        UserLike.objects.get_or_create(user=user, liked_user=user_to_like)
-        liked_user = User.objects.filter(id=pk).only('id')
+        with transaction.atomic():
+            _, created = UserLike.objects.get_or_create(user=user, liked_user=user_to_like)
+            if created:
+                User.objects.filter(id=user_to_like.id).update(likes_count=F('likes_count') + 1)
+                transaction.on_commit(lambda: invalidate_auth_user_cache(user_to_like.id))
+
+        liked_user = User.objects.filter(id=pk).only('id', 'likes_count')
 
         if request.user.is_authenticated:
             liked_user = liked_user.annotate(
@@ -457,14 +479,15 @@ class UserService:
     
     @staticmethod
     def delete_user_like(request, pk, user: User, user_to_unlike: User):
-        try:
-            UserLike.objects.get(user=user, liked_user=user_to_unlike).delete()
-        except UserLike.DoesNotExist:
-            pass
+        with transaction.atomic():
+            deleted, _ = UserLike.objects.filter(user=user, liked_user=user_to_unlike).delete()
+            if deleted:
+                User.objects.filter(id=user_to_unlike.id).update(likes_count=F('likes_count') - 1)
+                transaction.on_commit(lambda: invalidate_auth_user_cache(user_to_unlike.id))
 
-        unliked_user = User.objects.filter(id=pk).only('id')
+        unliked_user = User.objects.filter(id=pk).only('id', 'likes_count')
         if request.user.is_authenticated:
-            user = user.annotate(
+            unliked_user = unliked_user.annotate(
                 liked=Exists(UserLike.objects.filter(user=request.user, liked_user=OuterRef('pk')))
             )
 
@@ -592,13 +615,13 @@ class UserViewService:
                 'team__id', 
                 'team__symbol', 
                 'status__id', 
-                'status__name'
+                'status__name',
+                'likes_count',
+                'comments_count'
             ],
             user__id=user_id,
             status__name='created'
         ).prefetch_related(
-            'postlike_set',
-            'postcomment_set',
             Prefetch(
                 'status__poststatusdisplayname_set',
                 queryset=PostStatusDisplayName.objects.select_related(
@@ -632,13 +655,12 @@ class UserViewService:
                 'post__team__id',
                 'post__team__symbol',
                 'post__user__id',
-                'post__user__username'
+                'post__user__username',
+                'likes_count',
+                'replies_count'
             ],
             user__id=user_id,
             status__name='created'
-        ).prefetch_related(
-            'postcommentlike_set',
-            'postcommentreply_set',
         ).select_related(
             'user',
             'status',
@@ -669,7 +691,9 @@ class UserChatService:
                 UserChatParticipant.objects.prefetch_related(
                     Prefetch(
                         'userchatparticipantmessage_set',
-                        queryset=UserChatParticipantMessage.objects.order_by('-created_at')
+                        queryset=UserChatParticipantMessage.objects.order_by(
+                            '-created_at', '-id'
+                        )[:CHAT_MESSAGES_WINDOW]
                     ),
                 ).select_related(
                     'user',
@@ -680,20 +704,25 @@ class UserChatService:
     @staticmethod
     def get_chat_by_id(id):
         return UserChat.objects.prefetch_related(
-            Prefetch(
-                'userchatparticipant_set',
-                UserChatParticipant.objects.prefetch_related(
-                    Prefetch(
-                        'userchatparticipantmessage_set',
-                        queryset=UserChatParticipantMessage.objects.order_by('-created_at')
-                    ),
-                ).select_related(
-                    'user',
-                )
-            )
+            UserChatService.get_participants_with_last_message_prefetch()
         ).filter(
             id=id
         ).first()
+
+    @staticmethod
+    def get_participants_with_last_message_prefetch():
+        '''
+        Prefetch the participants of chats with their last message, instead of their whole
+        message history. The unread count is maintained on the participant.
+        '''
+
+        return Prefetch(
+            'userchatparticipant_set',
+            UserChatParticipant.objects.select_related(
+                'user',
+                'last_message',
+            )
+        )
     
     @staticmethod
     def get_my_chats(request):
@@ -704,44 +733,90 @@ class UserChatService:
             userchatparticipant__chat_blocked=False,
             userchatparticipant__chat_deleted=False
         ).prefetch_related(
-            Prefetch(
-                'userchatparticipant_set',
-                UserChatParticipant.objects.prefetch_related(
-                    Prefetch(
-                        'userchatparticipantmessage_set',
-                        queryset=UserChatParticipantMessage.objects.order_by('created_at')
-                    ),
-                ).select_related(
-                    'user',
-                )
-            )
+            UserChatService.get_participants_with_last_message_prefetch()
         )
-    
+
     @staticmethod
-    def create_chat_message(request, user_id):
+    def get_chat_messages(request, user_id):
+        '''
+        Get the messages of the chat with the user, for paginating back through the chat
+        history with the keyset pagination of the view.
+        '''
+
         chat = UserChat.objects.filter(
             userchatparticipant__user=request.user,
-        ).filter(
-            userchatparticipant__user__id=user_id,
             userchatparticipant__chat_blocked=False,
             userchatparticipant__user__chat_blocked=False,
+        ).filter(
+            userchatparticipant__user__id=user_id,
         ).first()
 
         if not chat:
-            return None, None
+            return None
+
+        participants = list(chat.userchatparticipant_set.all())
+        user_participant = next(
+            participant for participant in participants if participant.user_id == request.user.id
+        )
+
+        messages = UserChatParticipantMessage.objects.filter(
+            sender__in=participants
+        ).select_related(
+            'sender__user'
+        )
 
-        participants = chat.userchatparticipant_set.all()
+        if user_participant.last_deleted_at:
+            messages = messages.filter(created_at__gt=user_participant.last_deleted_at)
+
+        return messages
+    
+    @staticmethod
+    def send_chat_message(request, user_id):
+        '''
+        Send a message to the chat with the user. The participants are loaded and locked once,
+        the writes run in a single transaction, and the chat update to publish is built from the
+        objects in memory instead of reloading the chat.
+        Returns the message, the chat update and the message data, or Nones if there is no such chat.
+        '''
 
         serializer = UserChatParticipantMessageCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        message = serializer.save(
-            sender=participants.get(user=request.user),
-            receiver=participants.get(user__id=user_id)
-        )
-        chat.updated_at = datetime.now(timezone.utc)
-        chat.save()
 
-        return message, chat
+        with transaction.atomic():
+            participants = list(
+                UserChatParticipant.objects.filter(
+                    chat__in=UserChat.objects.filter(
+                        userchatparticipant__user=request.user,
+                    ).filter(
+                        userchatparticipant__user__id=user_id,
+                        userchatparticipant__chat_blocked=False,
+                        userchatparticipant__user__chat_blocked=False,
+                    ).values('id')[:1]
+                ).select_related(
+                    'user',
+                    'chat',
+                    'last_message',
+                ).select_for_update(of=('self',))
+            )
+
+            sender = next((p for p in participants if p.user_id == request.user.id), None)
+            receiver = next((p for p in participants if str(p.user_id) == str(user_id)), None)
+            if not sender or not receiver:
+                return None, None, None
+
+            message = serializer.save(sender=sender, receiver=receiver)
+            # The participants are locked, so the counter can be kept in sync in memory
+            sender.unread_count += 1
+            sender.last_message = message
+
+            chat = sender.chat
+            chat.updated_at = datetime.now(timezone.utc)
+            UserChat.objects.filter(id=chat.id).update(updated_at=chat.updated_at)
+
+        chat_data = UserChatSerializerService.serialize_chat_update_with_participants(chat, participants)
+        message_data = UserChatSerializerService.serialize_message_for_chat(message).data
+
+        return message, chat_data, message_data
     
     @staticmethod
     def mark_chat_as_read(request, user_id):
@@ -758,7 +833,7 @@ class UserChatService:
         UserChatParticipant.objects.filter(
             chat=chat,
             user__id=user_id
-        ).update(last_read_at=datetime.now(timezone.utc))
+        ).update(last_read_at=datetime.now(timezone.utc), unread_count=0)
 
     @staticmethod
     def delete_chat(request, user_id):
@@ -780,7 +855,7 @@ class UserChatService:
         UserChatParticipant.objects.filter(
             chat=chat,
             user__id=user_id
-        ).update(last_read_at=datetime.now(timezone.utc))
+        ).update(last_read_at=datetime.now(timezone.utc), unread_count=0)
 
 
     @staticmethod
@@ -806,7 +881,7 @@ class UserChatService:
         UserChatParticipant.objects.filter(
             chat=chat,
             user__id=user_id
-        ).update(last_read_at=datetime.now(timezone.utc))
+        ).update(last_read_at=datetime.now(timezone.utc), unread_count=0)
 
     @staticmethod
     def enable_chat(request, target_user):
@@ -834,6 +909,8 @@ class UserChatService:
                 user_participant.chat_deleted = False
                 user_participant.last_deleted_at = datetime.now(timezone.utc)
                 target_participant.last_read_at = datetime.now(timezone.utc)
+                # Saving also refreshes last_read_at, so the user's messages are read
+                user_participant.unread_count = 0
                 user_participant.save()
 
                 return True, {'id': str(chat.id)}
@@ -842,6 +919,8 @@ class UserChatService:
                 user_participant.chat_deleted = False
                 user_participant.last_deleted_at = datetime.now(timezone.utc)
                 target_participant.last_read_at = datetime.now(timezone.utc)
+                # Saving also refreshes last_read_at, so the user's messages are read
+                user_participant.unread_count = 0
                 user_participant.save()
 
                 return True, {'id': str(chat.id)}
@@ -978,6 +1057,36 @@ class UserChatSerializerService:
             }
         )
 
+    @staticmethod
+    def serialize_chat_update_with_participants(chat : UserChat, participants):
+        '''
+        Serialize the same data as serialize_chat_for_update, from participants already in memory.
+        '''
+
+        data = UserChatSerializer(
+            chat,
+            fields=['id', 'created_at', 'updated_at']
+        ).data
+        data['participants'] = UserChatParticipantSerializer(
+            participants,
+            many=True,
+            fields=[
+                'user_data', 
+                'last_message', 
+                'unread_messages_count'
+            ],
+            context={
+                'userchatparticipantmessage': {
+                    'fields_exclude': ['sender_data', 'user_data']
+                },
+                'user': {
+                    'fields': ['id', 'username']
+                }
+            }
+        ).data
+
+        return data
+
     @staticmethod
     def serialize_message_for_chat(message : UserChatParticipantMessage):
         return UserChatParticipantMessageSerializer(
@@ -989,6 +1098,19 @@ class UserChatSerializerService:
                 }
             }
         )
+
+    @staticmethod
+    def serialize_messages_for_chat(messages):
+        return UserChatParticipantMessageSerializer(
+            messages,
+            many=True,
+            fields_exclude=['sender_data'],
+            context={
+                'user': {
+                    'fields': ['id', 'username']
+                }
+            }
+        )
     
 
 class InquiryService:
@@ -996,7 +1118,8 @@ class InquiryService:
     def get_my_inquiries(request):
         return Inquiry.objects.filter(user=request.user).order_by('-created_at').select_related(
             'inquiry_type',
-            'user'
+            'user',
+            'last_message'
         ).prefetch_related(
             Prefetch(
                 'inquiry_type__inquirytypedisplayname_set',
@@ -1004,14 +1127,11 @@ class InquiryService:
                     'language'
                 )
             ),
-            Prefetch(
-                'messages',
-                queryset=InquiryMessage.objects.order_by('-created_at')
-            ),
             Prefetch(
                 'inquirymoderator_set',
                 queryset=InquiryModerator.objects.select_related(
-                    'moderator'
+                    'moderator',
+                    'last_message'
                 ).prefetch_related(
                     Prefetch(
                         'inquirymoderatormessage_set',
@@ -1028,7 +1148,8 @@ class InquiryService:
             user=request.user
         ).select_related(
             'inquiry_type',
-            'user'
+            'user',
+            'last_message'
         ).prefetch_related(
             Prefetch(
                 'inquiry_type__inquirytypedisplayname_set',
@@ -1043,7 +1164,8 @@ class InquiryService:
             Prefetch(
                 'inquirymoderator_set',
                 queryset=InquiryModerator.objects.select_related(
-                    'moderator'
+                    'moderator',
+                    'last_message'
                 ).prefetch_related(
                     Prefetch(
                         'inquirymoderatormessage_set',
@@ -1057,7 +1179,8 @@ class InquiryService:
     def get_inquiry_by_id(inquiry_id):
         return Inquiry.objects.filter(id=inquiry_id).select_related(
             'inquiry_type',
-            'user'
+            'user',
+            'last_message'
         ).prefetch_related(
             Prefetch(
                 'inquiry_type__inquirytypedisplayname_set',
@@ -1072,7 +1195,8 @@ class InquiryService:
             Prefetch(
                 'inquirymoderator_set',
                 queryset=InquiryModerator.objects.select_related(
-                    'moderator'
+                    'moderator',
+                    'last_message'
                 ).prefetch_related(
                     Prefetch(
                         'inquirymoderatormessage_set',
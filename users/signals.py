@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import User
+from users.utils import invalidate_auth_user_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user_cache_on_change(sender, instance, **kwargs):
+    '''
+    Drop the cached user of the authentication whenever the user is saved or deleted, whatever
+    the path, e.g. a role change or a ban from the Django admin. Queryset updates do not send the
+    signal, so they invalidate the cache themselves.
+    '''
+
+    invalidate_auth_user_cache(instance.id)
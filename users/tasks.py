@@ -0,0 +1,40 @@
+from celery import shared_task
+
+import logging
+
+from django.core.cache import cache
+from django.db.models import F
+
+from api.utils import count_subquery, reconcile_counter
+from users.models import User, UserLike
+from users.utils import get_auth_user_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_user_likes_count():
+    '''
+    Recount the denormalized likes counter of users, fixing any drift left by failed or
+    concurrent writes.
+    '''
+
+    drifted_user_ids = list(
+        User.objects.annotate(
+            actual_count=count_subquery(UserLike, 'liked_user')
+        ).exclude(
+            likes_count=F('actual_count')
+        ).values_list('id', flat=True)
+    )
+    if not drifted_user_ids:
+        return
+
+    fixed = reconcile_counter(
+        User.objects.filter(id__in=drifted_user_ids), 
+        'likes_count', 
+        UserLike, 
+        'liked_user'
+    )
+    # The update sends no signal, so the cached users of the authentication are dropped here
+    cache.delete_many([get_auth_user_cache_key(user_id) for user_id in drifted_user_ids])
+    logger.info(f'Reconciled likes_count of {fixed} users')
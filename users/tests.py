@@ -1,12 +1,22 @@
 from rest_framework.test import APITestCase, APIRequestFactory, APIClient, force_authenticate
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 
-from api.utils import MockResponse
+from api.throttling import UserChatRateThrottle
+from api.utils import MockResponse, get_redis_client
+from notification.services import NotificationService, get_unread_count_cache_key
 from teams.models import Language, Post, PostComment, PostCommentStatus, PostStatus, Team, TeamLike, TeamName
+from users.authentication import CookieJWTAccessAuthentication
 from users.models import Role, User, UserChat, UserChatParticipant, UserChatParticipantMessage
+from users.services import create_userchat_queryset_without_prefetch_for_user
+from users.utils import generate_access_token_for_user
 from users.views import UserViewSet
 
 from unittest.mock import patch
 
+from django.conf import settings
+from django.core.cache import cache
+
 class UserTestCase(APITestCase):
     def setUp(self):
         regular_user = User.objects.create(
@@ -66,6 +76,41 @@ class UserTestCase(APITestCase):
         user.refresh_from_db()
         self.assertEqual(user.role, Role.get_admin_role())
 
+    def test_banned_user_is_rejected_immediately(self):
+        user = User.objects.get(username='testuser')
+        access_token = generate_access_token_for_user(user)[settings.SIMPLE_JWT['AUTH_ACCESS_TOKEN_COOKIE']]
+
+        request = APIRequestFactory().get('/api/users/me/')
+        request.COOKIES[settings.SIMPLE_JWT['AUTH_ACCESS_TOKEN_COOKIE']] = access_token
+
+        authentication = CookieJWTAccessAuthentication()
+        authenticated_user, _ = authentication.authenticate(request)
+        self.assertEqual(authenticated_user.id, user.id)
+
+        # banned the way the Django admin does, while the user is cached
+        user.role = Role.get_banned_user_role()
+        user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate(request)
+
+    def test_role_lookup_is_cached(self):
+        role = Role.get_regular_user_role()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(Role.get_regular_user_role(), role)
+            self.assertEqual(Role.objects.get_by_id(role.id), role)
+
+    def test_role_lookup_cache_is_cleared_on_save(self):
+        self.addCleanup(Role.objects.clear_cache)
+
+        role = Role.get_chat_moderator_role()
+        role.description = 'Updated description'
+        role.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Role.get_chat_moderator_role().description, 'Updated description')
+
 class UserAPIEndpointTestCase(APITestCase):
     def setUp(self):
         regular_user = User.objects.create(
@@ -156,6 +201,31 @@ class UserAPIEndpointTestCase(APITestCase):
         self.assertTrue('liked' in response.data)
         self.assertEqual(response.data['liked'], False)
 
+    def test_like_user_updates_likes_count(self):
+        user = User.objects.get(username='testuser')
+        admin = User.objects.get(username='testadmin')
+
+        factory = APIRequestFactory()
+        view = UserViewSet.as_view({'post': 'post_like', 'delete': 'delete_like'})
+
+        for _ in range(2):
+            request = factory.post(f'/api/users/{admin.id}/likes/')
+            force_authenticate(request, user=user)
+            response = view(request, pk=admin.id)
+            self.assertEqual(response.status_code, 201)
+
+        admin.refresh_from_db()
+        self.assertEqual(admin.likes_count, 1)
+        self.assertEqual(response.data['likes_count'], 1)
+
+        request = factory.delete(f'/api/users/{admin.id}/likes/')
+        force_authenticate(request, user=user)
+        response = view(request, pk=admin.id)
+        self.assertEqual(response.status_code, 200)
+
+        admin.refresh_from_db()
+        self.assertEqual(admin.likes_count, 0)
+
     def test_get_favorite_teams_of_oneself(self):
         user = User.objects.filter(username='testuser').first()
         if not user:
@@ -492,6 +562,25 @@ class UserAPIEndpointTestCase(APITestCase):
         self.assertTrue(data['next'])
         self.assertFalse(data['previous'])
 
+        # test full text search, with stemming and prefix matching
+        Post.objects.create(
+            title='LeBron runs the offense',
+            content='르브론이 공격을 이끈다',
+            status=PostStatus.objects.get(name='created'),
+            team=team,
+            user=user
+        )
+
+        for search_term in ('running', 'lebr', '르브론'):
+            request = factory.get(
+                f'/api/users/me/posts/?search={search_term}'
+            )
+            force_authenticate(request, user=user)
+            response = view(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 1)
+            self.assertEqual(response.data['results'][0]['title'], 'LeBron runs the offense')
+
     def test_get_roles(self):
         factory = APIRequestFactory()
         view = UserViewSet.as_view({'get': 'get_roles'})
@@ -727,6 +816,24 @@ class UserAPIEndpointTestCase(APITestCase):
         self.assertTrue('user_data' in response.data['results'][0]['participants'][0])
         self.assertTrue('user_data' in response.data['results'][0]['participants'][1])
 
+        # test keyset pagination
+        request = factory.get(
+            f'/api/users/me/chats/?cursor='
+        )
+        force_authenticate(request, user=user)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse('count' in response.data)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertFalse(response.data['next'])
+
+        request = factory.get(
+            f'/api/users/me/chats/?cursor=invalid'
+        )
+        force_authenticate(request, user=user)
+        response = view(request)
+        self.assertEqual(response.status_code, 404)
+
 
     def test_get_chat(self):
         user = User.objects.filter(username='testuser').first()
@@ -806,7 +913,118 @@ class UserAPIEndpointTestCase(APITestCase):
         response = view(request, user_id=user.id)
 
         self.assertEqual(response.status_code, 400)
-    
+
+    def test_get_chat_messages(self):
+        user = User.objects.filter(username='testuser').first()
+        user2 = User.objects.filter(username='testadmin').first()
+
+        factory = APIRequestFactory()
+        view = UserViewSet.as_view({'get': 'get_chat_messages'})
+
+        chat = UserChat.objects.create()
+        part1 = UserChatParticipant.objects.create(chat=chat, user=user)
+        part2 = UserChatParticipant.objects.create(chat=chat, user=user2)
+
+        for i in range(60):
+            UserChatParticipantMessage.objects.create(
+                sender=part1 if i % 2 else part2,
+                message=f'message {i}'
+            )
+
+        request = factory.get(
+            f'/api/users/me/chats/{user2.id}/messages/'
+        )
+        force_authenticate(request, user=user)
+        response = view(request, user_id=user2.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertEqual(response.data['results'][0]['message'], 'message 59')
+        self.assertTrue(response.data['next'])
+
+        # follow the next link to load the older messages
+        request = factory.get(response.data['next'])
+        force_authenticate(request, user=user)
+        response = view(request, user_id=user2.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['message'], 'message 9')
+        self.assertFalse(response.data['next'])
+
+    def test_notifications(self):
+        user = User.objects.filter(username='testuser').first()
+        cache.delete(get_unread_count_cache_key(user.id))
+
+        factory = APIRequestFactory()
+
+        for i in range(3):
+            NotificationService.create_notification(
+                'comment_like',
+                [user.id],
+                {'actor': f'actor{i}', 'team_id': 1, 'post_id': str(i), 'comment_id': str(i)},
+                group_key=f'comment_like:{i}'
+            )
+
+        # coalesced into the last notification
+        NotificationService.create_notification(
+            'comment_like',
+            [user.id],
+            {'actor': 'actor3', 'team_id': 1, 'post_id': '2', 'comment_id': '2'},
+            group_key='comment_like:2'
+        )
+
+        view = UserViewSet.as_view({'get': 'get_notifications'})
+        request = factory.get('/api/users/me/notifications/')
+        force_authenticate(request, user=user)
+        response = view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(
+            response.data['results'][0]['notification_data']['message'],
+            'actor3 and 1 others liked your comment'
+        )
+
+        view = UserViewSet.as_view({'get': 'get_unread_notifications_count'})
+        request = factory.get('/api/users/me/notifications/unread-count/')
+        force_authenticate(request, user=user)
+        response = view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+
+        view = UserViewSet.as_view({'put': 'mark_notifications_as_read'})
+        request = factory.put('/api/users/me/notifications/mark-as-read/', data={}, format='json')
+        force_authenticate(request, user=user)
+        response = view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(NotificationService.get_unread_count(user.id), 0)
+
+    @patch('users.services.USER_SEARCH_RESULT_LIMIT', 1)
+    def test_chat_search_is_capped(self):
+        user = User.objects.filter(username='testuser').first()
+        for i in range(2):
+            chat = UserChat.objects.create()
+            UserChatParticipant.objects.create(chat=chat, user=user)
+            UserChatParticipant.objects.create(
+                chat=chat,
+                user=User.objects.create(username=f'searched{i}', email=f'searched{i}@test.com')
+            )
+
+        def count_chats(query):
+            request = Request(APIRequestFactory().get(f'/api/users/me/chats/{query}'))
+            return create_userchat_queryset_without_prefetch_for_user(request).count()
+
+        # only the chats of the first USER_SEARCH_RESULT_LIMIT matching users
+        self.assertEqual(count_chats('?search=searched'), 1)
+        self.assertEqual(count_chats('?search=nobody'), 0)
+
+        # an empty search is no search, and is not capped
+        self.assertEqual(count_chats('?search='), 2)
+        self.assertEqual(count_chats(''), 2)
+
     def test_delete_chat(self):
         user = User.objects.filter(username='testuser').first()
         if not user:
@@ -885,4 +1103,48 @@ class UserAPIEndpointTestCase(APITestCase):
         self.assertEqual(response.status_code, 201)
 
         message = UserChatParticipantMessage.objects.filter(sender=part1).first()
-        self.assertEqual(message.message, 'test message')
\ No newline at end of file
+        self.assertEqual(message.message, 'test message')
+        # the sender's unread count and last message are maintained
+        part1.refresh_from_db()
+        self.assertEqual(part1.unread_count, 1)
+        self.assertEqual(part1.last_message_id, message.id)
+
+        # the updates are published with a single request
+        self.assertEqual(mocked.call_count, 1)
+
+    @patch('requests.post', return_value=MockResponse(200, {'result': 'ok'}))
+    def test_post_chat_message_is_throttled(self, mocked):
+        user = User.objects.filter(username='testuser').first()
+        user2 = User.objects.filter(username='testadmin').first()
+        get_redis_client().delete(f'throttle_{UserChatRateThrottle.scope}_{user.id}')
+
+        chat = UserChat.objects.create()
+        UserChatParticipant.objects.create(chat=chat, user=user)
+        UserChatParticipant.objects.create(chat=chat, user=user2)
+
+        factory = APIRequestFactory()
+        view = UserViewSet.as_view({'post': 'post_chat_message'})
+
+        _, capacity, _ = UserChatRateThrottle.rates[-1]
+        for i in range(capacity):
+            request = factory.post(
+                f'/api/users/me/chats/{user2.id}/messages/',
+                data={'message': f'test message {i}'},
+                format='json'
+            )
+            force_authenticate(request, user=user)
+            response = view(request, user_id=user2.id)
+            self.assertEqual(response.status_code, 201)
+
+        request = factory.post(
+            f'/api/users/me/chats/{user2.id}/messages/',
+            data={'message': 'one too many'},
+            format='json'
+        )
+        force_authenticate(request, user=user)
+        response = view(request, user_id=user2.id)
+        self.assertEqual(response.status_code, 429)
+
+        # rejected before the message is written or published
+        self.assertFalse(UserChatParticipantMessage.objects.filter(message='one too many').exists())
+        self.assertEqual(mocked.call_count, capacity)
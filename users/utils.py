@@ -3,6 +3,7 @@ import uuid
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken, UntypedToken
 
 from django.conf import settings
+from django.core.cache import cache
 
 
 def next_level(level):
@@ -20,6 +21,27 @@ def calculate_level(experience):
 
     return level - 1
 
+def get_auth_user_cache_key(user_id):
+    return f'auth_user_{user_id}'
+
+def invalidate_auth_user_cache(user_id):
+    '''
+    Drop the cached user used by the cookie JWT authentication, so the next request
+    reads the user, including their role, from the database again.
+    '''
+
+    cache.delete(get_auth_user_cache_key(user_id))
+
+def get_chat_identity_cache_key(user_id):
+    return f'user_{user_id}_chat_identity'
+
+def invalidate_chat_identity_cache(user_id):
+    '''
+    Drop the cached username and favorite team shown with the game chat messages of the user.
+    '''
+
+    cache.delete(get_chat_identity_cache_key(user_id))
+
 def generate_random_username():
     return str(uuid.uuid4())
 
@@ -15,16 +15,20 @@ from rest_framework.status import (
     HTTP_404_NOT_FOUND,
 )
 
-from api.paginators import CustomPageNumberPagination
+from api.paginators import CustomPageNumberPagination, KeysetPagination, get_pagination_for_request
+from api.throttling import UserChatRateThrottle
 from api.websocket import send_message_to_centrifuge
 from games.models import Game
 from management.models import (
     Inquiry, 
+    InquiryModerator, 
 )
 from management.serializers import (
     InquiryMessageCreateSerializer, 
     InquiryMessageSerializer, 
 )
+from notification.serializers import NotificationMarkAsReadSerializer
+from notification.services import NotificationSerializerService, NotificationService
 from teams.services import PostSerializerService, TeamSerializerService, TeamService
 from users.authentication import CookieJWTAccessAuthentication, CookieJWTRefreshAuthentication
 from users.models import Role, User, UserChat
@@ -39,6 +43,7 @@ from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 from dj_rest_auth.registration.views import SocialLoginView
 
 from users.services import (
+    CHAT_MESSAGES_WINDOW,
     InquirySerializerService, 
     InquiryService,
     PostCommentSerializerService, 
@@ -124,6 +129,8 @@ class UserViewSet(ViewSet):
             permission_classes=[IsAuthenticated]
         elif self.action == 'post_chat_message':
             permission_classes=[IsAuthenticated]
+        elif self.action == 'get_chat_messages':
+            permission_classes=[IsAuthenticated]
         elif self.action == 'mark_chat_messages_as_read':
             permission_classes=[IsAuthenticated]
         elif self.action == 'block_chat':
@@ -136,8 +143,21 @@ class UserViewSet(ViewSet):
             permission_classes=[IsAuthenticated]
         elif self.action == 'post_inquiry_message':
             permission_classes=[IsAuthenticated]
+        elif self.action == 'get_notifications':
+            permission_classes=[IsAuthenticated]
+        elif self.action == 'get_unread_notifications_count':
+            permission_classes=[IsAuthenticated]
+        elif self.action == 'mark_notifications_as_read':
+            permission_classes=[IsAuthenticated]
 
         return [permission() for permission in permission_classes]
+
+    def get_throttles(self):
+        throttle_classes = []
+        if self.action == 'post_chat_message':
+            throttle_classes = [UserChatRateThrottle]
+
+        return [throttle() for throttle in throttle_classes]
     
     @action(detail=False, methods=['get'], url_path='me')
     def me(self, request):
@@ -303,7 +323,7 @@ class UserViewSet(ViewSet):
     )
     def get_chats(self, request):
         chats = UserChatService.get_my_chats(request)
-        pagination = CustomPageNumberPagination()
+        pagination = get_pagination_for_request(request, ordering_field='updated_at')
         paginated_data = pagination.paginate_queryset(chats, request)
 
         serializer = UserChatSerializerService.serialize_chats(paginated_data)
@@ -346,25 +366,35 @@ class UserViewSet(ViewSet):
         if user_id == request.user.id:
             return Response(status=HTTP_400_BAD_REQUEST, data={'error': 'You cannot chat with yourself'})
 
-        message, chat = UserChatService.create_chat_message(request, user_id)
-        if not chat:
+        message, chat_data, message_data = UserChatService.send_chat_message(request, user_id)
+        if not message:
             return Response(status=HTTP_404_NOT_FOUND)
 
-        message_serializer = UserChatSerializerService.serialize_message_for_chat(message)
-
-        chat = UserChatService.get_chat_by_id(chat.id)
-        chat_serializer = UserChatSerializerService.serialize_chat_for_update(chat)
-
         send_update_to_all_parties_regarding_chat(
             request,
             user_id,
-            chat.id,
-            chat_serializer,
-            message_serializer
+            chat_data['id'],
+            chat_data,
+            message_data
         )
         
         return Response(status=HTTP_201_CREATED, data={'id': str(message.id)})
-    
+
+    @post_chat_message.mapping.get
+    def get_chat_messages(self, request, user_id):
+        if user_id == request.user.id:
+            return Response(status=HTTP_400_BAD_REQUEST, data={'error': 'You cannot chat with yourself'})
+
+        messages = UserChatService.get_chat_messages(request, user_id)
+        if messages is None:
+            return Response(status=HTTP_404_NOT_FOUND)
+
+        pagination = KeysetPagination(page_size=CHAT_MESSAGES_WINDOW)
+        paginated_data = pagination.paginate_queryset(messages, request)
+
+        serializer = UserChatSerializerService.serialize_messages_for_chat(paginated_data)
+        return pagination.get_paginated_response(serializer.data)
+
     @action(
         detail=False,
         methods=['put'],
@@ -494,6 +524,8 @@ class UserViewSet(ViewSet):
         if not updated_rows:
             return Response(status=HTTP_400_BAD_REQUEST)
 
+        InquiryModerator.objects.filter(inquiry_id=inquiry_id).update(unread_count=0)
+
         return Response(status=HTTP_200_OK)
     
     @action(
@@ -541,6 +573,44 @@ class UserViewSet(ViewSet):
         
         return Response(status=HTTP_201_CREATED, data={'id': str(message.id)})
     
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'me/notifications',
+    )
+    def get_notifications(self, request):
+        notifications = NotificationService.get_notifications(request.user.id)
+
+        pagination = KeysetPagination()
+        paginated_data = pagination.paginate_queryset(notifications, request)
+
+        serializer = NotificationSerializerService.serialize_notifications(paginated_data)
+        return pagination.get_paginated_response(serializer.data)
+    
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'me/notifications/unread-count',
+    )
+    def get_unread_notifications_count(self, request):
+        count = NotificationService.get_unread_count(request.user.id)
+        return Response({'count': count})
+    
+    @action(
+        detail=False,
+        methods=['put'],
+        url_path=r'me/notifications/mark-as-read',
+    )
+    def mark_notifications_as_read(self, request):
+        serializer = NotificationMarkAsReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        NotificationService.mark_notifications_as_read(
+            request.user.id,
+            serializer.validated_data.get('ids', None)
+        )
+        return Response(status=HTTP_200_OK)
+    
 
 class JWTViewSet(ViewSet):
     permission_classes = [IsAuthenticated]